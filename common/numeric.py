@@ -0,0 +1,140 @@
+"""数值列清洗与转换的公共工具（JSON 转 Excel、会计核算偏离度等模块共用）。
+
+- 已是数值类型的列原样返回，不再经过 `astype(str)` 转成文本再解析回来；
+- 只清洗 object/字符串列中的字符串单元格：字符串单元格整体交给 polars 的字符串函数一次处理
+  （全角转半角，删除千分位分隔符、空白、“元”与货币符号），Python 只逐个处理非字符串单元格；
+  未安装 polars 时退回为逐个单元格清洗，结果相同；
+- `(123.45)` 形式的括号负数转为 `-123.45`；
+- 全为字符串的列在 polars 中直接解析为数值，polars 与 Python 解析结果可能不同时（如 `1_000`）退回 pandas；
+- 布尔值与原写法（`astype(str)` 后解析）一致，转换为缺失值。
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_bool_dtype, is_numeric_dtype
+
+# 全角数字与常用全角符号 -> 半角
+_TRANSLATE = {ord('０') + i: ord('0') + i for i in range(10)}
+_TRANSLATE.update({ord('．'): '.', ord('－'): '-', ord('＋'): '+', ord('（'): '(', ord('）'): ')'})
+# 需要删除的字符：千分位分隔符、空格、单位与货币符号
+_TRANSLATE.update({ord(c): None for c in (',', '，', ' ', '　', '\t', '元', '¥', '￥')})
+
+# 同一张转换表，供 polars 的 str.replace_many 使用
+_REPLACE_MANY = {chr(k): '' if v is None else (v if isinstance(v, str) else chr(v)) for k, v in _TRANSLATE.items()}
+# 全为整数文本时 pd.to_numeric 给出 int64
+_INT_PATTERN = r'^[+-]?\d{1,18}$'
+
+
+def _import_polars():
+    try:
+        import polars as pl  # type: ignore
+    except ImportError:
+        return None
+    return pl
+
+
+def _clean_cell(value):
+    if value.__class__ is not str:
+        return value
+    if value.isascii():
+        # 常见情况只需去掉千分位与空白，str.replace 远快于 str.translate
+        if ',' in value:
+            value = value.replace(',', '')
+        if ' ' in value or '\t' in value:
+            value = value.replace(' ', '').replace('\t', '')
+    else:
+        value = value.translate(_TRANSLATE)
+    if value[:1] == '(' and value[-1:] == ')':
+        value = '-' + value[1:-1]
+    return value
+
+
+def _clean_strings(pl, values: list):
+    """在 polars 中清洗一组字符串（可含 None），返回 polars 字符串列。"""
+    s = pl.Series('v', values, dtype=pl.String).str.replace_many(_REPLACE_MANY)
+    paren = s.str.starts_with('(') & s.str.ends_with(')')
+    if paren.any():
+        s = pl.select(pl.when(paren).then(pl.lit('-') + s.str.slice(1, s.str.len_chars() - 2)).otherwise(s)).to_series()
+    return s
+
+
+def _string_mask(values: np.ndarray) -> np.ndarray:
+    """object 数组中字符串单元格的掩码。"""
+    if infer_dtype(values, skipna=True) == 'string':
+        return ~pd.isna(values)
+    return np.fromiter((v.__class__ is str for v in values), dtype=bool, count=len(values))
+
+
+def _clean_values(series: pd.Series):
+    """(清洗后的 object 数组, 字符串单元格的掩码)。"""
+    values = series.to_numpy(dtype=object, copy=True)
+    strings = _string_mask(values)
+    if strings.any():
+        pl = _import_polars()
+        text = values[strings].tolist()
+        cleaned = _clean_strings(pl, text).to_list() if pl is not None else [_clean_cell(v) for v in text]
+        values[strings] = np.array(cleaned, dtype=object)
+    return values, strings
+
+
+def clean_numeric_text(series: pd.Series) -> pd.Series:
+    """清洗数值字符串：只改写字符串单元格，其余单元格（数字、缺失值等）保持原值。"""
+    if is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype):
+        return series
+    values, _ = _clean_values(series)
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def _python_float(value: str) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _parse_strings_polars(pl, series: pd.Series):
+    """全为字符串（与缺失值）的列：在 polars 中清洗并解析；结果可能与 pd.to_numeric 不同时返回 None。"""
+    cleaned = _clean_strings(pl, series.to_numpy(dtype=object, na_value=None).tolist())
+    parsed = cleaned.cast(pl.Float64, strict=False)
+    bad = cleaned.filter(cleaned.is_not_null() & parsed.is_null())
+    if any(_python_float(v) for v in bad.to_list()):
+        # polars 判为无效、而 Python float 可以解析的文本（如 '1_000'）
+        return None
+    if parsed.null_count() == 0 and (parsed == parsed.floor()).all() and cleaned.str.contains(_INT_PATTERN).all():
+        return pd.Series(cleaned.cast(pl.Int64).to_numpy(), index=series.index, name=series.name)
+    return pd.Series(parsed.to_numpy(), index=series.index, name=series.name, dtype='float64')
+
+
+def _parse_numeric(series: pd.Series, errors: str) -> pd.Series:
+    # 快速路径：整列都能直接转为 float 且不全是整数时，结果与 pd.to_numeric 相同
+    try:
+        values = np.array(series.tolist(), dtype='float64')
+    except (TypeError, ValueError, OverflowError):
+        values = None
+    if values is not None:
+        nan = np.isnan(values)
+        if nan.any() or not np.array_equal(values, np.floor(values)):
+            return pd.Series(values, index=series.index, name=series.name)
+    # 含无法解析的文本，或全为整数（to_numeric 会给出 int64）时交给 pandas
+    return pd.to_numeric(series, errors=errors)
+
+
+def to_numeric_fast(series: pd.Series, errors: str = 'coerce') -> pd.Series:
+    """把一列转换为数值；数值列直接返回，文本列先经 `clean_numeric_text` 清洗。"""
+    if is_bool_dtype(series.dtype):
+        # 布尔值不是金额：与原写法（'True' 无法解析）一致，转换为缺失值
+        return pd.Series(np.nan, index=series.index, name=series.name, dtype='float64')
+    if is_numeric_dtype(series.dtype):
+        return series
+    pl = _import_polars()
+    if pl is not None and errors == 'coerce' and infer_dtype(series, skipna=True) == 'string':
+        result = _parse_strings_polars(pl, series)
+        if result is not None:
+            return result
+    values, strings = _clean_values(series)
+    # 非字符串单元格中的布尔值同样转换为缺失值
+    others = np.flatnonzero(~strings)
+    bools = [i for i, v in zip(others.tolist(), values[others].tolist()) if v.__class__ is bool or v.__class__ is np.bool_]
+    if bools:
+        values[bools] = None
+    return _parse_numeric(pd.Series(values, index=series.index, name=series.name, dtype=object), errors)
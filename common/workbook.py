@@ -0,0 +1,76 @@
+"""多 sheet 工作簿的并行读取（Excel 转 JSON、运维记录表等模块共用）。
+
+`pd.read_excel(path, sheet_name=None)` 在一个进程中逐个解析 sheet，耗时为各 sheet 之和。
+`read_workbook` 只读取一次 sheet 列表，再由多个工作进程各自解析一部分 sheet，
+耗时接近最大的 sheet，返回与 `pd.read_excel(sheet_name=None)` 相同的 {sheet 名: DataFrame}（顺序相同）：
+
+- xlsx/xlsm 的 sheet 列表与各 sheet XML 的大小直接从 zip 目录中读取（不加载共享字符串表），
+  大的 sheet 先提交，避免最后才开始解析最大的 sheet；
+- 文件较小、只有一个 sheet 或 workers <= 1 时直接调用 `pd.read_excel`，不启动进程
+  （启动进程并导入 pandas 的开销在 Windows 上约 1 秒）。
+"""
+import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+# 小于此大小的文件不并行读取
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _xlsx_sheets(path: Path) -> List[Tuple[str, int]]:
+    """从 xlsx 的 zip 目录读取 [(sheet 名, sheet XML 解压后的字节数)]，按工作簿中的顺序。"""
+    with zipfile.ZipFile(path) as zf:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.iter(f'{_NS_PKG_REL}Relationship'):
+            target = rel.get('Target', '')
+            # Target 一般相对于 xl/，也可能是以 / 开头的包内绝对路径
+            targets[rel.get('Id')] = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        sizes = {info.filename: info.file_size for info in zf.infolist()}
+        sheets = []
+        for sheet in workbook.iter(f'{_NS_MAIN}sheet'):
+            sheets.append((sheet.get('name'), sizes.get(targets.get(sheet.get(f'{_NS_REL}id')), 0)))
+    return sheets
+
+
+def workbook_sheets(path: Path) -> List[Tuple[str, int]]:
+    """[(sheet 名, 大小估计)]；非 xlsx 格式（如 xls）的大小为 0。"""
+    try:
+        return _xlsx_sheets(Path(path))
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        with pd.ExcelFile(path) as xls:
+            return [(name, 0) for name in xls.sheet_names]
+
+
+def _read_sheet(path: str, name: str, read_kwargs: Dict) -> pd.DataFrame:
+    return pd.read_excel(path, sheet_name=name, **read_kwargs)
+
+
+def read_workbook(path, workers: int = None, **read_kwargs) -> Dict[str, pd.DataFrame]:
+    """读取所有 sheet，返回 {sheet 名: DataFrame}；read_kwargs 传给 `pd.read_excel`。
+
+    workers 为进程数，默认取 CPU 核数与 sheet 数中的较小值。
+    """
+    path = str(path)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or os.path.getsize(path) < PARALLEL_MIN_BYTES:
+        return pd.read_excel(path, sheet_name=None, **read_kwargs)
+    sheets = workbook_sheets(path)
+    if len(sheets) <= 1:
+        return pd.read_excel(path, sheet_name=None, **read_kwargs)
+    order = sorted(sheets, key=lambda s: s[1], reverse=True)
+    with ProcessPoolExecutor(max_workers=min(workers, len(sheets))) as pool:
+        futures = {name: pool.submit(_read_sheet, path, name, read_kwargs) for name, _ in order}
+        return {name: futures[name].result() for name, _ in sheets}
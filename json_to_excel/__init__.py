@@ -1,5 +1,6 @@
 """Package entry for json_to_excel. Expose core functions for import by GUI or other modules."""
 from .core import (
+    load_json,
     normalize_top_items,
     split_parent_children,
     coerce_numeric_columns,
@@ -10,10 +11,13 @@ from .core import (
     convert_multi,
     stream_to_csv,
 )
+from .flatten import SchemaFlattener, flatten_records
+from .cache import ParsedCache
 
 from . import cli
 
 __all__ = [
+    'load_json',
     'normalize_top_items',
     'split_parent_children',
     'coerce_numeric_columns',
@@ -23,5 +27,8 @@ __all__ = [
     'convert_flat',
     'convert_multi',
     'stream_to_csv',
+    'SchemaFlattener',
+    'flatten_records',
+    'ParsedCache',
     'cli',
 ]
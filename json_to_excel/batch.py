@@ -0,0 +1,171 @@
+"""批量转换：一次启动转换整个目录或通配符匹配的所有 JSON 文件。
+
+- 文件分配给进程池并发转换，进程数按 CPU 核数与可用内存确定（也可用 --jobs 指定）；
+- 工作进程启动时预先导入 pandas / openpyxl / 转换模块，之后连续处理多个文件，不再重复导入；
+- 所有文件处理完后写出汇总清单（manifest.json）：每个文件的输出路径、行数、各阶段耗时、失败原因，
+  以及总计。单个文件失败不影响其余文件。
+"""
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .columnar import COLUMNAR_FORMATS
+from .metrics import available_memory_bytes
+
+# 输入目录中参与转换的文件后缀；NDJSON 只能按行流式解析，仅在 --stream 时收集
+INPUT_SUFFIXES = ('.json',)
+STREAM_INPUT_SUFFIXES = INPUT_SUFFIXES + ('.jsonl', '.ndjson')
+# 每个工作进程的基础内存（解释器、pandas、openpyxl 与写出缓冲）
+WORKER_BASE_BYTES = 256 * 1024 * 1024
+# 非流式模式下解析后的对象与 DataFrame 约为 JSON 文件大小的倍数
+IN_MEMORY_FACTOR = 8
+
+
+def collect_inputs(pattern: str, stream: bool = False) -> List[Path]:
+    """目录 -> 其中（不含子目录）的 .json 文件（stream 时另含 .jsonl/.ndjson）；否则按通配符匹配（支持 **）。结果按路径排序。"""
+    path = Path(pattern)
+    if path.is_dir():
+        suffixes = STREAM_INPUT_SUFFIXES if stream else INPUT_SUFFIXES
+        files = [p for p in path.iterdir() if p.is_file() and p.suffix.lower() in suffixes]
+    else:
+        files = [Path(p) for p in glob.glob(pattern, recursive=True) if Path(p).is_file()]
+    return sorted(files)
+
+
+def _input_root(pattern: str, inputs: List[Path]) -> Path:
+    if Path(pattern).is_dir():
+        return Path(pattern)
+    return Path(os.path.commonpath([str(p.parent.resolve()) for p in inputs])) if inputs else Path('.')
+
+
+def output_path_for(input_path: Path, root: Path, output_dir: Path, suffix: str) -> Path:
+    """输出路径保持输入相对 root 的子目录结构，避免不同目录下的同名文件互相覆盖。"""
+    try:
+        rel = input_path.resolve().relative_to(root.resolve())
+    except ValueError:
+        rel = Path(input_path.name)
+    return (output_dir / rel).with_suffix(suffix)
+
+
+def default_jobs(inputs: List[Path], stream: bool, cpu_count: int = None, available: int = None) -> int:
+    """进程数：不超过 CPU 核数与文件数，并保证按最大文件估算的内存不超过当前可用内存。"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    jobs = max(1, min(cpu_count, len(inputs)))
+    available = available if available is not None else available_memory_bytes()
+    if available is None or not inputs:
+        return jobs
+    largest = max(p.stat().st_size for p in inputs)
+    per_worker = WORKER_BASE_BYTES + (0 if stream else largest * IN_MEMORY_FACTOR)
+    return max(1, min(jobs, available // per_worker))
+
+
+def _warm_imports() -> None:
+    """工作进程初始化：预先导入转换所需的模块，后续每个文件直接使用。"""
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+
+    from . import cli, core  # noqa: F401
+
+
+def convert_one(input_path: Path, output_path: Path, args) -> Dict:
+    """在工作进程中转换一个文件，返回该文件的清单记录（失败时记录错误而不抛出）。"""
+    from .cli import convert_file
+
+    record = {'input': str(input_path), 'output': str(output_path), 'status': 'ok', 'input_bytes': input_path.stat().st_size}
+    start = time.perf_counter()
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        outputs, report = convert_file(input_path, output_path, args)
+        record['outputs'] = {name: str(p) for name, p in outputs.items()}
+        record['rows'] = report.get('row_count', report.get('parent_row_count'))
+        if 'children_counts' in report:
+            record['children_counts'] = report['children_counts']
+        record['metrics'] = report.get('metrics')
+    except Exception as e:
+        record['status'] = 'failed'
+        record['error'] = f'{type(e).__name__}: {e}'
+        record['traceback'] = traceback.format_exc(limit=5)
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(inputs: List[Path], outputs: List[Path], args, jobs: int, on_done=None) -> List[Dict]:
+    """并发转换，返回与 inputs 顺序一致的清单记录。on_done(record) 在每个文件完成时调用。"""
+    records: Dict[int, Dict] = {}
+    if jobs <= 1:
+        for i, (src, dst) in enumerate(zip(inputs, outputs)):
+            records[i] = convert_one(src, dst, args)
+            if on_done:
+                on_done(records[i])
+        return [records[i] for i in range(len(inputs))]
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_imports) as pool:
+        futures = {pool.submit(convert_one, src, dst, args): i for i, (src, dst) in enumerate(zip(inputs, outputs))}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                records[i] = future.result()
+            except BrokenProcessPool as e:
+                # 工作进程异常退出（如内存不足被系统终止）：该文件记为失败
+                records[i] = {'input': str(inputs[i]), 'output': str(outputs[i]), 'status': 'failed', 'error': f'工作进程异常退出: {e}'}
+            if on_done:
+                on_done(records[i])
+    return [records[i] for i in range(len(inputs))]
+
+
+def build_manifest(records: List[Dict], jobs: int, started: datetime, elapsed: float) -> Dict:
+    ok = [r for r in records if r['status'] == 'ok']
+    return {
+        'started': started.isoformat(timespec='seconds'),
+        'elapsed_seconds': round(elapsed, 3),
+        'jobs': jobs,
+        'files': len(records),
+        'succeeded': len(ok),
+        'failed': len(records) - len(ok),
+        'total_rows': sum(r.get('rows') or 0 for r in ok),
+        'total_input_bytes': sum(r.get('input_bytes') or 0 for r in records),
+        'records': records,
+    }
+
+
+def _output_suffix(args) -> str:
+    fmt = args.format or ('csv' if args.stream else 'xlsx')
+    return COLUMNAR_FORMATS.get(fmt, f'.{fmt}')
+
+
+def run_batch_cli(args) -> Dict:
+    """CLI 批量模式：--input 为目录或通配符，--output 为输出目录。返回汇总清单。"""
+    inputs = collect_inputs(args.input, args.stream)
+    if not inputs:
+        raise SystemExit(f'没有匹配的输入文件: {args.input}')
+    output_dir = Path(args.output)
+    root = _input_root(args.input, inputs)
+    suffix = _output_suffix(args)
+    outputs = [output_path_for(p, root, output_dir, suffix) for p in inputs]
+    jobs = args.jobs or default_jobs(inputs, args.stream)
+    print(f'批量转换: {len(inputs)} 个文件，{jobs} 个进程 -> {output_dir}')
+
+    def on_done(record):
+        if record['status'] == 'ok':
+            print(f'  完成 {record["input"]} -> {record["output"]} （行数: {record.get("rows")}，{record.get("seconds")}s）')
+        else:
+            print(f'  失败 {record["input"]}: {record.get("error")}')
+
+    started = datetime.now()
+    start = time.perf_counter()
+    records = run_batch(inputs, outputs, args, jobs, on_done=on_done)
+    manifest = build_manifest(records, jobs, started, time.perf_counter() - start)
+
+    manifest_path = Path(args.manifest) if args.manifest else output_dir / 'manifest.json'
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    print(f'批量转换结束: 成功 {manifest["succeeded"]}，失败 {manifest["failed"]}，总行数 {manifest["total_rows"]}，'
+          f'耗时 {manifest["elapsed_seconds"]}s；清单: {manifest_path}')
+    return manifest
@@ -0,0 +1,133 @@
+"""已解析输入的缓存：同一个 JSON 文件换不同参数（flat / multi / split_fields 等）反复转换时跳过 JSON 解析。
+
+缓存目录下：
+- `<内容哈希>.pkl`：`load_json` 的解析结果（pickle）。各种模式与拆表参数都从同一份解析结果开始，
+  所以按输入内容而不是按转换参数缓存；读取 pickle 约比 json.loads 快一倍；
+- `index.json`：文件（绝对路径、大小、修改时间）-> 内容哈希。大小与修改时间都未变时直接使用记录的哈希，
+  否则重新计算（blake2b，按只读内存映射读取）。内容相同的文件（如复制、改名后）共用同一个缓存项。
+
+缓存项总大小超过 max_bytes 时按最近使用时间（缓存文件的修改时间，命中时更新）从旧到新删除。
+多个进程（批量模式）可以共用同一个缓存目录：缓存项与索引都先写临时文件再原子替换，索引的并发更新
+最多丢失部分记录（之后重新计算哈希），不会读到不完整的文件。
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .mapped import map_file
+
+# 缓存格式变化时递增，旧的缓存项不再命中并按 LRU 淘汰
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'json_to_excel'
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+INDEX_FILE = 'index.json'
+HASH_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+def content_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with map_file(path, sequential=True) as buf:
+        view = memoryview(buf)
+        try:
+            for start in range(0, len(view), HASH_BLOCK_BYTES):
+                h.update(view[start:start + HASH_BLOCK_BYTES])
+        finally:
+            view.release()
+    return h.hexdigest()
+
+
+def _replace(path: Path, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class ParsedCache:
+    """按输入文件内容缓存 JSON 解析结果，总大小不超过 max_bytes（LRU 淘汰）。"""
+
+    def __init__(self, directory: Path = None, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = Path(directory) if directory is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self) -> Dict[str, Dict]:
+        try:
+            with (self.directory / INDEX_FILE).open('r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def key(self, path: Path) -> str:
+        """输入文件的缓存键（内容哈希）；大小与修改时间未变时使用索引中记录的哈希。"""
+        path = Path(path).resolve()
+        st = path.stat()
+        index = self._index()
+        entry = index.get(str(path))
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['hash']
+        digest = f'v{CACHE_VERSION}-{content_hash(path)}'
+        index[str(path)] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': digest}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _replace(self.directory / INDEX_FILE, lambda f: f.write(json.dumps(index, ensure_ascii=False).encode('utf-8')))
+        return digest
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / f'{key}.pkl'
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存项并更新其最近使用时间；不存在或无法读取时返回 None。"""
+        path = self.entry_path(key)
+        try:
+            with path.open('rb') as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: Any) -> None:
+        """写入缓存项，之后按 LRU 淘汰使总大小不超过 max_bytes。单项超过 max_bytes 时不写入。"""
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _replace(self.entry_path(key), lambda f: f.write(payload))
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob('*.pkl'))
+
+    def clear(self) -> None:
+        for path in self.directory.glob('*.pkl'):
+            path.unlink(missing_ok=True)
+        (self.directory / INDEX_FILE).unlink(missing_ok=True)
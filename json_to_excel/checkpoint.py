@@ -0,0 +1,80 @@
+"""流式转换的检查点：中断（崩溃或取消）后从最后一个已提交的批次继续，而不是从头开始。
+
+检查点目录为输出文件同目录的 `.<输出文件名>.resume/`，其中：
+- `checkpoint.pkl`：已处理到的位置（顶层元素序号及其中已处理的记录数，附带当时的文件字节位置）、
+  各表已写出的行数与列模式（SchemaFlattener）、报告累积器，以及输出目标的状态
+  （CSV 为各文件已提交的字节数，xlsx / 列式格式为已提交的分段文件）；
+- 输出目标的分段文件（xlsx 与列式格式在检查点模式下先把各批写为分段，结束时再合并为最终文件）。
+
+检查点按批次边界提交，两次提交至少间隔 `interval` 秒；先写临时文件再原子替换，提交过程中中断也不会损坏。
+转换成功结束后删除整个目录。输入文件（大小、修改时间）或转换参数与检查点不一致时拒绝续传。
+"""
+import os
+import pickle
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_FILE = 'checkpoint.pkl'
+# 两次提交检查点之间的最短间隔（秒）
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+
+
+def checkpoint_dir(output_path: Path) -> Path:
+    output_path = Path(output_path)
+    return output_path.with_name(f'.{output_path.name}.resume')
+
+
+def input_fingerprint(input_path: Path) -> Dict[str, Any]:
+    st = os.stat(input_path)
+    return {'path': str(Path(input_path).resolve()), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def load_checkpoint(directory: Path) -> Optional[Dict]:
+    """读取检查点；不存在时返回 None。"""
+    path = Path(directory) / CHECKPOINT_FILE
+    if not path.exists():
+        return None
+    with path.open('rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f'检查点版本不兼容: {path}')
+    return state
+
+
+def validate_checkpoint(state: Dict, fingerprint: Dict, options: Dict) -> None:
+    """检查点与当前输入文件、转换参数不一致时抛出 ValueError。"""
+    if state['input'] != fingerprint:
+        raise ValueError('输入文件在中断后发生了变化，无法续传；请删除检查点目录后重新转换')
+    if state['options'] != options:
+        raise ValueError('转换参数与中断时不一致，无法续传；请使用相同参数或删除检查点目录后重新转换')
+
+
+class Checkpointer:
+    """按间隔把状态原子写入检查点目录。"""
+
+    def __init__(self, directory: Path, interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._last = time.monotonic()
+        self.commits = 0
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last >= self.interval
+
+    def commit(self, state: Dict) -> None:
+        state = dict(state, version=CHECKPOINT_VERSION)
+        tmp = self.directory / (CHECKPOINT_FILE + '.tmp')
+        with tmp.open('wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / CHECKPOINT_FILE)
+        self._last = time.monotonic()
+        self.commits += 1
+
+    def remove(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,54 +1,120 @@
 """命令行入口，包装 `core` 中的功能为 CLI 参数。"""
 from pathlib import Path
+from typing import Dict, Tuple
 import argparse
+import glob
 import json
+import sys
 
 from . import core
+from .cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, ParsedCache
+from .metrics import ConversionMetrics
+from .columnar import COLUMNAR_FORMATS, DEFAULT_ROW_GROUP_SIZE, columnar_table_path
+from .sinks import OUTPUT_FORMATS, resolve_format
 
 
 def main(argv=None):
     parser = argparse.ArgumentParser(description='JSON -> Excel/CSV 转换（通用入口）')
-    parser.add_argument('--input', '-i', required=True, help='输入 JSON 文件路径')
-    parser.add_argument('--output', '-o', required=True, help='输出路径 (.xlsx 或 .csv 当使用 --stream)')
+    parser.add_argument('--input', '-i', required=True, help='输入 JSON 文件路径；为目录或通配符（如 "data/*.json"，需加引号）时进入批量模式')
+    parser.add_argument('--output', '-o', required=True, help='输出路径 (.xlsx/.csv/.parquet/.arrow/.feather)；批量模式下为输出目录')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help='输出格式（默认按输出文件后缀判断，非流式模式缺省为 xlsx）；parquet/arrow/feather 为带类型的列式文件，multi 模式下主表与各子表分别写成单独文件')
     parser.add_argument('--mode', choices=('flat', 'multi'), default='flat', help='转换模式')
     parser.add_argument('--numeric-cols', '-n', nargs='*', help='要强制转换为数值的列名')
     parser.add_argument('--date-cols', '-d', nargs='*', help='要解析为日期的列名')
-    parser.add_argument('--dedupe-by', nargs='*', help='按这些列去重（保留第一个）')
-    parser.add_argument('--raw-sheet', action='store_true', help='在 Excel 中保留原始 JSON')
+    parser.add_argument('--dedupe-by', nargs='*', help='按这些列去重（保留第一个）；流式模式下跨批次去重，只保存键的指纹')
+    parser.add_argument('--raw-sheet', action='store_true', help='保留原始 JSON：xlsx 写入 raw_json sheet（按块分行），其他格式复制为 <stem>_raw.json 附属文件')
     parser.add_argument('--split-fields', nargs='*', help='multi 模式下只拆分这些字段（默认拆所有 list-of-dict 字段）')
-    parser.add_argument('--stream', action='store_true', help='启用流式解析（只支持 flat 模式并输出 CSV）')
+    parser.add_argument('--split-depth', type=int, default=1, help='multi 模式下拆表的层数：1 只拆顶层记录中的 list-of-dict 字段（默认），更大时继续拆分子记录中的，0 表示不限层数')
+    parser.add_argument('--workers', type=int, default=1, help='非流式模式下用于扁平化的进程数；流式模式下为 NDJSON 输入的并行解析进程数（默认 1，即单进程）')
+    parser.add_argument('--engine', choices=core.ENGINES, default='pandas', help='数值转换、日期解析与去重的执行引擎（默认 pandas；polars 为多线程惰性查询，输出相同）')
+    parser.add_argument('--stream', action='store_true', help='启用流式解析，分批写出 CSV 或 xlsx（multi 模式下每个子表单独一个 CSV/sheet）')
     parser.add_argument('--stream-batch', type=int, default=5000, help='流式模式批次大小')
+    parser.add_argument('--checkpoint', action='store_true', help='流式模式下记录检查点，保存在输出文件同目录的 .<输出文件名>.resume/，成功后删除（xlsx 与列式格式需先写分段文件再合并）')
+    parser.add_argument('--resume', action='store_true', help='流式模式下从上次中断（崩溃或取消）时最后提交的批次继续，需与中断时使用相同的输入与参数；隐含 --checkpoint')
+    parser.add_argument('--input-format', choices=['auto', 'json', 'ndjson'], default='auto',
+                        help='流式模式的输入格式：json 为 top-level 数组，ndjson 为每行一个 JSON；auto 按文件开头检测（默认）')
+    parser.add_argument('--prescan-mb', type=float, default=0, help='流式模式下先扫描文件开头若干 MB 确定各表的列顺序（默认 0，不预扫描）')
+    parser.add_argument('--late-columns', choices=['rewrite', 'spill'], default='rewrite',
+                        help="流式 CSV 中表头写出后才出现的列：rewrite 结束时重写表头（默认），spill 写入附属的 _late 文件")
+    parser.add_argument('--jobs', '-j', type=int, help='批量模式下同时转换的文件数（进程数），默认按 CPU 核数与可用内存确定')
+    parser.add_argument('--manifest', help='批量模式下的汇总清单路径（默认 <输出目录>/manifest.json）')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE, help=f'流式写出 parquet/arrow/feather 时每个行组的行数（默认 {DEFAULT_ROW_GROUP_SIZE}）')
+    parser.add_argument('--cache', action='store_true', help='非流式模式下缓存 JSON 解析结果（按文件内容），同一文件换参数再次转换时跳过解析')
+    parser.add_argument('--cache-dir', help=f'解析结果缓存目录（默认 {DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_CACHE_MAX_BYTES / 1024 ** 2, help='缓存总大小上限（MB），超过时删除最久未使用的缓存项（默认 %(default).0f）')
     args = parser.parse_args(argv)
 
+    if (args.resume or args.checkpoint) and not args.stream:
+        raise SystemExit('--checkpoint / --resume 仅用于流式模式（--stream）')
+
+    if is_batch_input(args.input):
+        from .batch import run_batch_cli
+
+        return run_batch_cli(args)
+
     input_path = Path(args.input)
     output_path = Path(args.output)
 
     if not input_path.exists():
         raise SystemExit(f'输入文件不存在: {input_path}')
 
+    outputs, report = convert_file(input_path, output_path, args)
     if args.stream:
-        if args.mode != 'flat':
-            raise SystemExit('流式模式当前仅支持 flat')
-        # stream to csv
-        core.stream_to_csv(input_path, output_path, numeric_cols=args.numeric_cols, date_cols=args.date_cols, batch_size=args.stream_batch)
-        print(f'流式写入完成: {output_path}')
-        return
-
-    with input_path.open('r', encoding='utf-8') as f:
-        data = json.load(f)
-        raw_text = json.dumps(data, ensure_ascii=False) if args.raw_sheet else None
-
-    items = core.normalize_top_items(data)
-    if args.mode == 'flat':
-        df, report = core.convert_flat(items, output_path, numeric_cols=args.numeric_cols, date_cols=args.date_cols, dedupe_by=args.dedupe_by, raw_text=raw_text if args.raw_sheet else None)
-        print(f'已写入 Excel: {output_path} （行数: {report.get("row_count")})')
-        print('报告摘要:', json.dumps(report, ensure_ascii=False))
-        return
-
-    parent_df, children, report = core.convert_multi(items, output_path, numeric_cols=args.numeric_cols, date_cols=args.date_cols, dedupe_by=args.dedupe_by, split_fields=args.split_fields, raw_text=raw_text if args.raw_sheet else None)
-    print(f'已写入 Excel (multi): {output_path} （主表行数: {report.get("parent_row_count")}，子表: {list(children.keys())}）')
+        print(f'流式写入完成: {outputs["data"]}')
+        if args.mode == 'multi':
+            for name, path in outputs.items():
+                if name not in ('data', 'raw_json'):
+                    print(f'  子表 {name}: {path}')
+        if 'raw_json' in outputs:
+            print(f'  原始 JSON: {outputs["raw_json"]}')
+        if report.get('rejected_lines'):
+            print(f'  无法解析的行: {report["rejected_lines"]} （起始字节位置: {report["rejected_offsets"][:20]}）')
+    elif args.mode == 'flat':
+        print(f'已写入: {outputs["data"]} （行数: {report.get("row_count")})')
+    else:
+        print(f'已写入 (multi): {outputs["data"]} （主表行数: {report.get("parent_row_count")}，子表: {list(report["children_counts"])}）')
     print('报告摘要:', json.dumps(report, ensure_ascii=False))
 
 
+def is_batch_input(value: str) -> bool:
+    """--input 为目录，或含通配符（* ? [）且不是已存在的文件时进入批量模式。"""
+    path = Path(value)
+    return path.is_dir() or (glob.has_magic(value) and not path.is_file())
+
+
+def _split_depth(args) -> int:
+    return args.split_depth if args.split_depth > 0 else sys.maxsize
+
+
+def convert_file(input_path: Path, output_path: Path, args) -> Tuple[Dict[str, Path], Dict]:
+    """按命令行参数转换单个文件，返回 ({表名: 输出路径}, report)；批量模式的工作进程同样调用此函数。
+
+    非流式模式下返回的输出路径只含主表（xlsx 时各子表在同一工作簿中）。
+    """
+    metrics = ConversionMetrics(input_path)
+    if args.stream:
+        return core.stream_to_csv(input_path, output_path, numeric_cols=args.numeric_cols, date_cols=args.date_cols, batch_size=args.stream_batch, mode=args.mode, split_fields=args.split_fields, output_format=args.format, row_group_size=args.row_group_size, engine=args.engine, raw_sheet=args.raw_sheet, metrics=metrics, checkpoint=args.checkpoint or args.resume, resume=args.resume, prescan_mb=args.prescan_mb, late_columns=args.late_columns, input_format=args.input_format, workers=args.workers, dedupe_by=args.dedupe_by or None, max_depth=_split_depth(args))
+
+    cache = ParsedCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 ** 2)) if args.cache else None
+    data = core.load_json(input_path, metrics=metrics, cache=cache)
+    # 原始 JSON 直接从输入文件按块复制，不再重新序列化
+    raw_source = input_path if args.raw_sheet else None
+
+    with metrics.stage('normalize'):
+        items = core.normalize_top_items(data)
+    del data
+    fmt = resolve_format(output_path, args.format, default='xlsx')
+    if fmt in COLUMNAR_FORMATS:
+        # 列式输出的后缀按格式修正，子表写到同目录的单独文件
+        output_path_display = columnar_table_path(output_path, 'data', fmt)
+    else:
+        output_path_display = output_path
+    if args.mode == 'flat':
+        _, report = core.convert_flat(items, output_path, numeric_cols=args.numeric_cols, date_cols=args.date_cols, dedupe_by=args.dedupe_by, raw_source=raw_source, workers=args.workers, output_format=args.format, engine=args.engine, metrics=metrics)
+    else:
+        _, _, report = core.convert_multi(items, output_path, numeric_cols=args.numeric_cols, date_cols=args.date_cols, dedupe_by=args.dedupe_by, split_fields=args.split_fields, raw_source=raw_source, workers=args.workers, output_format=args.format, engine=args.engine, metrics=metrics, max_depth=_split_depth(args))
+    return {'data': output_path_display}, report
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,189 @@
+"""列式输出（Parquet / Arrow IPC / Feather）：按表写出带类型的列式文件，基于 polars。
+
+pandas -> polars 的转换逐列进行，不依赖 pyarrow：
+- numpy 数值/布尔/日期列直接按类型转换，float 的 NaN 记为 null；
+- 其余列（字符串、object）按取值推断类型；数字与字符串混合、list/dict 等无法统一类型的值
+  转为字符串（与 CSV/xlsx 输出中的文本一致）。
+"""
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# 输出格式 -> 文件后缀；arrow 与 feather 都是 Arrow IPC 文件格式（Feather v2）
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow', 'feather': '.feather'}
+
+# 流式写出时每个行组（row group / record batch）的行数
+DEFAULT_ROW_GROUP_SIZE = 100000
+
+
+def _import_polars():
+    try:
+        import polars as pl  # type: ignore
+    except Exception as e:
+        raise RuntimeError('Parquet/Arrow/Feather 输出需要安装 polars') from e
+    return pl
+
+
+def _object_series(pl, name: str, s: pd.Series):
+    values = [None if v is None or v is pd.NaT or v is pd.NA or (isinstance(v, float) and v != v)
+              else (str(v) if isinstance(v, (list, dict, tuple, set)) else v)
+              for v in s.tolist()]
+    try:
+        return pl.Series(name, values, strict=True)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        # 整数与小数混合
+        return pl.Series(name, [None if v is None else float(v) for v in values], dtype=pl.Float64)
+    return pl.Series(name, [None if v is None else str(v) for v in values], dtype=pl.String)
+
+
+def frame_to_polars(df: pd.DataFrame):
+    """把 pandas DataFrame 逐列转换为 polars DataFrame（列名统一为字符串）。"""
+    pl = _import_polars()
+    columns = []
+    for i, col in enumerate(df.columns):
+        s = df.iloc[:, i]
+        name = str(col)
+        kind = s.dtype.kind if isinstance(s.dtype, np.dtype) else None
+        if kind in ('i', 'u', 'b', 'M', 'm'):
+            columns.append(pl.Series(name, s.to_numpy()))
+        elif kind == 'f':
+            columns.append(pl.Series(name, s.to_numpy(), nan_to_null=True))
+        else:
+            columns.append(_object_series(pl, name, s))
+    return pl.DataFrame(columns, height=len(df)) if columns else pl.DataFrame(height=len(df))
+
+
+def columnar_table_path(output_path: Path, name: str, output_format: str) -> Path:
+    """主表 'data' 写到 output_path（后缀按格式修正），子表写到同目录 `<stem>_<表名><后缀>`。"""
+    from .sinks import safe_table_name
+
+    output_path = Path(output_path)
+    suffix = COLUMNAR_FORMATS[output_format]
+    if output_path.suffix.lower() != suffix:
+        output_path = output_path.with_suffix(suffix)
+    if name == 'data':
+        return output_path
+    return output_path.with_name(f'{output_path.stem}_{safe_table_name(name)}{suffix}')
+
+
+class ColumnarSink:
+    """每张表一个列式文件，接口与 CsvSink/XlsxSink 相同。
+
+    写入的批次先在内存中攒够 row_group_size 行，作为一个分段写入临时 IPC 文件；
+    `close()` 时用 polars 的流式查询把各分段合并（类型不同的分段取公共类型）写成最终文件，
+    每 row_group_size 行一个行组。内存占用与总行数无关。
+
+    指定 spill_dir（检查点模式）时分段写在该目录，`checkpoint()` 把缓冲的批次也写为分段；
+    中断时保留分段供续传，合并时仍按 row_group_size 重新分组。
+    """
+
+    def __init__(self, output_path: Path, output_format: str = 'parquet', row_group_size: int = DEFAULT_ROW_GROUP_SIZE, spill_dir: Path = None):
+        if output_format not in COLUMNAR_FORMATS:
+            raise ValueError(f'未知的列式输出格式: {output_format}')
+        self.pl = _import_polars()
+        self.output_path = Path(output_path)
+        self.output_format = output_format
+        self.row_group_size = max(1, int(row_group_size))
+        self.outputs: Dict[str, Path] = {}
+        self._buffers: Dict[str, List] = {}
+        self._buffered_rows: Dict[str, int] = {}
+        self._parts: Dict[str, List[Path]] = {}
+        self._tmpdir = None
+        self._persistent = spill_dir is not None
+        if self._persistent:
+            self._tmpdir = Path(spill_dir)
+            self._tmpdir.mkdir(parents=True, exist_ok=True)
+
+    def table_path(self, name: str) -> Path:
+        return columnar_table_path(self.output_path, name, self.output_format)
+
+    def write(self, name: str, df: pd.DataFrame) -> None:
+        if name not in self.outputs:
+            self.outputs[name] = self.table_path(name)
+            self._buffers[name] = []
+            self._buffered_rows[name] = 0
+            self._parts[name] = []
+        self._buffers[name].append(frame_to_polars(df))
+        self._buffered_rows[name] += len(df)
+        if self._buffered_rows[name] >= self.row_group_size:
+            self._spill(name)
+
+    def checkpoint(self) -> Dict:
+        for name in self._parts:
+            self._spill(name)
+        return {'outputs': dict(self.outputs), 'parts': {name: [p.name for p in parts] for name, parts in self._parts.items()}}
+
+    def restore(self, state: Dict) -> None:
+        self.outputs = dict(state['outputs'])
+        self._parts = {name: [self._tmpdir / p for p in parts] for name, parts in state['parts'].items()}
+        self._buffers = {name: [] for name in self._parts}
+        self._buffered_rows = {name: 0 for name in self._parts}
+        committed = {p for parts in self._parts.values() for p in parts}
+        for path in self._tmpdir.glob('*.arrow'):
+            if path not in committed:
+                path.unlink()
+
+    def write_report(self, rows) -> None:
+        """列式输出不单独写报告文件，报告由调用方返回。"""
+
+    def write_raw(self, source) -> None:
+        """原始 JSON 复制为主表文件同目录的 `<stem>_raw.json` 附属文件。"""
+        from .raw import raw_side_path, write_raw_file
+
+        self.outputs['raw_json'] = write_raw_file(source, raw_side_path(self.table_path('data'), source))
+
+    def _spill(self, name: str) -> None:
+        frames = self._buffers[name]
+        if not frames:
+            return
+        if self._tmpdir is None:
+            self._tmpdir = Path(tempfile.mkdtemp(prefix='.columnar_', dir=self.output_path.parent))
+        part = self._tmpdir / f'{list(self._parts).index(name)}_{len(self._parts[name])}.arrow'
+        self.pl.concat(frames, how='diagonal_relaxed').write_ipc(part)
+        self._parts[name].append(part)
+        self._buffers[name] = []
+        self._buffered_rows[name] = 0
+
+    def _finish(self, name: str) -> None:
+        pl = self.pl
+        path = self.outputs[name]
+        frames = [pl.scan_ipc(p) for p in self._parts[name]] + [f.lazy() for f in self._buffers[name]]
+        lf = pl.concat(frames, how='diagonal_relaxed') if len(frames) > 1 else frames[0]
+        if self.output_format == 'parquet':
+            lf.sink_parquet(path, row_group_size=self.row_group_size)
+        else:
+            lf.sink_ipc(path, record_batch_size=self.row_group_size)
+
+    def _cleanup(self) -> None:
+        self._buffers = {}
+        self._parts = {}
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def close(self) -> None:
+        try:
+            for name in self._parts:
+                self._finish(name)
+        finally:
+            self._cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # 出错时不生成不完整的输出文件；检查点模式下保留已提交的分段供续传，否则清理临时分段
+            if self._persistent:
+                self._buffers = {}
+            else:
+                self._cleanup()
+        else:
+            self.close()
+        return False
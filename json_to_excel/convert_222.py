@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Tuple
 
 import pandas as pd
 
+from json_to_excel.raw import iter_raw_chunks, raw_side_path, write_raw_file
+
 
 def normalize_top_items(data: Any) -> List[Dict]:
     """把常见 top-level 结构规范为 list of dict（支持 list[list[dict]]、list[dict]、dict）。
@@ -93,14 +95,25 @@ def parse_date_columns(df: pd.DataFrame, date_cols: List[str]) -> pd.DataFrame:
     return df
 
 
-def write_excel_flat(df: pd.DataFrame, output_path: Path, raw_json_text: str = None) -> None:
+def _write_raw_sheet(writer, raw_json) -> None:
+    # 原始 JSON 按块分行写入，避免超过 Excel 单元格 32767 字符上限；逐块写为文本单元格
+    # （不先收集为 DataFrame，以 `=` 开头的块也不会写成公式）
+    ws = writer.book.create_sheet('raw_json')
+    ws.append(['raw_json'])
+    for row, chunk in enumerate(iter_raw_chunks(raw_json), start=2):
+        cell = ws.cell(row=row, column=1)
+        cell.value = chunk
+        cell.data_type = 's'
+
+
+def write_excel_flat(df: pd.DataFrame, output_path: Path, raw_json_text=None) -> None:
     with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
         df.to_excel(writer, sheet_name='data', index=False)
         if raw_json_text is not None:
-            pd.DataFrame({'raw_json': [raw_json_text]}).to_excel(writer, sheet_name='raw_json', index=False)
+            _write_raw_sheet(writer, raw_json_text)
 
 
-def write_excel_multi(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame], output_path: Path, raw_json_text: str = None) -> None:
+def write_excel_multi(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame], output_path: Path, raw_json_text=None) -> None:
     with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
         parent_df.to_excel(writer, sheet_name='data', index=False)
         for name, df in children.items():
@@ -108,7 +121,7 @@ def write_excel_multi(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame]
             sheet_name = str(name)[:31].replace('/', '_').replace('\\', '_')
             df.to_excel(writer, sheet_name=sheet_name, index=False)
         if raw_json_text is not None:
-            pd.DataFrame({'raw_json': [raw_json_text]}).to_excel(writer, sheet_name='raw_json', index=False)
+            _write_raw_sheet(writer, raw_json_text)
 
 
 def main():
@@ -167,11 +180,6 @@ def main():
                     continue
 
         with input_path.open('r', encoding='utf-8') as f:
-            # 如果 raw_sheet 需要保留原始文本（小文件时可用）
-            if args.raw_sheet:
-                raw_text = f.read()
-                f.seek(0)
-
             # 流式写 CSV
             batch = []
             first_write = True
@@ -196,12 +204,16 @@ def main():
                     dfb.to_csv(csvf, index=False, header=first_write, mode='a')
 
             print(f'流式写入完成: {output_path}')
+            if args.raw_sheet:
+                # CSV 无法附带 sheet：原始文件按字节复制为附属文件，不整体读入内存
+                print(f'原始 JSON: {write_raw_file(input_path, raw_side_path(output_path, input_path))}')
             return
 
     # 非流式（内存）解析
     with input_path.open('r', encoding='utf-8') as f:
         data = json.load(f)
-        raw_text = f.read() if args.raw_sheet else None
+    # json.load 之后文件已读到末尾，原始 JSON 改为从文件路径按块读取
+    raw_text = input_path if args.raw_sheet else None
 
     items = normalize_top_items(data)
     if not items:
@@ -1,10 +1,61 @@
 """核心转换函数：解析 JSON、扁平化、拆表、流式写入等。可被 CLI 与 GUI 导入使用。"""
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+import io
 import json
+import time
 import pandas as pd
 
+from common.numeric import to_numeric_fast
+
+from .flatten import SchemaFlattener, flatten_records
+from .report import ReportAccumulator, numeric_candidates
+from .checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpointer, checkpoint_dir, input_fingerprint, load_checkpoint, validate_checkpoint
+from .cache import ParsedCache
+from .columnar import DEFAULT_ROW_GROUP_SIZE
+from .mapped import decode_json_text, map_file
+from .dedupe import DEFAULT_MEMORY_KEYS, StreamingDeduper
+from .metrics import ConversionMetrics, stage
+from .ndjson import NdjsonReader, detect_input_format, line_ranges, parse_range
+from .progress import ConversionCancelled, ProgressReporter, RowProgress, as_reporter, done, update
+from .raw import write_raw_sheet
+from .sinks import open_sink, resolve_format, safe_table_name
+from .xlsx_stream import StreamingXlsxWriter
+
+
+def load_json(input_path: Path, metrics: ConversionMetrics = None, progress=None, cache: ParsedCache = None) -> Any:
+    """读取并解析整个 JSON 文件（非流式模式）。
+
+    文件以只读内存映射打开，直接解码为 str 后解析，不再先读入一份同样大小的 bytes
+    （见 mapped 模块）；progress 在解码完成时为 30%，解析完成时为 100%。读取字节数与解析耗时计入 metrics。
+    传入 cache（ParsedCache）时先按文件内容查找已缓存的解析结果，未命中时解析后写入缓存。
+    """
+    progress = as_reporter(progress)
+    input_path = Path(input_path)
+    total_bytes = input_path.stat().st_size
+    with stage(metrics, 'parse'):
+        update(progress, 0.0, force=True, stage='read', bytes_read=0, total_bytes=total_bytes)
+        key = cache.key(input_path) if cache is not None else None
+        data = cache.get(key) if key is not None else None
+        if data is not None:
+            if metrics is not None:
+                metrics.bytes_read = cache.entry_path(key).stat().st_size
+            update(progress, 1.0, force=True, stage='parse', bytes_read=total_bytes, total_bytes=total_bytes)
+            return data
+        with map_file(input_path, sequential=True) as buf:
+            text = decode_json_text(buf)
+        update(progress, 0.3, stage='read', bytes_read=total_bytes, total_bytes=total_bytes)
+        data = json.loads(text)
+        del text
+        if key is not None:
+            cache.put(key, data)
+    if metrics is not None:
+        metrics.bytes_read = total_bytes
+    update(progress, 1.0, force=True, stage='parse', bytes_read=total_bytes, total_bytes=total_bytes)
+    return data
+
 
 def normalize_top_items(data: Any) -> List[Dict]:
     items: List[Dict] = []
@@ -21,54 +72,146 @@ def normalize_top_items(data: Any) -> List[Dict]:
     return items
 
 
-def split_parent_children(items: List[Dict], parent_id_cols: List[str] = None, split_fields: List[str] = None) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+PARENT_ID_CANDIDATES = ['BILLID', 'BILLSEQ', 'id', 'ID']
+
+
+PARENT_ID_COLUMN = '__parent_id'
+ROW_ID_COLUMN = '__row_id'
+
+
+class ChildRows:
+    """一个子表累积的子记录与逐行的 parent_id（以及该表还有下级子表时的行号）。
+
+    子记录保存原 dict 的引用，不复制、不添加键；parent_id 与行号单独保存为数组，
+    扁平化时作为 `__parent_id` / `__row_id` 列直接写入（见 SchemaFlattener.flatten 的 extra）。
+    """
+
+    __slots__ = ('records', 'parent_ids', 'row_ids')
+
+    def __init__(self, with_row_ids: bool = False):
+        self.records: List[Dict] = []
+        self.parent_ids: List[Any] = []
+        self.row_ids: List[int] = [] if with_row_ids else None
+
+    def add(self, rows: List[Dict], parent_id: Any, first_row_id: int = None) -> None:
+        self.records.extend(rows)
+        self.parent_ids.extend([parent_id] * len(rows))
+        if self.row_ids is not None:
+            self.row_ids.extend(range(first_row_id, first_row_id + len(rows)))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def extra(self) -> Dict[str, List[Any]]:
+        if self.row_ids is None:
+            return {PARENT_ID_COLUMN: self.parent_ids}
+        return {PARENT_ID_COLUMN: self.parent_ids, ROW_ID_COLUMN: self.row_ids}
+
+
+def _is_table(v: Any) -> bool:
+    return isinstance(v, list) and bool(v) and isinstance(v[0], dict)
+
+
+def _add_children(rows: List[Dict], parent_id: Any, table: str, depth: int, max_depth: int,
+                  children: Dict[str, ChildRows], row_counters: Dict[str, int]) -> int:
+    """把 table（第 depth 层）的子记录累积到 children，depth < max_depth 时继续拆分其中的 list-of-dict 字段。
+
+    有下级子表的表为每行分配表内行号（`__row_id`，按 row_counters 递增），下级子表的 `__parent_id` 即该行号。
+    只有含下级子表字段的行会复制（去掉这些字段），其余行保存原 dict 的引用。返回累积的行数（含各下级）。
+    """
+    child = children.get(table)
+    if child is None:
+        child = children[table] = ChildRows(with_row_ids=depth < max_depth)
+    if depth >= max_depth:
+        child.add(rows, parent_id)
+        return len(rows)
+    start = row_counters.get(table, 0)
+    row_counters[table] = start + len(rows)
+    added = len(rows)
+    out = rows
+    for offset, row in enumerate(rows):
+        nested = [k for k, v in row.items() if _is_table(v)]
+        if not nested:
+            continue
+        if out is rows:
+            out = list(rows)
+        out[offset] = {k: v for k, v in row.items() if k not in nested}
+        for k in nested:
+            added += _add_children(row[k], start + offset, f'{table}.{k}', depth + 1, max_depth, children, row_counters)
+    child.add(out, parent_id, first_row_id=start)
+    return added
+
+
+def _split_item(item: Dict, idx: int, parent_id_cols: List[str] = None, split_fields: List[str] = None,
+                children: Dict[str, ChildRows] = None, max_depth: int = 1, row_counters: Dict[str, int] = None) -> Tuple[Dict, int]:
+    """拆分单条记录：返回 (parent 行, 累积到 children 的子记录行数)。idx 用于生成缺省 parent_id。
+
+    子记录按子表累积到 children（{子表名: ChildRows}），子记录列表即原记录中的 list（不复制）。
+    max_depth > 1 时在同一次遍历中递归拆分子记录中的 list-of-dict 字段，下级子表名为
+    `<上级表名>.<字段名>`，外键 `__parent_id` 指向直接上级表的 `__row_id`（见 _add_children）；
+    row_counters 为各表已分配的行号，跨批次拆分时由调用方保留。
+    """
+    parent_id = None
+    if parent_id_cols:
+        for c in parent_id_cols:
+            if c in item and item.get(c) is not None:
+                parent_id = item.get(c)
+                break
+    if parent_id is None:
+        parent_id = f'__parent_{idx}'
+    if row_counters is None:
+        row_counters = {}
+
+    parent = {}
+    added = 0
+    for k, v in item.items():
+        # 如果指定了 split_fields，则只拆这些字段
+        if split_fields is not None and k not in split_fields:
+            parent[k] = v
+            continue
+
+        if isinstance(v, list):
+            if _is_table(v):
+                added += _add_children(v, parent_id, k, 1, max_depth, children, row_counters)
+            else:
+                parent[k] = ','.join(map(str, v)) if v else None
+        else:
+            parent[k] = v
+
+    parent[PARENT_ID_COLUMN] = parent_id
+    return parent, added
+
+
+def _split_items(items: List[Dict], parent_id_cols: List[str] = None, split_fields: List[str] = None, max_depth: int = 1) -> Tuple[List[Dict], Dict[str, ChildRows]]:
+    """拆分所有记录：返回 (parent 行列表, {子表名: ChildRows})。"""
     parent_rows: List[Dict] = []
-    children: Dict[str, List[Dict]] = {}
+    children: Dict[str, ChildRows] = {}
+    row_counters: Dict[str, int] = {}
 
     for idx, item in enumerate(items):
-        parent_id = None
-        if parent_id_cols:
-            for c in parent_id_cols:
-                if c in item and item.get(c) is not None:
-                    parent_id = item.get(c)
-                    break
-        if parent_id is None:
-            parent_id = f'__parent_{idx}'
-
-        parent = {}
-        for k, v in item.items():
-            # 如果指定了 split_fields，则只拆这些字段
-            if split_fields is not None and k not in split_fields:
-                parent[k] = v
-                continue
-
-            if isinstance(v, list):
-                if v and isinstance(v[0], dict):
-                    rows = []
-                    for child in v:
-                        r = dict(child)
-                        r['__parent_id'] = parent_id
-                        rows.append(r)
-                    children.setdefault(k, []).extend(rows)
-                else:
-                    parent[k] = ','.join(map(str, v)) if v else None
-            else:
-                parent[k] = v
-
-        parent['__parent_id'] = parent_id
+        parent, _ = _split_item(item, idx, parent_id_cols=parent_id_cols, split_fields=split_fields, children=children,
+                                max_depth=max_depth, row_counters=row_counters)
         parent_rows.append(parent)
 
     return parent_rows, children
 
 
-def coerce_numeric_columns(df: pd.DataFrame, numeric_cols=None) -> pd.DataFrame:
-    if numeric_cols is None:
-        candidates = [c for c in df.columns if c.upper() in {'AMT', 'GPAMT', 'AMOUNT', 'AMT_TOTAL', 'AMT_SUM'}]
-    else:
-        candidates = [c for c in numeric_cols if c in df.columns]
+def split_parent_children(items: List[Dict], parent_id_cols: List[str] = None, split_fields: List[str] = None, max_depth: int = 1) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+    """拆分为 parent 行与子记录（每条子记录为带 `__parent_id`（及 `__row_id`）的新 dict）。
 
-    for col in candidates:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
+    max_depth 同 `_split_item`。转换时使用不复制子记录的 `_split_items`。
+    """
+    parent_rows, children = _split_items(items, parent_id_cols=parent_id_cols, split_fields=split_fields, max_depth=max_depth)
+    copied: Dict[str, List[Dict]] = {}
+    for name, child in children.items():
+        extra = child.extra()
+        copied[name] = [{**r, **dict(zip(extra, values))} for r, *values in zip(child.records, *extra.values())]
+    return parent_rows, copied
+
+
+def coerce_numeric_columns(df: pd.DataFrame, numeric_cols=None) -> pd.DataFrame:
+    for col in numeric_candidates(df.columns, numeric_cols):
+        df[col] = to_numeric_fast(df[col])
     return df
 
 
@@ -81,160 +224,538 @@ def parse_date_columns(df: pd.DataFrame, date_cols: List[str]) -> pd.DataFrame:
     return df
 
 
-def write_excel_flat(df: pd.DataFrame, output_path: Path, raw_json_text: str = None) -> None:
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='data', index=False)
-        if raw_json_text is not None:
-            pd.DataFrame({'raw_json': [raw_json_text]}).to_excel(writer, sheet_name='raw_json', index=False)
-        if hasattr(write_excel_flat, 'report') and write_excel_flat.report is not None:
-            report = write_excel_flat.report
-            rep_rows = [(k, json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float)) else v) for k, v in report.items()]
-            pd.DataFrame(rep_rows, columns=['key', 'value']).to_excel(writer, sheet_name='report', index=False)
+def _report_rows(report: Dict) -> List[Tuple[str, Any]]:
+    return [(k, json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float)) else v) for k, v in report.items()]
+
+
+def _write_extra_sheets(writer: StreamingXlsxWriter, raw_json_text=None, report: Dict = None) -> None:
+    """raw_json_text 为原始文件路径（Path）或文本，按块写入 raw_json sheet，见 raw.write_raw_sheet。"""
+    if raw_json_text is not None:
+        write_raw_sheet(writer, raw_json_text)
+    if report is not None:
+        writer.append_rows('report', _report_rows(report), header=['key', 'value'])
+
+
+# 内存模式写出时的分片行数：每片写出的同时更新报告统计
+REPORT_BATCH_ROWS = 50000
+# 需要报告进度时的分片行数（每片写完报告一次进度并检查取消）
+PROGRESS_BATCH_ROWS = 10000
+
+
+def _write_frame_with_report(write, table: str, df: pd.DataFrame, acc: ReportAccumulator = None, rows: RowProgress = None) -> None:
+    """分片写出一张表（write(table, df) 为写出函数），并在同一遍遍历中把每一片交给报告累积器。
+
+    传入 rows 时按更小的分片写出，每片写完后报告已写出的行数。
+    """
+    step = REPORT_BATCH_ROWS if rows is None else PROGRESS_BATCH_ROWS
+    if (acc is None and rows is None) or len(df) <= step:
+        if acc is not None:
+            acc.update(df)
+        write(table, df)
+        if rows is not None:
+            rows.add(len(df))
+        return
+    for start in range(0, len(df), step):
+        part = df.iloc[start:start + step]
+        if acc is not None:
+            acc.update(part)
+        write(table, part)
+        if rows is not None:
+            rows.add(len(part))
+
+
+def write_excel_flat(df: pd.DataFrame, output_path: Path, raw_json_text=None, report: Dict = None, numeric_cols=None, progress: ProgressReporter = None) -> Dict:
+    """写出 flat 模式的工作簿。未传入 report 时在写出数据的同时累积统计，生成报告 sheet 并返回报告。
+
+    传入 progress 时按已写出的行数报告进度（保存工作簿前到 95%）。
+    """
+    acc = ReportAccumulator(numeric_cols=numeric_cols) if report is None else None
+    rows = RowProgress(progress.span(0, 0.95), len(df)) if progress is not None else None
+    with StreamingXlsxWriter(output_path) as writer:
+        _write_frame_with_report(writer.write_frame, 'data', df, acc, rows)
+        if acc is not None:
+            report = acc.summary()
+        _write_extra_sheets(writer, raw_json_text=raw_json_text, report=report)
+    return report
+
+
+def multi_report(parent_summary: Dict, children_counts: Dict[str, int]) -> Dict:
+    """由主表统计与子表行数组成 multi 模式的报告（主表各项加 parent_ 前缀）。"""
+    report = {f'parent_{k}': v for k, v in parent_summary.items()}
+    report['children_counts'] = {str(k): int(v) for k, v in children_counts.items()}
+    return report
+
+
+def write_excel_multi(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame], output_path: Path, raw_json_text=None, report: Dict = None, numeric_cols=None, progress: ProgressReporter = None) -> Dict:
+    """写出 multi 模式的工作簿。未传入 report 时在写出主表的同时累积统计，生成报告 sheet 并返回报告。
+
+    progress 同 `write_excel_flat`，行数按主表与各子表的总行数计。
+    """
+    acc = ReportAccumulator(numeric_cols=numeric_cols) if report is None else None
+    rows = RowProgress(progress.span(0, 0.95), _total_rows(parent_df, children)) if progress is not None else None
+    with StreamingXlsxWriter(output_path) as writer:
+        _write_frame_with_report(writer.write_frame, 'data', parent_df, acc, rows)
+        for name, df in children.items():
+            _write_frame_with_report(writer.write_frame, safe_table_name(name), df, rows=rows)
+        if acc is not None:
+            report = multi_report(acc.summary(), {name: len(df) for name, df in children.items()})
+        _write_extra_sheets(writer, raw_json_text=raw_json_text, report=report)
+    return report
+
 
+def _total_rows(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame]) -> int:
+    return len(parent_df) + sum(len(df) for df in children.values())
 
-def write_excel_multi(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame], output_path: Path, raw_json_text: str = None) -> None:
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        parent_df.to_excel(writer, sheet_name='data', index=False)
+
+def _write_tables(parent_df: pd.DataFrame, children: Dict[str, pd.DataFrame], output_path: Path, output_format: str, numeric_cols=None, raw=None, progress: ProgressReporter = None) -> Dict:
+    """以 CSV 或列式格式（parquet/arrow/feather）写出主表与子表，每张表一个文件；返回主表统计。
+
+    raw 不为 None 时把原始 JSON 写为附属文件 `<stem>_raw.json`。progress 同 `write_excel_multi`。
+    """
+    acc = ReportAccumulator(numeric_cols=numeric_cols)
+    rows = RowProgress(progress.span(0, 0.95), _total_rows(parent_df, children)) if progress is not None else None
+    with open_sink(output_path, output_format) as sink:
+        _write_frame_with_report(sink.write, 'data', parent_df, acc, rows)
         for name, df in children.items():
-            sheet_name = str(name)[:31].replace('/', '_').replace('\\', '_')
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-        if raw_json_text is not None:
-            pd.DataFrame({'raw_json': [raw_json_text]}).to_excel(writer, sheet_name='raw_json', index=False)
-        if hasattr(write_excel_multi, 'report') and write_excel_multi.report is not None:
-            report = write_excel_multi.report
-            rep_rows = [(k, json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float)) else v) for k, v in report.items()]
-            pd.DataFrame(rep_rows, columns=['key', 'value']).to_excel(writer, sheet_name='report', index=False)
-
-
-def convert_flat(items: List[Dict], output_path: Path, numeric_cols=None, date_cols: List[str] = None, dedupe_by: List[str] = None, raw_text: str = None) -> pd.DataFrame:
-    df = pd.json_normalize(items, sep='.')
-    df = coerce_numeric_columns(df, numeric_cols=numeric_cols)
+            _write_frame_with_report(sink.write, name, df, rows=rows)
+        if raw is not None:
+            sink.write_raw(raw)
+    return acc.summary()
+
+
+def _normalize_chunk(rows: List[Dict], numeric_cols=None, extra: Dict[str, list] = None) -> pd.DataFrame:
+    """进程池中执行：扁平化为 object 列（不做类型推断）并转换数值列。
+
+    类型推断留给主进程在合并后统一进行，避免各分块推断结果不同（例如某分块整列为 None）。
+    """
+    df = SchemaFlattener().to_frame(rows, infer_types=False, extra=extra)
+    return coerce_numeric_columns(df, numeric_cols=numeric_cols)
+
+
+def _normalize_parallel(rows: List[Dict], numeric_cols=None, workers: int = 2, progress: ProgressReporter = None, extra: Dict[str, list] = None) -> pd.DataFrame:
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunk_size = max(1, -(-len(rows) // (workers * 4)))
+    starts = range(0, len(rows), chunk_size)
+    chunks = [rows[i:i + chunk_size] for i in starts]
+    extras = [{name: values[i:i + chunk_size] for name, values in extra.items()} if extra else None for i in starts]
+    frames = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            # map 按提交顺序返回，保证行顺序与单进程一致；每完成一块报告一次进度
+            for frame in pool.map(_normalize_chunk, chunks, [numeric_cols] * len(chunks), extras):
+                frames.append(frame)
+                update(progress, len(frames) / len(chunks))
+        except BaseException:
+            # 取消或出错时不再启动尚未开始的分块
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    # 列顺序：按分块顺序取并集（首次出现的顺序），与 json_normalize 对整表的结果相同
+    columns: List = []
+    seen = set()
+    for f in frames:
+        for c in f.columns:
+            if c not in seen:
+                seen.add(c)
+                columns.append(c)
+    df = pd.concat(frames, ignore_index=True).reindex(columns=columns)
+    # 逐列推断（DataFrame.infer_objects 对合并后的 object 块不会推断出字符串类型）
+    for c in df.columns:
+        if df[c].dtype == object:
+            df[c] = df[c].infer_objects()
+    return df
+
+
+ENGINES = ('pandas', 'polars')
+
+
+def _normalize_rows(rows: List[Dict], numeric_cols=None, date_cols: List[str] = None, workers: int = 1, flattener: SchemaFlattener = None, dedupe_by: List[str] = None, engine: str = 'pandas', progress: ProgressReporter = None, extra: Dict[str, list] = None) -> pd.DataFrame:
+    """扁平化一批记录并做数值/日期转换，指定 dedupe_by 时再按这些列去重（保留第一个）。
+
+    extra 为记录之外逐行给出的列（子表的 `__parent_id`，见 ChildRows），扁平化时直接写入对应列。
+
+    扁平化使用 SchemaFlattener（结果与 pd.json_normalize 相同）；传入 flattener 时沿用其列模式，
+    流式模式据此让各批次的列保持同一顺序。
+    workers > 1 时把记录分块交给进程池扁平化并转换数值列，结果与单进程完全一致；
+    日期解析在合并后进行，因为 to_datetime 会按首个非空值推断格式，分块解析可能得到不同结果。
+    engine='polars' 时数值转换、日期解析与去重由一个 polars 查询完成（见 polars_engine），结果与 pandas 引擎相同。
+    progress 只在多进程扁平化时按完成的分块报告（占前 80%），单进程时由调用方在前后报告。
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'未知的执行引擎: {engine}')
+    use_polars = engine == 'polars'
+    if workers and workers > 1 and len(rows) > 1:
+        # polars 引擎下分块只做扁平化（numeric_cols=[] 表示不转换任何列），数值转换在合并后统一进行
+        df = _normalize_parallel(rows, numeric_cols=[] if use_polars else numeric_cols, workers=workers, progress=progress.span(0, 0.8) if progress is not None else None, extra=extra)
+    else:
+        if flattener is None:
+            df = flatten_records(rows, sep='.', extra=extra)
+        else:
+            df = flattener.to_frame(rows, extra=extra)
+        if not use_polars:
+            df = coerce_numeric_columns(df, numeric_cols=numeric_cols)
+    if use_polars:
+        from .polars_engine import transform
+
+        return transform(df, numeric_cols=numeric_cols, date_cols=date_cols, dedupe_by=dedupe_by)
     df = parse_date_columns(df, date_cols or [])
     if dedupe_by:
         exist_cols = [c for c in dedupe_by if c in df.columns]
         if exist_cols:
             df = df.drop_duplicates(subset=exist_cols, keep='first')
-    # 构建报告
-    report = {
-        'row_count': int(len(df)),
-        'columns': list(map(str, df.columns.tolist())),
-        'missing_counts': {str(k): int(v) for k, v in df.isna().sum().to_dict().items()},
-    }
-    # numeric sums
-    if numeric_cols is None:
-        candidates = [c for c in df.columns if c.upper() in {'AMT', 'GPAMT', 'AMOUNT', 'AMT_TOTAL', 'AMT_SUM'}]
-    else:
-        candidates = [c for c in numeric_cols if c in df.columns]
-    numeric_sums = {}
-    for col in candidates:
-        try:
-            numeric_sums[col] = float(df[col].sum(skipna=True))
-        except Exception:
-            numeric_sums[col] = None
-    report['numeric_sums'] = numeric_sums
+    return df
 
-    # 暂存报告到 write 函数属性以便写入
-    write_excel_flat.report = report
-    try:
-        write_excel_flat(df, Path(output_path), raw_json_text=raw_text)
-    finally:
-        # 清理属性
-        try:
-            delattr(write_excel_flat, 'report')
-        except Exception:
-            write_excel_flat.report = None
+
+def _span(progress: ProgressReporter, lo: float, hi: float) -> ProgressReporter:
+    return progress.span(lo, hi) if progress is not None else None
+
+
+def convert_flat(items: List[Dict], output_path: Path, numeric_cols=None, date_cols: List[str] = None, dedupe_by: List[str] = None, raw_text: str = None, workers: int = 1, output_format: str = None, engine: str = 'pandas', raw_source: Path = None, metrics: ConversionMetrics = None, progress=None) -> pd.DataFrame:
+    """扁平化并写出。output_format 为 xlsx/csv/parquet/arrow/feather，未指定时按后缀判断（默认 xlsx）；
+    engine 为 'pandas' 或 'polars'，两者输出相同。
+
+    保留原始 JSON：优先传 raw_source（输入文件路径），直接按块复制原文件，不重新序列化；
+    raw_text 为已有的文本。xlsx 写入 raw_json sheet（分多行），其他格式写为附属文件。
+
+    传入 metrics（ConversionMetrics）时分别计入标准化与写出耗时，返回的报告中增加 'metrics' 项。
+
+    progress 为 `ProgressReporter` 或 callback(percent, info)：标准化占前 40%，写出按已写出的行数推进；
+    其 cancel 请求取消时抛出 `ConversionCancelled`（见 progress 模块）。
+    """
+    progress = as_reporter(progress)
+    raw = Path(raw_source) if raw_source is not None else raw_text
+    update(progress, 0.0, force=True, stage='normalize', total_rows=len(items))
+    with stage(metrics, 'normalize'):
+        df = _normalize_rows(items, numeric_cols=numeric_cols, date_cols=date_cols, workers=workers, dedupe_by=dedupe_by, engine=engine, progress=_span(progress, 0, 0.4))
+    update(progress, 0.4, force=True, stage='write', total_rows=len(df))
+    # 报告在写出数据时按分片累积，不再对整表额外扫描
+    fmt = resolve_format(output_path, output_format, default='xlsx')
+    with stage(metrics, 'write'):
+        if fmt == 'xlsx':
+            report = write_excel_flat(df, Path(output_path), raw_json_text=raw, numeric_cols=numeric_cols, progress=_span(progress, 0.4, 1.0))
+        else:
+            report = _write_tables(df, {}, Path(output_path), fmt, numeric_cols=numeric_cols, raw=raw, progress=_span(progress, 0.4, 1.0))
+    if metrics is not None:
+        report['metrics'] = metrics.summary()
+    done(progress)
 
     return df, report
 
 
-def convert_multi(items: List[Dict], output_path: Path, numeric_cols=None, date_cols: List[str] = None, dedupe_by: List[str] = None, split_fields: List[str] = None, raw_text: str = None) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
-    parent_id_candidates = ['BILLID', 'BILLSEQ', 'id', 'ID']
-    parent_rows, children = split_parent_children(items, parent_id_cols=parent_id_candidates, split_fields=split_fields)
-    parent_df = pd.json_normalize(parent_rows, sep='.')
-    parent_df = coerce_numeric_columns(parent_df, numeric_cols=numeric_cols)
-    parent_df = parse_date_columns(parent_df, date_cols or [])
-    if dedupe_by:
-        exist_cols = [c for c in dedupe_by if c in parent_df.columns]
-        if exist_cols:
-            parent_df = parent_df.drop_duplicates(subset=exist_cols, keep='first')
+def convert_multi(items: List[Dict], output_path: Path, numeric_cols=None, date_cols: List[str] = None, dedupe_by: List[str] = None, split_fields: List[str] = None, raw_text: str = None, workers: int = 1, output_format: str = None, engine: str = 'pandas', raw_source: Path = None, metrics: ConversionMetrics = None, progress=None, max_depth: int = 1) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """拆分主表/子表并写出。xlsx 时每张表一个 sheet；csv 与列式格式时每张表一个文件
+    （子表为同目录的 `<stem>_<子表名><后缀>`）。raw_source / raw_text、metrics、progress 同 `convert_flat`
+    （标准化阶段按已处理的表的行数推进）。
+
+    max_depth 为拆表的层数：默认 1 只拆顶层记录中的 list-of-dict 字段；大于 1 时在同一次遍历中继续拆分
+    子记录中的 list-of-dict 字段，下级子表名为 `<上级表名>.<字段名>`，有下级的表带行号 `__row_id`，
+    下级子表的 `__parent_id` 指向直接上级的 `__row_id`。"""
+    progress = as_reporter(progress)
+    raw = Path(raw_source) if raw_source is not None else raw_text
+    update(progress, 0.0, force=True, stage='normalize')
+    with stage(metrics, 'normalize'):
+        parent_rows, children = _split_items(items, parent_id_cols=PARENT_ID_CANDIDATES, split_fields=split_fields, max_depth=max_depth)
+        total = len(parent_rows) + sum(len(rows) for rows in children.values())
+        normalize = RowProgress(_span(progress, 0, 0.4), total, stage='normalize') if progress is not None else None
+        parent_df = _normalize_rows(parent_rows, numeric_cols=numeric_cols, date_cols=date_cols, workers=workers, dedupe_by=dedupe_by, engine=engine)
+        if normalize is not None:
+            normalize.add(len(parent_rows))
+
+        children_dfs: Dict[str, pd.DataFrame] = {}
+        for name, rows in children.items():
+            if rows:
+                children_dfs[name] = _normalize_rows(rows.records, numeric_cols=numeric_cols, date_cols=date_cols, workers=workers, engine=engine, extra=rows.extra())
+                if normalize is not None:
+                    normalize.add(len(rows))
+
+    update(progress, 0.4, force=True, stage='write', total_rows=_total_rows(parent_df, children_dfs))
+    fmt = resolve_format(output_path, output_format, default='xlsx')
+    with stage(metrics, 'write'):
+        if fmt == 'xlsx':
+            report = write_excel_multi(parent_df, children_dfs, Path(output_path), raw_json_text=raw, numeric_cols=numeric_cols, progress=_span(progress, 0.4, 1.0))
+        else:
+            summary = _write_tables(parent_df, children_dfs, Path(output_path), fmt, numeric_cols=numeric_cols, raw=raw, progress=_span(progress, 0.4, 1.0))
+            report = multi_report(summary, {name: len(df) for name, df in children_dfs.items()})
+    if metrics is not None:
+        report['metrics'] = metrics.summary()
+    done(progress)
+
+    return parent_df, children_dfs, report
+
+
+def _iter_stream_items(fp):
+    """流式读取 top-level 数组中的元素（NDJSON 输入由 NdjsonReader 处理，见 ndjson 模块）。"""
+    import ijson  # type: ignore
+
+    # use_float 使小数解析为 float，与 json.load 的结果保持一致（默认是 Decimal）
+    yield from ijson.items(fp, 'item', use_float=True)
+
+
+# 流式模式的输入格式（另有 'auto'：按文件开头检测）
+INPUT_FORMATS = ('json', 'ndjson')
+# 流式模式下每读取多少条顶层记录报告一次进度（另外每批写出后也会报告）
+STREAM_PROGRESS_ITEMS = 1000
 
-    children_dfs: Dict[str, pd.DataFrame] = {}
-    for name, rows in children.items():
-        if rows:
-            dfc = pd.json_normalize(rows, sep='.')
-            dfc = coerce_numeric_columns(dfc, numeric_cols=numeric_cols)
-            dfc = parse_date_columns(dfc, date_cols or [])
-            children_dfs[name] = dfc
-
-    # 构建报告
-    report = {
-        'parent_row_count': int(len(parent_df)),
-        'parent_missing_counts': {str(k): int(v) for k, v in parent_df.isna().sum().to_dict().items()},
-        'children_counts': {str(k): int(len(v)) for k, v in children_dfs.items()},
-    }
-    # numeric sums for parent
-    if numeric_cols is None:
-        candidates = [c for c in parent_df.columns if c.upper() in {'AMT', 'GPAMT', 'AMOUNT', 'AMT_TOTAL', 'AMT_SUM'}]
-    else:
-        candidates = [c for c in numeric_cols if c in parent_df.columns]
-    numeric_sums = {}
-    for col in candidates:
-        try:
-            numeric_sums[col] = float(parent_df[col].sum(skipna=True))
-        except Exception:
-            numeric_sums[col] = None
-    report['parent_numeric_sums'] = numeric_sums
 
-    write_excel_multi.report = report
+def _prescan_schema(input_path: Path, prescan_mb: float, mode: str, split_fields: List[str] = None, input_format: str = 'json', max_depth: int = 1) -> Dict[str, SchemaFlattener]:
+    """读取文件开头 prescan_mb MB 中的完整记录，预先确定各表的列顺序（只登记列，不保留数据）。"""
+    limit = max(1, int(prescan_mb * 1024 * 1024))
+    if input_format == 'ndjson':
+        ranges = line_ranges(input_path, limit)
+        if not ranges:
+            return {}
+        start, end = ranges[0]
+        items = parse_range(input_path, start, end)[0]
+    else:
+        with Path(input_path).open('rb') as f:
+            items = _iter_stream_items(io.BytesIO(f.read(limit)))
+    flatteners: Dict[str, SchemaFlattener] = {}
+    children: Dict[str, ChildRows] = {}
+    idx = 0
     try:
-        write_excel_multi(parent_df, children_dfs, Path(output_path), raw_json_text=raw_text)
-    finally:
-        try:
-            delattr(write_excel_multi, 'report')
-        except Exception:
-            write_excel_multi.report = None
+        # 截断处的不完整记录会使解析失败，之前的记录已经登记
+        for item in items:
+            for rec in normalize_top_items(item):
+                if mode == 'flat':
+                    flatteners.setdefault('data', SchemaFlattener()).infer([rec])
+                    continue
+                parent, _ = _split_item(rec, idx, parent_id_cols=PARENT_ID_CANDIDATES, split_fields=split_fields, children=children, max_depth=max_depth)
+                idx += 1
+                flatteners.setdefault('data', SchemaFlattener()).infer([parent])
+    except Exception:
+        pass
+    for name, rows in children.items():
+        flatteners[name] = SchemaFlattener().reserve(rows.records[0], rows.extra()).infer(rows.records)
+    return flatteners
 
-    return parent_df, children_dfs, report
 
+def stream_to_csv(input_path: Path, output_path: Path, numeric_cols=None, date_cols: List[str] = None, batch_size: int = 5000, mode: str = 'flat', split_fields: List[str] = None, output_format: str = None, row_group_size: int = DEFAULT_ROW_GROUP_SIZE, engine: str = 'pandas', raw_sheet: bool = False, metrics: ConversionMetrics = None, progress=None, checkpoint: bool = False, resume: bool = False, checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, prescan_mb: float = 0, late_columns: str = 'rewrite', input_format: str = 'auto', workers: int = 1, dedupe_by: List[str] = None, dedupe_memory_keys: int = DEFAULT_MEMORY_KEYS, max_depth: int = 1) -> Tuple[Dict[str, Path], Dict]:
+    """流式读取 JSON 并分批写出，内存占用只与 batch_size 相关。
+
+    输出格式由 output_format 指定，未指定时按 output_path 后缀判断：
+    xlsx 写入单个工作簿（每张表一个 sheet，超出 Excel 行数上限自动换 sheet）；
+    parquet/arrow/feather 每张表一个带类型的列式文件，按 row_group_size 行分行组写出；其余写 CSV。
+    - flat：所有记录扁平化后写入主表 'data'。
+    - multi：每个子表（list-of-dict 字段）单独成表，CSV 与列式格式时写入同目录的 `<stem>_<子表名><后缀>`，
+      子表带 `__parent_id`，与 `convert_multi` 的拆表规则一致（包括 max_depth 的多层拆分）。
+
+    engine 为 'pandas' 或 'polars'（每批的数值转换与日期解析由 polars 查询完成），两者输出相同。
+
+    raw_sheet=True 时按块复制原始文件：xlsx 写入 raw_json sheet，其他格式写为附属文件 `<stem>_raw.json`，
+    返回的输出路径中键为 'raw_json'。
+
+    传入 metrics 时，取元素（ijson 解析）、每批的标准化与写出耗时分别累加，读取字节数取结束时的文件位置，
+    返回的报告中增加 'metrics' 项。
 
-def stream_to_csv(input_path: Path, output_path: Path, numeric_cols=None, date_cols: List[str] = None, batch_size: int = 5000):
+    progress 同 `convert_flat`，进度按输入文件已读取的字节数（文件位置）推进，info 中另有已写出的行数；
+    每 STREAM_PROGRESS_ITEMS 条记录及每批写出后报告一次并检查取消。
+
+    checkpoint=True 时在批次边界记录检查点（至少间隔 checkpoint_interval 秒，取消时也会提交），
+    目录为输出文件同目录的 `.<输出文件名>.resume/`，成功结束后删除。resume=True 时若存在检查点，
+    则跳过已提交的记录、从最后一个已提交的批次继续（输入文件与参数须与中断时相同）；不存在时从头开始
+    并记录检查点。续传时已提交的记录仍需由 ijson 解析以定位，但不再标准化与写出。
+
+    各表的列顺序在第一次写出时固定，之后每批按列名映射到该顺序。prescan_mb > 0 时先扫描文件开头
+    prescan_mb MB 确定列顺序，使表头尽量一开始就完整；之后才出现的列按 late_columns 处理
+    （'rewrite'：CSV 结束时重写表头；'spill'：写入附属的 `_late` 文件，见 sinks 模块说明）。
+
+    input_format 为 'json'（top-level 数组，由 ijson 流式解析）、'ndjson'（每行一个值）或 'auto'
+    （按文件开头检测，见 ndjson.detect_input_format）。NDJSON 按换行对齐的字节块解析，workers > 1 时
+    各块由进程池并行解析；无法解析的行不写出，报告中增加 'rejected_lines'（行数）与
+    'rejected_offsets'（各行起始字节位置）。
+
+    dedupe_by 指定时主表跨批次按这些列去重（保留第一次出现，子表不受影响，与 `convert_multi` 相同）：
+    只保存键列的 64 位指纹，超过 dedupe_memory_keys 个时写为磁盘上的有序段（见 dedupe 模块），
+    报告中增加 'duplicates_dropped'。
+
+    返回 ({表名: 输出路径}, report)，主表的表名为 'data'。report 按批次累积，
+    与 `convert_flat` / `convert_multi` 返回的报告格式相同；输出为 xlsx 时同样写入 report sheet。
+    """
     try:
-        import ijson  # type: ignore
+        import ijson  # type: ignore  # noqa: F401
     except Exception as e:
         raise RuntimeError('流式模式需要安装 ijson') from e
-
-    def iter_items(fp):
+    if mode not in ('flat', 'multi'):
+        raise ValueError(f'未知的转换模式: {mode}')
+    if engine not in ENGINES:
+        raise ValueError(f'未知的执行引擎: {engine}')
+
+    progress = as_reporter(progress)
+    input_path = Path(input_path)
+    if input_format == 'auto':
+        input_format = detect_input_format(input_path)
+    elif input_format not in INPUT_FORMATS:
+        raise ValueError(f'未知的输入格式: {input_format}')
+    output_path = Path(output_path)
+    total_bytes = input_path.stat().st_size
+
+    ckpt = None
+    resume_state = None
+    if checkpoint or resume:
+        fingerprint = input_fingerprint(input_path)
+        options = {'mode': mode, 'numeric_cols': numeric_cols, 'date_cols': date_cols, 'split_fields': split_fields,
+                   'format': resolve_format(output_path, output_format), 'engine': engine, 'batch_size': batch_size,
+                   'prescan_mb': prescan_mb, 'late_columns': late_columns, 'input_format': input_format,
+                   'dedupe_by': dedupe_by, 'max_depth': max_depth}
+        directory = checkpoint_dir(output_path)
+        if resume:
+            resume_state = load_checkpoint(directory)
+            if resume_state is not None:
+                validate_checkpoint(resume_state, fingerprint, options)
+        ckpt = Checkpointer(directory, interval=checkpoint_interval)
+        if resume_state is None:
+            # 从头开始：清除上一次遗留的检查点与分段
+            ckpt.remove()
+            ckpt = Checkpointer(directory, interval=checkpoint_interval)
+
+    # 以二进制打开：ijson 直接处理字节
+    spill_dir = ckpt.directory / 'parts' if ckpt is not None else None
+    deduper = None
+    if dedupe_by:
+        deduper = StreamingDeduper(dedupe_by, max_memory_keys=dedupe_memory_keys, spill_dir=ckpt.directory / 'dedupe' if ckpt is not None else None)
+    with input_path.open('rb') as f, open_sink(output_path, output_format, row_group_size=row_group_size, spill_dir=spill_dir,
+                                               late_columns=late_columns) as sink, deduper or nullcontext():
+        batch: List[Dict] = []
+        child_batches: Dict[str, ChildRows] = {}
+        pending = 0
+        idx = 0
+        # 多层拆分时各表已分配的行号（__row_id）
+        row_counters: Dict[str, int] = {}
+        # 每张表一个跨批次复用的列模式
+        flatteners: Dict[str, SchemaFlattener] = {}
+        acc = ReportAccumulator(numeric_cols=numeric_cols)
+        children_counts: Dict[str, int] = {}
+        rows_written = 0
+        # 已提交（写出）的位置：前 position[0] 个顶层元素，以及第 position[0] 个元素中的前 position[1] 条记录
+        position = (0, 0)
+        if resume_state is None and prescan_mb:
+            with stage(metrics, 'parse'):
+                flatteners = _prescan_schema(input_path, prescan_mb, mode, split_fields=split_fields, input_format=input_format, max_depth=max_depth)
+        if resume_state is not None:
+            sink.restore(resume_state['sink'])
+            position = resume_state['position']
+            idx = resume_state['idx']
+            row_counters = dict(resume_state['row_counters'])
+            flatteners = resume_state['flatteners']
+            acc = resume_state['acc']
+            children_counts = resume_state['children_counts']
+            rows_written = resume_state['rows_written']
+            if deduper is not None:
+                deduper.restore(resume_state['dedupe'])
+        skip_items, skip_records = position
+        committed_idx = idx
+        committed_counters = dict(row_counters)
+
+        if input_format == 'ndjson':
+            reader = NdjsonReader(input_path, workers=workers)
+            stream_items = iter(reader)
+
+            def bytes_read():
+                return reader.bytes_read
+        else:
+            reader = None
+            stream_items = _iter_stream_items(f)
+            bytes_read = f.tell
+
+        def commit():
+            ckpt.commit({
+                'input': fingerprint, 'options': options, 'position': position, 'bytes_offset': bytes_read(),
+                'idx': committed_idx, 'row_counters': committed_counters, 'flatteners': flatteners, 'acc': acc, 'children_counts': children_counts,
+                'rows_written': rows_written, 'sink': sink.checkpoint(), 'dedupe': deduper.checkpoint() if deduper is not None else None,
+            })
+
+        def report_progress(force=False):
+            # 读取阶段占 98%，剩余为写出原始 JSON、报告与关闭输出文件
+            position_bytes = bytes_read()
+            update(progress, 0.98 * position_bytes / total_bytes if total_bytes else 0.0, force=force, stage='stream', bytes_read=position_bytes, total_bytes=total_bytes, rows_written=rows_written)
+
+        def write_table(name, rows, extra=None):
+            nonlocal rows_written
+            flattener = flatteners.setdefault(name, SchemaFlattener())
+            with stage(metrics, 'normalize'):
+                df = _normalize_rows(rows, numeric_cols=numeric_cols, date_cols=date_cols, flattener=flattener, engine=engine, extra=extra)
+                if name == 'data' and deduper is not None:
+                    df = deduper.filter(df)
+            with stage(metrics, 'write'):
+                if name == 'data':
+                    acc.update(df)
+                else:
+                    children_counts[name] = children_counts.get(name, 0) + len(df)
+                sink.write(name, df)
+            rows_written += len(df)
+
+        def flush():
+            if batch:
+                write_table('data', batch)
+            for name, rows in child_batches.items():
+                if rows:
+                    write_table(name, rows.records, extra=rows.extra())
+            if progress is not None:
+                report_progress()
+
+        if metrics is not None:
+            stream_items = metrics.timed_iter(stream_items, 'parse')
+        update(progress, 0.0, force=True, stage='stream', bytes_read=0, total_bytes=total_bytes, rows_written=0)
         try:
-            for obj in ijson.items(fp, 'item'):
-                yield obj
-            return
-        except Exception:
-            fp.seek(0)
-        fp.seek(0)
-        for line in fp:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                continue
-
-    with input_path.open('r', encoding='utf-8') as f, open(output_path, 'w', encoding='utf-8', newline='') as csvf:
-        batch = []
-        first_write = True
-        for item in iter_items(f):
-            for rec in normalize_top_items(item):
-                batch.append(rec)
-                if len(batch) >= batch_size:
-                    dfb = pd.json_normalize(batch, sep='.')
-                    dfb = coerce_numeric_columns(dfb, numeric_cols=numeric_cols)
-                    dfb = parse_date_columns(dfb, date_cols or [])
-                    dfb.to_csv(csvf, index=False, header=first_write, mode='a')
-                    first_write = False
-                    batch = []
-        if batch:
-            dfb = pd.json_normalize(batch, sep='.')
-            dfb = coerce_numeric_columns(dfb, numeric_cols=numeric_cols)
-            dfb = parse_date_columns(dfb, date_cols or [])
-            dfb.to_csv(csvf, index=False, header=first_write, mode='a')
+            for item_index, item in enumerate(stream_items):
+                if progress is not None and (item_index + 1) % STREAM_PROGRESS_ITEMS == 0:
+                    report_progress()
+                if item_index < skip_items:
+                    continue
+                for rec_index, rec in enumerate(normalize_top_items(item)):
+                    if item_index == skip_items and rec_index < skip_records:
+                        continue
+                    if mode == 'flat':
+                        batch.append(rec)
+                        pending += 1
+                    else:
+                        parent, added = _split_item(rec, idx, parent_id_cols=PARENT_ID_CANDIDATES, split_fields=split_fields,
+                                                    children=child_batches, max_depth=max_depth, row_counters=row_counters)
+                        idx += 1
+                        batch.append(parent)
+                        pending += 1 + added
+                    # 主表与子表共用一个批次阈值，保证缓冲区总行数有上限
+                    if pending >= batch_size:
+                        # 先更新已提交的位置：flush 末尾的进度回调可能因取消而抛出，此时这一批已经写出
+                        position = (item_index, rec_index + 1)
+                        committed_idx = idx
+                        committed_counters = dict(row_counters)
+                        flush()
+                        batch = []
+                        child_batches = {}
+                        pending = 0
+                        if ckpt is not None and ckpt.due():
+                            commit()
+        except ConversionCancelled:
+            # 取消发生在批次之间（进度回调处），此时已写出的内容与最后一批的状态一致，提交后再退出
+            if ckpt is not None:
+                commit()
+            raise
+        flush()
+        if metrics is not None:
+            metrics.bytes_read = bytes_read()
+        if progress is not None:
+            report_progress(force=True)
+        if 'data' not in sink.outputs:
+            # 没有任何记录时仍生成空的主表文件
+            sink.write('data', pd.DataFrame())
+        with stage(metrics, 'write'):
+            if raw_sheet:
+                sink.write_raw(input_path)
+            report = acc.summary() if mode == 'flat' else multi_report(acc.summary(), children_counts)
+            if reader is not None:
+                report.update(reader.summary())
+            if deduper is not None:
+                report.update(deduper.summary())
+            sink.write_report(_report_rows(report))
+        closing = time.perf_counter()
+    if ckpt is not None:
+        ckpt.remove()
+    if metrics is not None:
+        # 关闭输出（xlsx 落盘、列式分段合并）的耗时同样计入写出阶段
+        metrics.add('write', time.perf_counter() - closing)
+        report['metrics'] = metrics.summary()
+    done(progress, rows_written=rows_written)
+
+    return dict(sink.outputs), report
@@ -0,0 +1,242 @@
+"""流式去重：跨批次按键列去重（保留第一次出现的行），只保存键的 64 位指纹，不保存整行。
+
+- 每行的键列算出一个 uint64 指纹：逐值哈希，数值（int/float/bool）统一按 float64，其余值按带类型
+  标记的字符串，各键列的哈希再按顺序组合。同一个值在不同批次中被推断为 int64、float64 或 object 列时
+  指纹相同；与 `drop_duplicates` 一样，1、1.0 与 True 是相同的值，1 与 '1'、True 与 'True' 是不同的值；
+- 已出现过的指纹保存在内存中的若干有序 numpy 数组里（每个键 8 字节），按 searchsorted 判断是否出现过；
+- 内存中的指纹超过 `max_memory_keys` 时写到磁盘上成为有序段（.npy），查找时以只读内存映射二分查找，
+  只访问少量页面；磁盘段按大小分级两两合并（分块归并，不整体读入），段数保持在对数级别。
+
+64 位指纹在一亿个不同的键中出现碰撞（误判为重复）的概率约为 3e-4。
+"""
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# 内存中最多保存的指纹个数（每个 8 字节，默认约 128MB），超过后写为磁盘上的有序段
+DEFAULT_MEMORY_KEYS = 16 * 1024 * 1024
+# 内存中未合并的有序数组个数上限
+MAX_MEMORY_RUNS = 8
+# 合并磁盘段时每次读取的指纹个数
+MERGE_BLOCK_KEYS = 1024 * 1024
+
+_MAX_KEY = np.iinfo(np.uint64).max
+
+
+# 缺失值的哈希（与 drop_duplicates 一致，各种缺失值视为相同的值）
+_MISSING_HASH = np.uint64(0x9E3779B97F4A7C15)
+_COMBINE = np.uint64(0x100000001B3)
+
+
+def _is_number(v) -> bool:
+    # bool 是 int 的子类：与 drop_duplicates 一致，True 与 1 相同
+    return isinstance(v, (int, float, np.integer, np.floating, np.bool_))
+
+
+def _tagged(v) -> str:
+    # 字符串原样哈希，其他类型加类型标记，避免日期等值与其文本相同
+    return v if v.__class__ is str else f'\x00{type(v).__name__}\x00{v}'
+
+
+def value_hashes(s: pd.Series) -> np.ndarray:
+    """一列中每个值的 uint64 哈希，与该列被推断出的 dtype 无关。"""
+    out = np.full(len(s), _MISSING_HASH, dtype=np.uint64)
+    present = s.notna().to_numpy()
+    s = s[present]
+    if s.empty:
+        return out
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        out[present] = pd.util.hash_array(s.to_numpy(dtype='float64'))
+        return out
+    if pd.api.types.is_string_dtype(s.dtype) and s.dtype != object:
+        out[present] = pd.util.hash_array(s.to_numpy(dtype=object))
+        return out
+    values = s.tolist()
+    is_num = np.fromiter((_is_number(v) for v in values), dtype=bool, count=len(values))
+    hashes = np.empty(len(values), dtype=np.uint64)
+    if is_num.any():
+        hashes[is_num] = pd.util.hash_array(np.array([v for v, n in zip(values, is_num) if n], dtype='float64'))
+    if not is_num.all():
+        hashes[~is_num] = pd.util.hash_array(np.array([_tagged(v) for v, n in zip(values, is_num) if not n], dtype=object))
+    out[present] = hashes
+    return out
+
+
+def fingerprint(df: pd.DataFrame, key_cols: List[str]) -> np.ndarray:
+    """每行键列的 uint64 指纹。df 中缺少的键列按空值处理。"""
+    keys = np.zeros(len(df), dtype=np.uint64)
+    for col in key_cols:
+        h = value_hashes(df[col]) if col in df.columns else np.full(len(df), _MISSING_HASH, dtype=np.uint64)
+        keys = keys * _COMBINE ^ h
+    return keys
+
+
+def _contains(run: np.ndarray, values: np.ndarray) -> np.ndarray:
+    pos = np.searchsorted(run, values)
+    pos[pos == len(run)] = 0
+    return run[pos] == values if len(run) else np.zeros(len(values), dtype=bool)
+
+
+def _merge_runs(a: np.ndarray, b: np.ndarray, dest: Path, block: int = MERGE_BLOCK_KEYS) -> None:
+    """把两个互不相交的有序指纹数组分块归并为一个有序的 .npy 文件。"""
+    out = np.lib.format.open_memmap(dest, mode='w+', dtype=np.uint64, shape=(len(a) + len(b),))
+    i = j = k = 0
+    na, nb = len(a), len(b)
+    while i < na or j < nb:
+        hi = _MAX_KEY
+        if i + block < na:
+            hi = a[i + block - 1]
+        if j + block < nb:
+            hi = min(hi, b[j + block - 1])
+        ai = int(np.searchsorted(a, hi, side='right')) if hi != _MAX_KEY else na
+        bj = int(np.searchsorted(b, hi, side='right')) if hi != _MAX_KEY else nb
+        merged = np.sort(np.concatenate([a[i:ai], b[j:bj]]))
+        out[k:k + len(merged)] = merged
+        k += len(merged)
+        i, j = ai, bj
+    out.flush()
+    del out
+
+
+class StreamingDeduper:
+    """跨批次按 key_cols 去重。
+
+    `filter(df)` 返回 df 中键在之前各批次与本批次前面的行中都没有出现过的行（保留第一次出现）。
+    与 `drop_duplicates` 一致，空值视为相同的值；一批数据中没有任何键列时原样返回（不去重）。
+    spill_dir 为磁盘段的目录，未指定时使用临时目录并在 close() 时删除。
+    """
+
+    def __init__(self, key_cols: List[str], max_memory_keys: int = DEFAULT_MEMORY_KEYS, spill_dir: Path = None):
+        self.key_cols = list(key_cols)
+        self.max_memory_keys = max_memory_keys
+        self._own_dir = spill_dir is None
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._memory: List[np.ndarray] = []
+        self._disk: List[str] = []
+        self._maps: Dict[str, np.ndarray] = {}
+        # 已被合并、但可能仍被已提交的检查点引用的段：在其后再提交两次检查点时删除
+        self._retired: List[str] = []
+        self._retired_before: List[str] = []
+        self._next_run = 0
+        self.seen = 0
+        self.dropped = 0
+
+    def _directory(self) -> Path:
+        if self.spill_dir is None:
+            self.spill_dir = Path(tempfile.mkdtemp(prefix='json_to_excel_dedupe_'))
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        return self.spill_dir
+
+    def _load(self, name: str) -> np.ndarray:
+        run = self._maps.get(name)
+        if run is None:
+            run = self._maps[name] = np.load(self.spill_dir / name, mmap_mode='r')
+        return run
+
+    def _retire(self, *names: str) -> None:
+        for name in names:
+            self._maps.pop(name, None)
+        if self._own_dir:
+            for name in names:
+                (self.spill_dir / name).unlink()
+        else:
+            self._retired.extend(names)
+
+    def _memory_keys(self) -> int:
+        return sum(len(run) for run in self._memory)
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        if len(df) == 0 or not any(c in df.columns for c in self.key_cols):
+            return df
+        keys = fingerprint(df, self.key_cols)
+        # 本批次内的重复：保留第一次出现
+        _, first = np.unique(keys, return_index=True)
+        keep = np.zeros(len(keys), dtype=bool)
+        keep[first] = True
+        candidates = keys[keep]
+        seen = np.zeros(len(candidates), dtype=bool)
+        for run in self._memory:
+            seen |= _contains(run, candidates)
+        for name in self._disk:
+            rest = ~seen
+            if rest.any():
+                seen[rest] |= _contains(self._load(name), candidates[rest])
+        keep[keep] = ~seen
+        new = np.sort(candidates[~seen])
+        if len(new):
+            self._add(new)
+        self.seen += len(new)
+        self.dropped += len(df) - int(keep.sum())
+        if keep.all():
+            return df
+        return df[keep]
+
+    def _add(self, run: np.ndarray) -> None:
+        self._memory.append(run)
+        if len(self._memory) > MAX_MEMORY_RUNS:
+            self._memory = [np.sort(np.concatenate(self._memory))]
+        if self._memory_keys() > self.max_memory_keys:
+            self._spill()
+
+    def _spill(self) -> None:
+        """把内存中的指纹写为一个磁盘段，再按大小两两合并相近的段。"""
+        run = np.sort(np.concatenate(self._memory))
+        self._memory = []
+        directory = self._directory()
+        name = f'keys_{self._next_run:06d}.npy'
+        self._next_run += 1
+        np.save(directory / name, run)
+        self._disk.append(name)
+        while len(self._disk) >= 2 and len(self._load(self._disk[-2])) <= 2 * len(self._load(self._disk[-1])):
+            b_name = self._disk.pop()
+            a_name = self._disk.pop()
+            name = f'keys_{self._next_run:06d}.npy'
+            self._next_run += 1
+            _merge_runs(self._load(a_name), self._load(b_name), directory / name)
+            self._retire(a_name, b_name)
+            self._disk.append(name)
+
+    def summary(self) -> Dict:
+        return {'duplicates_dropped': self.dropped}
+
+    def checkpoint(self) -> Dict:
+        """可序列化的状态：内存中的指纹与磁盘段（磁盘段文件须保留在 spill_dir 中）。
+
+        在提交新的检查点之前调用，此时上一次检查点已经提交；上一次检查点之前就被合并的段不再被任何
+        检查点引用，在这里删除（之后被合并的段仍被上一次检查点引用，留到下一次）。
+        """
+        for name in self._retired_before:
+            (self.spill_dir / name).unlink(missing_ok=True)
+        self._retired_before, self._retired = self._retired, []
+        memory = np.sort(np.concatenate(self._memory)) if self._memory else np.empty(0, dtype=np.uint64)
+        return {'memory': memory, 'disk': list(self._disk), 'next_run': self._next_run, 'seen': self.seen, 'dropped': self.dropped}
+
+    def restore(self, state: Dict) -> None:
+        self._memory = [state['memory']] if len(state['memory']) else []
+        self._disk = list(state['disk'])
+        self._next_run = state['next_run']
+        self.seen = state['seen']
+        self.dropped = state['dropped']
+        if self.spill_dir is not None and self.spill_dir.exists():
+            # 删除检查点之后写出、未提交的段
+            for path in self.spill_dir.glob('keys_*.npy'):
+                if path.name not in self._disk:
+                    path.unlink()
+
+    def close(self) -> None:
+        self._memory = []
+        self._disk = []
+        self._maps = {}
+        if self._own_dir and self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,178 @@
+"""Excel -> JSON 的流式转换：逐行读取工作表，边读边写出 JSON 数组元素或 NDJSON 行。
+
+- xlsx/xlsm 以 openpyxl 只读模式打开，按行解析工作表 XML，不把整个工作表读入 DataFrame，
+  内存占用与工作表大小无关；xls 等 openpyxl 不支持的格式退回为 pandas 逐个 sheet 读取；
+- 每个 sheet 的第一行（跳过开头的空行）为表头，与 `pd.read_excel` 一样，空表头为 `Unnamed: <列号>`，
+  重复的表头依次加 `.1`、`.2` 后缀；中间的空行保留为全 null 的记录，末尾的空行忽略；
+- 记录按批编码写出（见 json_writer 模块）：空单元格写为 null（不再写出不合法的 NaN），日期时间写为
+  ISO 8601 字符串；style 为 `pretty`（默认，与旧版 `json.dump(indent=2)` 的输出相同）或 `compact`（不含多余空白）。
+
+output_mode 与 ExcelToJSONWorker 相同：`auto`（只有一个 sheet 时为数组，否则为 {sheet 名: 数组}）、
+`always_array`（所有 sheet 的记录合并为一个数组）、`always_object`（{sheet 名: 数组}）。
+json_format 为 `ndjson` 时每行一条记录；对象形式下每条记录带 `__sheet` 列（sheet 名）。
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .json_writer import DEFAULT_BATCH_ROWS, ChunkedJsonWriter
+from .ndjson import NDJSON_SUFFIXES
+from .progress import as_reporter, done, update
+
+EXCEL_JSON_MODES = ('auto', 'always_array', 'always_object')
+JSON_FORMATS = ('json', 'ndjson')
+SHEET_COLUMN = '__sheet'
+# 每写出多少行报告一次进度
+PROGRESS_ROWS = 1000
+
+
+def resolve_json_format(json_path: Path, json_format: str = None) -> str:
+    if json_format is not None:
+        if json_format not in JSON_FORMATS:
+            raise ValueError(f'不支持的 JSON 格式: {json_format}')
+        return json_format
+    return 'ndjson' if Path(json_path).suffix.lower() in NDJSON_SUFFIXES else 'json'
+
+
+def header_names(cells) -> List[str]:
+    """表头行 -> 列名：空表头为 `Unnamed: <列号>`，重复的表头加 `.1`、`.2` 后缀。"""
+    names: List[str] = []
+    counts: Dict[str, int] = {}
+    for i, v in enumerate(cells):
+        name = f'Unnamed: {i}' if v is None or v == '' else str(v)
+        base = name
+        while name in counts:
+            counts[base] += 1
+            name = f'{base}.{counts[base]}'
+        counts[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_sheet_records(rows: Iterator[tuple]) -> Iterator[Dict]:
+    """把工作表的行（值的元组）转换为记录；第一行非空行为表头。"""
+    rows = iter(rows)
+    header = None
+    for row in rows:
+        if any(v is not None for v in row):
+            header = header_names(row)
+            break
+    if header is None:
+        return
+    blank = 0
+    width = len(header)
+    for row in rows:
+        if all(v is None for v in row):
+            # 空行先计数，之后出现非空行时才写出（末尾的空行忽略）
+            blank += 1
+            continue
+        for _ in range(blank):
+            yield dict.fromkeys(header)
+        blank = 0
+        if len(row) > width:
+            header = header + header_names([None] * len(row))[width:]
+            width = len(header)
+        if len(row) == width:
+            yield dict(zip(header, row))
+        else:
+            record = dict.fromkeys(header)
+            record.update(zip(header, row))
+            yield record
+
+
+class ExcelSheets:
+    """打开的工作簿：sheet 名列表、各 sheet 的行数（未知时为 None）与按行读取。"""
+
+    def __init__(self, names: List[str], open_rows: Callable[[str], Iterator[tuple]], row_counts: Dict[str, Optional[int]]):
+        self.names = names
+        self.open_rows = open_rows
+        self.row_counts = row_counts
+
+    def records(self, name: str) -> Iterator[Dict]:
+        return iter_sheet_records(self.open_rows(name))
+
+    def total_rows(self) -> Optional[int]:
+        counts = list(self.row_counts.values())
+        return sum(counts) if counts and all(c for c in counts) else None
+
+
+@contextmanager
+def open_workbook(excel_path: Path) -> Iterator[ExcelSheets]:
+    excel_path = Path(excel_path)
+    try:
+        from openpyxl import load_workbook
+        wb = load_workbook(excel_path, read_only=True, data_only=True)
+    except Exception:
+        wb = None
+    if wb is None:
+        # openpyxl 不支持的格式（如 xls）：按 sheet 逐个读入
+        import pandas as pd
+
+        with pd.ExcelFile(excel_path) as xls:
+            def open_rows(name):
+                df = xls.parse(name, header=None)
+                return (tuple(None if v != v else v for v in row) for row in df.itertuples(index=False, name=None))
+
+            yield ExcelSheets(list(xls.sheet_names), open_rows, dict.fromkeys(xls.sheet_names))
+        return
+    try:
+        def open_rows(name):
+            return wb[name].iter_rows(values_only=True)
+
+        counts = {}
+        for ws in wb.worksheets:
+            try:
+                counts[ws.title] = ws.max_row
+            except Exception:
+                counts[ws.title] = None
+        yield ExcelSheets(list(wb.sheetnames), open_rows, counts)
+    finally:
+        wb.close()
+
+
+def write_sheets_json(sheets: ExcelSheets, json_path: Path, output_mode: str = 'auto', json_format: str = None, style: str = 'pretty',
+                      batch_rows: int = DEFAULT_BATCH_ROWS, progress=None) -> Dict[str, int]:
+    """把各 sheet 的记录按批写出到 json_path（见 json_writer 模块），返回 {sheet 名: 记录数}。"""
+    if output_mode not in EXCEL_JSON_MODES:
+        raise ValueError(f'不支持的输出模式: {output_mode}')
+    json_format = resolve_json_format(json_path, json_format)
+    progress = as_reporter(progress)
+    as_array = output_mode == 'always_array' or (output_mode == 'auto' and len(sheets.names) == 1)
+    total = sheets.total_rows()
+    counts: Dict[str, int] = {}
+    written = 0
+
+    def report(sheet_index: int) -> None:
+        fraction = written / total if total else sheet_index / max(len(sheets.names), 1)
+        update(progress, min(fraction, 1.0), stage='write', rows_written=written)
+
+    with Path(json_path).open('w', encoding='utf-8', newline='\n') as f:
+        writer = ChunkedJsonWriter(f, json_format=json_format, style=style, batch_rows=batch_rows)
+        writer.begin(as_array)
+        for i, name in enumerate(sheets.names):
+            if not as_array:
+                writer.begin_group(name)
+            n = 0
+            for record in sheets.records(name):
+                if json_format == 'ndjson' and not as_array:
+                    record[SHEET_COLUMN] = name
+                writer.add(record)
+                n += 1
+                written += 1
+                if written % PROGRESS_ROWS == 0:
+                    report(i)
+            counts[name] = n
+            if not as_array:
+                writer.end_group()
+            report(i + 1)
+        writer.end(as_array)
+    done(progress, rows_written=written)
+    return counts
+
+
+def excel_to_json(excel_path: Path, json_path: Path, output_mode: str = 'auto', json_format: str = None, style: str = 'pretty',
+                  batch_rows: int = DEFAULT_BATCH_ROWS, progress=None) -> Dict[str, int]:
+    """流式把 Excel 文件转换为 JSON（或 NDJSON），返回 {sheet 名: 记录数}。"""
+    with open_workbook(excel_path) as sheets:
+        return write_sheets_json(sheets, json_path, output_mode=output_mode, json_format=json_format, style=style,
+                                 batch_rows=batch_rows, progress=progress)
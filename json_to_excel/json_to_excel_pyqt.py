@@ -1,14 +1,17 @@
 import sys
-import pandas as pd
 import json
+from contextlib import ExitStack
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QPushButton, 
-                             QLabel, QFileDialog, QMessageBox, QProgressDialog, QProgressBar, QTextEdit, QGroupBox, QHBoxLayout, QSizePolicy, QLineEdit, QCheckBox, QComboBox)
+                             QLabel, QFileDialog, QMessageBox, QProgressBar, QTextEdit, QGroupBox, QHBoxLayout, QSizePolicy, QLineEdit, QCheckBox, QComboBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 from common.logger import get_logger, add_qt_signal
 from sanbao_test.gui_utils import ControlButton, create_separator, LabeledFrame
-from json_to_excel import convert_flat, normalize_top_items
+from json_to_excel import convert_flat, load_json, normalize_top_items, stream_to_csv
+from json_to_excel.excel_json import open_workbook, write_sheets_json
+from json_to_excel.metrics import ConversionMetrics
+from json_to_excel.progress import ConversionCancelled, ProgressReporter
 
 
 class ConversionWorker(QThread):
@@ -16,7 +19,7 @@ class ConversionWorker(QThread):
     progress_updated = pyqtSignal(int)
     conversion_finished = pyqtSignal(bool, str)
 
-    def __init__(self, json_path, excel_path, logger=None, mode='flat', numeric_cols=None, date_cols=None, split_fields=None, dedupe_by=None, raw_sheet=False):
+    def __init__(self, json_path, excel_path, logger=None, mode='flat', numeric_cols=None, date_cols=None, split_fields=None, dedupe_by=None, raw_sheet=False, resumable=False):
         super().__init__()
         self.json_path = json_path
         self.excel_path = excel_path
@@ -29,6 +32,12 @@ class ConversionWorker(QThread):
         self.split_fields = split_fields or []
         self.dedupe_by = dedupe_by or []
         self.raw_sheet = raw_sheet
+        # 断点续传：以流式模式转换并记录检查点，存在上次中断的检查点时从中断处继续
+        self.resumable = resumable
+
+    def cancel(self):
+        """请求取消：转换在下一次报告进度时停止（协作式，不强制终止线程）。"""
+        self.requestInterruption()
 
     def run(self):
         try:
@@ -36,55 +45,67 @@ class ConversionWorker(QThread):
             if logger:
                 logger.info(f"[ConversionWorker] 开始转换: {self.json_path} -> {self.excel_path}")
             
-            # 读取JSON文件 (10%)
-            self.progress_updated.emit(10)
+            # 进度按已读取的字节数与已写出的行数推进（读取 0-30%，转换写出 35-100%），回调限频后转发为信号；
+            # cancel() 后在下一次报告进度时抛出 ConversionCancelled
+            progress = ProgressReporter(lambda percent, info: self.progress_updated.emit(percent), cancel=self.isInterruptionRequested)
+            if self.resumable:
+                self._run_resumable(logger, progress)
+                return
             try:
                 if logger:
                     logger.info("[ConversionWorker] 正在读取 JSON 文件...")
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                # 读取字节数取自 os.stat 与文件位置；解析/标准化/写出耗时与峰值内存一并记录到报告
+                metrics = ConversionMetrics(self.json_path)
+                data = load_json(Path(self.json_path), metrics=metrics, progress=progress.span(0, 0.3))
                 if logger:
-                    logger.info(f"[ConversionWorker] JSON 文件读取成功，大小: {len(str(data))} 字节")
+                    logger.info(f"[ConversionWorker] JSON 文件读取成功，大小: {metrics.bytes_read} 字节，解析耗时 {metrics.seconds['parse']:.2f}s")
             except json.JSONDecodeError as e:
                 if logger:
                     logger.error(f"[ConversionWorker] JSON 解析失败: {e}")
                 self.conversion_finished.emit(False, "JSON 文件格式不正确！")
                 return
+            except ConversionCancelled:
+                raise
             except Exception as e:
                 if logger:
                     logger.error(f"[ConversionWorker] 读取 JSON 文件失败: {e}", exc_info=True)
                 self.conversion_finished.emit(False, f"读取 JSON 文件失败: {str(e)}")
                 return
             
-            # 标准化数据 (30%)
-            self.progress_updated.emit(30)
+            # 标准化数据
             try:
                 if logger:
                     logger.info("[ConversionWorker] 正在标准化数据...")
-                items = normalize_top_items(data)
+                with metrics.stage('normalize'):
+                    items = normalize_top_items(data)
                 if logger:
                     logger.info(f"[ConversionWorker] 数据标准化完成，共 {len(items) if isinstance(items, list) else '1'} 条记录")
+                progress.update(0.35, force=True)
+            except ConversionCancelled:
+                raise
             except Exception as e:
                 if logger:
                     logger.error(f"[ConversionWorker] 数据标准化失败: {e}", exc_info=True)
                 self.conversion_finished.emit(False, f"数据标准化失败: {str(e)}")
                 return
 
-            # 转换并写入 Excel (50% -> 100%)
-            self.progress_updated.emit(50)
+            # 转换并写入 Excel (35% -> 100%)
             try:
                 if logger:
                     logger.info("[ConversionWorker] 正在转换并写入 Excel...")
                 # 选择模式并调用 core
-                raw_text = json.dumps(data, ensure_ascii=False) if self.raw_sheet else None
+                # 原始 JSON 直接从输入文件按块复制到 raw_json sheet，不再重新序列化整个文档
+                raw_source = Path(self.json_path) if self.raw_sheet else None
                 if self.mode == 'flat':
-                    df, report = convert_flat(items, Path(self.excel_path), numeric_cols=self.numeric_cols, date_cols=self.date_cols, dedupe_by=self.dedupe_by, raw_text=raw_text)
+                    df, report = convert_flat(items, Path(self.excel_path), numeric_cols=self.numeric_cols, date_cols=self.date_cols, dedupe_by=self.dedupe_by, raw_source=raw_source, metrics=metrics, progress=progress.span(0.35, 1.0))
                 else:
                     # 延迟导入以避免循环依赖
                     from json_to_excel.core import convert_multi
-                    parent_df, children, report = convert_multi(items, Path(self.excel_path), numeric_cols=self.numeric_cols, date_cols=self.date_cols, dedupe_by=self.dedupe_by, split_fields=self.split_fields, raw_text=raw_text)
+                    parent_df, children, report = convert_multi(items, Path(self.excel_path), numeric_cols=self.numeric_cols, date_cols=self.date_cols, dedupe_by=self.dedupe_by, split_fields=self.split_fields, raw_source=raw_source, metrics=metrics, progress=progress.span(0.35, 1.0))
                 if logger:
                     logger.info("[ConversionWorker] Excel 文件写入成功")
+            except ConversionCancelled:
+                raise
             except Exception as e:
                 if logger:
                     logger.error(f"[ConversionWorker] Excel 转换写入失败: {e}", exc_info=True)
@@ -94,6 +115,9 @@ class ConversionWorker(QThread):
             # 写入完成时进度设为 100
             self.progress_updated.emit(100)
 
+            # 指标以一条结构化记录输出，报告中的 metrics 与日志保持一致
+            report['metrics'] = metrics.log(logger, '[ConversionWorker] 转换指标:')
+
             # 记录报告到 logger（UI 的日志系统会接收）
             if logger:
                 try:
@@ -109,117 +133,119 @@ class ConversionWorker(QThread):
             self.conversion_finished.emit(True, self.excel_path)
             if logger:
                 logger.info("[ConversionWorker] 线程即将退出")
-            
+
+        except ConversionCancelled:
+            logger = getattr(self, 'logger', None)
+            if logger:
+                logger.info("[ConversionWorker] 转换已取消")
+            self.conversion_finished.emit(False, "转换已取消")
         except Exception as e:
             logger = getattr(self, 'logger', None)
             if logger:
                 logger.error(f"[ConversionWorker] 线程异常: {e}", exc_info=True)
             self.conversion_finished.emit(False, f"转换失败: {str(e)}")
 
+    def _run_resumable(self, logger, progress):
+        """流式转换并记录检查点；取消或崩溃后再次以相同参数转换时从最后提交的批次继续。"""
+        metrics = ConversionMetrics(self.json_path)
+        try:
+            outputs, report = stream_to_csv(
+                Path(self.json_path), Path(self.excel_path), numeric_cols=self.numeric_cols or None, date_cols=self.date_cols,
+                mode=self.mode, split_fields=self.split_fields or None, raw_sheet=self.raw_sheet, metrics=metrics,
+                progress=progress, checkpoint=True, resume=True, dedupe_by=self.dedupe_by or None,
+            )
+        except ConversionCancelled:
+            if logger:
+                logger.info("[ConversionWorker] 转换已取消，已写出的批次已记录检查点，再次转换时将从中断处继续")
+            self.conversion_finished.emit(False, "转换已取消（可续传）")
+            return
+        except Exception as e:
+            if logger:
+                logger.error(f"[ConversionWorker] 流式转换失败: {e}", exc_info=True)
+            self.conversion_finished.emit(False, f"转换失败: {str(e)}")
+            return
+        report['metrics'] = metrics.log(logger, '[ConversionWorker] 转换指标:')
+        if logger:
+            logger.info('[ConversionWorker] 转换报告: ' + json.dumps(report, ensure_ascii=False, default=str))
+            logger.info(f"[ConversionWorker] 转换完成: {self.excel_path}")
+        self.progress_updated.emit(100)
+        self.conversion_finished.emit(True, self.excel_path)
+
     @staticmethod
     def flatten_dict(d, parent_key='', sep='_'):
-        """将嵌套字典展平为单层字典"""
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(ConversionWorker.flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
-                # 处理列表类型数据
-                if v and isinstance(v[0], dict):
-                    # 列表元素是字典，分别处理
-                    for i, item in enumerate(v):
-                        if isinstance(item, dict):
-                            items.extend(ConversionWorker.flatten_dict(item, f"{new_key}{sep}{i}", sep=sep).items())
-                        else:
-                            items.append((f"{new_key}{sep}{i}", item))
+        """将嵌套字典展平为单层字典（直接写入同一个结果 dict，不构造中间的元组列表）"""
+        out = {}
+
+        def walk(obj, prefix):
+            for k, v in obj.items():
+                new_key = f"{prefix}{sep}{k}" if prefix else k
+                if isinstance(v, dict):
+                    walk(v, new_key)
+                elif isinstance(v, list):
+                    # 处理列表类型数据
+                    if v and isinstance(v[0], dict):
+                        # 列表元素是字典，分别处理
+                        for i, item in enumerate(v):
+                            if isinstance(item, dict):
+                                walk(item, f"{new_key}{sep}{i}")
+                            else:
+                                out[f"{new_key}{sep}{i}"] = item
+                    else:
+                        # 列表元素不是字典，转换为字符串
+                        out[new_key] = ', '.join(map(str, v)) if v else ''
                 else:
-                    # 列表元素不是字典，转换为字符串
-                    items.append((new_key, ', '.join(map(str, v)) if v else ''))
-            else:
-                items.append((new_key, v))
-        return dict(items)
+                    out[new_key] = v
+
+        walk(d, parent_key)
+        return out
 
 
 class ExcelToJSONWorker(QThread):
     """将 Excel 转为 JSON 的工作线程
 
     output_mode: 'auto' | 'always_array' | 'always_object'
+    json_format: 'json' | 'ndjson'，默认按 json_path 后缀判断（.jsonl/.ndjson 为 NDJSON）
+    json_style: 'pretty'（默认，缩进 2 格，与旧版输出相同）| 'compact'（不含多余空白，文件约小 25%）
     """
     progress_updated = pyqtSignal(int)
     conversion_finished = pyqtSignal(bool, str)
 
-    def __init__(self, excel_path, json_path, logger=None, output_mode='auto'):
+    def __init__(self, excel_path, json_path, logger=None, output_mode='auto', json_format=None, json_style='pretty'):
         super().__init__()
         self.excel_path = excel_path
         self.json_path = json_path
         self.logger = logger
         self.output_mode = output_mode
+        self.json_format = json_format
+        self.json_style = json_style
 
     def run(self):
         try:
             if self.logger:
                 self.logger.info(f"[ExcelToJSONWorker] 开始转换: {self.excel_path} -> {self.json_path}")
             self.progress_updated.emit(10)
-            try:
-                # 读取所有 sheet
-                xls = pd.read_excel(self.excel_path, sheet_name=None)
-            except Exception as e:
-                if self.logger:
-                    self.logger.error(f"[ExcelToJSONWorker] 读取 Excel 失败: {e}")
-                self.conversion_finished.emit(False, f"读取 Excel 失败: {str(e)}")
-                return
-
-            self.progress_updated.emit(50)
-            try:
-                # 根据输出模式决定结果格式
-                result = None
-                sheets = xls if isinstance(xls, dict) else {}
-                if self.output_mode == 'auto':
-                    if isinstance(sheets, dict) and len(sheets) == 1:
-                        first_df = list(sheets.values())[0]
-                        result = first_df.to_dict(orient='records')
-                    else:
-                        out = {}
-                        for name, df in sheets.items():
-                            try:
-                                out[name] = df.to_dict(orient='records')
-                            except Exception:
-                                out[name] = []
-                        result = out
-                elif self.output_mode == 'always_array':
-                    # 将所有 sheet 的记录合并为一个数组
-                    merged = []
-                    if isinstance(sheets, dict):
-                        for name, df in sheets.items():
-                            try:
-                                recs = df.to_dict(orient='records')
-                            except Exception:
-                                recs = []
-                            merged.extend(recs)
-                    result = merged
-                else:  # always_object
-                    out = {}
-                    if isinstance(sheets, dict):
-                        for name, df in sheets.items():
-                            try:
-                                out[name] = df.to_dict(orient='records')
-                            except Exception:
-                                out[name] = []
-                    result = out
-
-                # 写入 JSON
-                with open(self.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                if self.logger:
-                    self.logger.error(f"[ExcelToJSONWorker] 转换或写入失败: {e}")
-                self.conversion_finished.emit(False, f"转换失败: {str(e)}")
-                return
+            # 逐行读取各 sheet 并逐条写出记录（见 excel_json 模块），内存占用与工作表大小无关
+            with ExitStack() as stack:
+                try:
+                    sheets = stack.enter_context(open_workbook(self.excel_path))
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"[ExcelToJSONWorker] 读取 Excel 失败: {e}")
+                    self.conversion_finished.emit(False, f"读取 Excel 失败: {str(e)}")
+                    return
+
+                progress = ProgressReporter(lambda percent, info: self.progress_updated.emit(percent)).span(0.1, 1.0)
+                try:
+                    counts = write_sheets_json(sheets, Path(self.json_path), output_mode=self.output_mode, json_format=self.json_format, style=self.json_style, progress=progress)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"[ExcelToJSONWorker] 转换或写入失败: {e}")
+                    self.conversion_finished.emit(False, f"转换失败: {str(e)}")
+                    return
 
             self.progress_updated.emit(100)
             if self.logger:
-                self.logger.info(f"[ExcelToJSONWorker] 转换完成: {self.json_path}")
+                self.logger.info(f"[ExcelToJSONWorker] 转换完成: {self.json_path} （各 sheet 记录数: {counts}）")
             self.conversion_finished.emit(True, self.json_path)
         except Exception as e:
             if self.logger:
@@ -380,6 +406,12 @@ class JSONToExcelConverter(QWidget):
         raw_row.addWidget(self.raw_checkbox)
         opts.addLayout(raw_row)
 
+        # 断点续传：流式转换并记录检查点，取消或中断后再次转换同一文件时从中断处继续
+        resume_row = QHBoxLayout()
+        self.resume_checkbox = QCheckBox('断点续传（流式转换，中断后再次转换时从中断处继续）')
+        resume_row.addWidget(self.resume_checkbox)
+        opts.addLayout(resume_row)
+
         # Excel->JSON 输出格式选项
         fmt_row = QHBoxLayout()
         fmt_row.addWidget(QLabel('Excel→JSON 输出:'))
@@ -387,6 +419,9 @@ class JSONToExcelConverter(QWidget):
         # 显示给用户的选项，内部值: auto / always_array / always_object
         self.excel_json_fmt.addItems(['auto (单表->数组, 多表->对象)', 'always_array (合并为数组)', 'always_object (始终对象)'])
         fmt_row.addWidget(self.excel_json_fmt)
+        # 紧凑格式：不缩进，文件更小、写出更快（NDJSON 总是每行一条紧凑记录）
+        self.compact_json_checkbox = QCheckBox('紧凑 JSON（不缩进）')
+        fmt_row.addWidget(self.compact_json_checkbox)
         opts.addLayout(fmt_row)
 
         main_layout.addWidget(options_frame)
@@ -399,6 +434,12 @@ class JSONToExcelConverter(QWidget):
         # 移除 variant 属性，使用默认 QPushButton 外观
         btn_layout.addWidget(self.convert_btn)
 
+        # 取消按钮：仅在 JSON→Excel 转换进行中可用，协作式取消（转换在下一次报告进度时停止）
+        self.cancel_btn = ControlButton(self, "取消", width=8)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_conversion)
+        btn_layout.addWidget(self.cancel_btn)
+
         # 退出按钮，放在转换按钮右侧
         exit_btn = ControlButton(self, "退出", width=8)
         exit_btn.clicked.connect(self.close)
@@ -498,7 +539,7 @@ class JSONToExcelConverter(QWidget):
                 default_filename = "output.json"
                 default_dir = str(Path.home())
             title = "选择导出 JSON 文件路径"
-            file_filter = "JSON 文件 (*.json);;所有文件 (*)"
+            file_filter = "JSON 文件 (*.json);;JSON Lines 文件 (*.jsonl *.ndjson);;所有文件 (*)"
 
         path, _ = QFileDialog.getSaveFileName(
             self,
@@ -511,7 +552,7 @@ class JSONToExcelConverter(QWidget):
                 if not path.endswith('.xlsx'):
                     path += '.xlsx'
             else:
-                if not path.endswith('.json'):
+                if not path.endswith(('.json', '.jsonl', '.ndjson')):
                     path += '.json'
             self.export_path_edit.setText(path)
 
@@ -535,17 +576,19 @@ class JSONToExcelConverter(QWidget):
                 self,
                 "保存为 JSON 文件",
                 str(Path(default_dir) / default_filename),
-                "JSON 文件 (*.json);;所有文件 (*)"
+                "JSON 文件 (*.json);;JSON Lines 文件 (*.jsonl *.ndjson);;所有文件 (*)"
             )
             if not save_path:
                 return
-        if not save_path.endswith('.json'):
+        if not save_path.endswith(('.json', '.jsonl', '.ndjson')):
             save_path += '.json'
 
         # 在界面上显示进度条并启动线程（不使用弹窗）
         fmt_index = self.excel_json_fmt.currentIndex() if getattr(self, 'excel_json_fmt', None) else 0
         fmt_value = ['auto', 'always_array', 'always_object'][fmt_index]
-        self.excel_worker = ExcelToJSONWorker(self.input_file_path, save_path, logger=getattr(self, 'logger', None), output_mode=fmt_value)
+        json_style = 'compact' if getattr(self, 'compact_json_checkbox', None) and self.compact_json_checkbox.isChecked() else 'pretty'
+        self.excel_worker = ExcelToJSONWorker(self.input_file_path, save_path, logger=getattr(self, 'logger', None), output_mode=fmt_value,
+                                              json_style=json_style)
         # 显示并重置界面进度条
         try:
             self.progress_bar.setVisible(True)
@@ -596,9 +639,10 @@ class JSONToExcelConverter(QWidget):
         dedupe_by = []
         mode = self.mode_combo.currentText()
         raw_sheet = bool(self.raw_checkbox.isChecked())
+        resumable = bool(self.resume_checkbox.isChecked())
 
         # 创建并启动转换线程（将 UI 层的 logger 传入 worker，并传入选项）
-        self.worker = ConversionWorker(self.json_file_path, save_path, logger=getattr(self, 'logger', None), mode=mode, numeric_cols=numeric_cols, date_cols=date_cols, split_fields=split_fields, dedupe_by=dedupe_by, raw_sheet=raw_sheet)
+        self.worker = ConversionWorker(self.json_file_path, save_path, logger=getattr(self, 'logger', None), mode=mode, numeric_cols=numeric_cols, date_cols=date_cols, split_fields=split_fields, dedupe_by=dedupe_by, raw_sheet=raw_sheet, resumable=resumable)
 
         # 在界面上显示并重置进度条
         try:
@@ -610,9 +654,22 @@ class JSONToExcelConverter(QWidget):
         self.worker.progress_updated.connect(self.progress_bar.setValue)
         self.worker.conversion_finished.connect(self.on_conversion_finished)
 
+        self.cancel_btn.setEnabled(True)
         self.worker.start()
 
+    def cancel_conversion(self):
+        worker = getattr(self, 'worker', None)
+        if worker is not None and worker.isRunning():
+            if getattr(self, 'logger', None):
+                self.logger.info("用户请求取消转换")
+            worker.cancel()
+            self.cancel_btn.setEnabled(False)
+
     def on_conversion_finished(self, success, message):
+        try:
+            self.cancel_btn.setEnabled(False)
+        except Exception:
+            pass
         # 记录并展示转换结果
         try:
             if getattr(self, 'logger', None):
@@ -663,9 +720,11 @@ class JSONToExcelConverter(QWidget):
                                 except Exception:
                                     pass
                             try:
-                                self.worker.terminate()
-                                # 等待最多 2000ms 让线程优雅终止
-                                self.worker.wait(2000)
+                                # 先请求协作式取消，等待最多 2000ms；仍未退出时再强制终止
+                                self.worker.cancel()
+                                if not self.worker.wait(2000):
+                                    self.worker.terminate()
+                                    self.worker.wait(2000)
                             except Exception as e:
                                 if getattr(self, 'logger', None):
                                     try:
@@ -0,0 +1,202 @@
+"""JSON 输出的序列化层：按批编码记录并写出 JSON 数组或 NDJSON，供 Excel -> JSON 等输出端使用。
+
+- 一批记录（默认 5000 条）由标准库的 C 编码器一次编码为一段文本，而不是每条记录调用一次 json.dumps
+  （每次调用都要重新构造编码器），吞吐约为逐条编码的两倍（见 tests/bench_json_writer.py）；
+- 不使用 `default=` 回调：str/int/bool/None 与有限的 float 直接由 C 编码器处理；一批中出现其他值
+  （datetime/Timestamp、NaN、Decimal、numpy 标量等）时编码失败，此时找出这些值所在的字段，转换后重新编码；
+  之后各批只转换这些字段（见 RecordEncoder）。日期时间写为 ISO 8601 字符串，NaN/NaT/±inf 写为 null，
+  Decimal 写为数值；
+- style：`compact`（默认）不含多余空白，各批之间换行；`pretty` 与 `json.dump(indent=2)` 的输出相同，
+  文件约大 40%。NDJSON 每行一条记录，总是紧凑格式。
+"""
+import datetime
+import decimal
+import json
+from typing import Any, Dict, List, TextIO
+
+JSON_STYLES = ('compact', 'pretty')
+# 每批编码的记录数
+DEFAULT_BATCH_ROWS = 5000
+
+_NATIVE_TYPES = frozenset([str, int, bool, type(None)])
+_INF = float('inf')
+
+
+def json_value(v: Any) -> Any:
+    """把 C 编码器不能直接处理的值转换为 JSON 值。"""
+    if type(v) in _NATIVE_TYPES:
+        return v
+    if isinstance(v, float):
+        return None if v != v or v in (_INF, -_INF) else float(v)
+    if isinstance(v, (datetime.datetime, datetime.date, datetime.time)):
+        # NaT 是 datetime 的实例，但不等于自身
+        return None if v != v else v.isoformat()
+    if isinstance(v, decimal.Decimal):
+        if not v.is_finite():
+            return None
+        return int(v) if v == v.to_integral_value() else float(v)
+    if isinstance(v, (str, int)):
+        return v
+    if isinstance(v, datetime.timedelta):
+        return None if v != v else str(v)
+    if hasattr(v, 'item'):
+        # numpy 标量
+        return json_value(v.item())
+    try:
+        if v != v:
+            return None
+    except TypeError:
+        # pd.NA 的比较结果不能转为 bool
+        return None
+    return str(v)
+
+
+def _is_native(v: Any) -> bool:
+    return type(v) in _NATIVE_TYPES or (type(v) is float and v == v and v not in (_INF, -_INF))
+
+
+def non_native_keys(records: List[Dict]) -> set:
+    """一批记录中含有需要转换的值的字段。"""
+    return {k for record in records for k, v in record.items() if not _is_native(v)}
+
+
+# 常见类型的转换直接按类型查表，不经过 json_value 中逐个 isinstance 判断
+_CONVERTERS = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+}
+
+
+def to_native(records: List[Dict], keys) -> List[Dict]:
+    """转换记录中 keys 字段的值；只复制含有需要转换的值的记录，不修改原记录。"""
+    out = []
+    keys = tuple(keys)
+    for record in records:
+        copied = None
+        for k in keys:
+            v = record.get(k)
+            t = type(v)
+            if t in _NATIVE_TYPES or (t is float and v == v and v not in (_INF, -_INF)):
+                continue
+            if copied is None:
+                copied = dict(record)
+            convert = _CONVERTERS.get(t)
+            copied[k] = convert(v) if convert is not None else json_value(v)
+        out.append(record if copied is None else copied)
+    return out
+
+
+class RecordEncoder:
+    """把一批记录编码为 JSON 文本。
+
+    遇到需要转换的值时记下所在的字段，之后各批先只检查、转换这些字段再编码（日期列等通常每批都有），
+    不再逐个检查所有值；新的字段出现需要转换的值时再整批检查一次。
+    """
+
+    def __init__(self, style: str = 'compact'):
+        if style not in JSON_STYLES:
+            raise ValueError(f'不支持的 JSON 样式: {style}')
+        self.style = style
+        if style == 'pretty':
+            self._encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, indent=2)
+        else:
+            self._encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+        self._line_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+        self.convert_keys = set()
+
+    def _encode(self, fn, records: List[Dict]) -> str:
+        converted = to_native(records, self.convert_keys) if self.convert_keys else records
+        try:
+            return fn(converted)
+        except (TypeError, ValueError):
+            self.convert_keys |= non_native_keys(converted)
+        return fn(to_native(records, self.convert_keys))
+
+    def array_items(self, records: List[Dict], level: int = 1) -> str:
+        """数组中的一段元素（以逗号分隔，不含方括号）；pretty 时按 level 层缩进。"""
+        text = self._encode(self._encoder.encode, records)
+        if self.style != 'pretty':
+            return text[1:-1]
+        # indent=2 的数组去掉首行 '[' 与末行 ']'，元素已位于第 1 层；JSON 字符串中没有未转义的换行
+        text = text[2:-2]
+        if level > 1:
+            pad = '  ' * (level - 1)
+            text = pad + text.replace('\n', '\n' + pad)
+        return text
+
+    def lines(self, records: List[Dict]) -> str:
+        """NDJSON：每条记录一行（含末尾换行）。"""
+        encode = self._line_encoder.encode
+        return self._encode(lambda batch: '\n'.join(map(encode, batch)) + '\n', records)
+
+
+class ChunkedJsonWriter:
+    """按批写出 JSON 文档或 NDJSON。
+
+    JSON 文档为一个数组（`begin(as_array=True)`），或 {分组名: 数组} 的对象（各分组以 begin_group/end_group 包住）；
+    NDJSON 忽略这些结构，每条记录一行。记录先缓存在内存中，每满 batch_rows 条编码写出一次。
+    """
+
+    def __init__(self, f: TextIO, json_format: str = 'json', style: str = 'compact', batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.f = f
+        self.ndjson = json_format == 'ndjson'
+        self.pretty = style == 'pretty' and not self.ndjson
+        self.encoder = RecordEncoder('compact' if self.ndjson else style)
+        self.batch_rows = batch_rows
+        self._batch: List[Dict] = []
+        self._level = 1
+        self._items = 0
+        self._groups = 0
+
+    def begin(self, as_array: bool = True) -> None:
+        if not self.ndjson:
+            self.f.write('[' if as_array else '{')
+        self._level = 1
+
+    def begin_group(self, name: str) -> None:
+        if self.ndjson:
+            return
+        sep = ',' if self._groups else ''
+        key = json.dumps(name, ensure_ascii=False)
+        self.f.write(f'{sep}\n  {key}: [' if self.pretty else f'{sep}\n{key}:[')
+        self._groups += 1
+        self._level = 2
+        self._items = 0
+
+    def add(self, record: Dict) -> None:
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        if self.ndjson:
+            self.f.write(self.encoder.lines(self._batch))
+        else:
+            text = self.encoder.array_items(self._batch, self._level)
+            self.f.write((',\n' if self._items else '\n') + text)
+        self._items += len(self._batch)
+        self._batch = []
+
+    def end_group(self) -> None:
+        self.flush()
+        if self.ndjson:
+            return
+        if self._items:
+            self.f.write('\n  ]' if self.pretty else '\n]')
+        else:
+            self.f.write(']')
+        self._level = 1
+
+    def end(self, as_array: bool = True) -> None:
+        self.flush()
+        if self.ndjson:
+            return
+        if as_array:
+            self.f.write('\n]' if self._items else ']')
+        else:
+            self.f.write('\n}' if self._groups else '}')
+        if not self.pretty:
+            self.f.write('\n')
@@ -0,0 +1,39 @@
+"""以只读内存映射的方式读取输入文件。
+
+映射的页面直接来自操作系统的页缓存，不再复制到进程自己的读缓冲区（一个 4GB 的输入不会在页缓存之外
+再占用 4GB 的 bytes）；不再访问的页面可由系统随时回收。各工作进程分别映射同一个文件，只访问
+分配给自己的字节区间，进程之间共享同一份页缓存。
+"""
+import json
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+@contextmanager
+def map_file(path: Path, sequential: bool = False) -> Iterator[Buffer]:
+    """只读映射整个文件。空文件或不支持映射的文件（如管道）退回为读入 bytes，两者的切片、find 用法相同。
+
+    sequential=True 时提示系统按顺序预读，读过的页面尽早回收。
+    """
+    with Path(path).open('rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield f.read()
+            return
+        try:
+            if sequential and hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield mm
+        finally:
+            mm.close()
+
+
+def decode_json_text(buf: Buffer) -> str:
+    """按 JSON 的编码检测规则（UTF-8/16/32，可带 BOM）把映射内容直接解码为 str，不经过整份 bytes 副本。"""
+    encoding = json.detect_encoding(bytes(buf[:4]))
+    return str(buf, encoding, 'surrogatepass')
@@ -0,0 +1,156 @@
+"""转换过程的 I/O 与耗时指标：读取字节数、解析/标准化/写出耗时与进程峰值内存（RSS），以及系统可用内存。
+
+用法：创建 `ConversionMetrics(input_path)`，用 `stage('parse' | 'normalize' | 'write')` 包住各阶段，
+把它传给 `convert_flat` / `convert_multi` / `stream_to_csv`（参数 metrics），结束后 `summary()` 得到指标，
+`log(logger)` 输出为一条结构化日志。读取字节数取自 `os.stat` 与文件位置，不会再序列化已解析的数据。
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, Iterator
+
+STAGES = ('parse', 'normalize', 'write')
+
+
+def peak_rss_bytes() -> int:
+    """当前进程的峰值常驻内存（字节）；无法获取时返回 None。"""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def _windows_peak_rss() -> int:
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return int(counters.PeakWorkingSetSize)
+    except Exception:
+        return None
+
+
+def available_memory_bytes() -> int:
+    """系统当前可用的物理内存（字节）；无法获取时返回 None。"""
+    if hasattr(os, 'sysconf'):
+        try:
+            # Linux 的 MemAvailable 包含可回收的页缓存，比空闲页数更接近实际可用量
+            with open('/proc/meminfo', 'r', encoding='ascii') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        try:
+            return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError):
+            return None
+    try:
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong),
+                ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong),
+                ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong),
+                ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong),
+                ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return int(status.ullAvailPhys)
+    except Exception:
+        return None
+
+
+class ConversionMetrics:
+    """累积一次转换的指标。各阶段可多次进入（流式模式每批一次），耗时累加。"""
+
+    def __init__(self, input_path: Path = None):
+        self.input_path = Path(input_path) if input_path is not None else None
+        self.input_bytes = os.stat(self.input_path).st_size if self.input_path is not None else None
+        self.bytes_read = None
+        self.seconds: Dict[str, float] = {name: 0.0 for name in STAGES}
+        self._start = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed_iter(self, iterable: Iterable, name: str = 'parse') -> Iterator:
+        """逐个产出 iterable 的元素，并把取元素的耗时计入 name 阶段（流式解析与处理交错进行时使用）。"""
+        it = iter(iterable)
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(name, clock() - start)
+                return
+            self.add(name, clock() - start)
+            yield item
+
+    def summary(self) -> Dict:
+        bytes_read = self.bytes_read if self.bytes_read is not None else self.input_bytes
+        out = {
+            'input_path': str(self.input_path) if self.input_path is not None else None,
+            'input_bytes': self.input_bytes,
+            'bytes_read': bytes_read,
+        }
+        for name, seconds in self.seconds.items():
+            out[f'{name}_seconds'] = round(seconds, 6)
+        out['total_seconds'] = round(time.perf_counter() - self._start, 6)
+        out['peak_rss_bytes'] = peak_rss_bytes()
+        return out
+
+    def log(self, logger, prefix: str = '[metrics]') -> Dict:
+        """以一条 JSON 格式的日志输出指标，并返回该指标字典。"""
+        record = self.summary()
+        if logger is not None:
+            logger.info(f'{prefix} ' + json.dumps(record, ensure_ascii=False))
+        return record
+
+
+def stage(metrics: ConversionMetrics, name: str):
+    """metrics 为 None 时返回空的上下文管理器，调用方无需判断。"""
+    return metrics.stage(name) if metrics is not None else nullcontext()
@@ -0,0 +1,137 @@
+"""NDJSON（每行一个 JSON 值）输入：格式检测与按行对齐的分块并行解析。
+
+- `detect_input_format` 在转换前根据文件开头判断是 JSON 文档还是 NDJSON，不再依赖 ijson 解析失败后回退；
+- 文件按字节切成若干块，块边界对齐到换行符；每块由工作进程各自映射文件（见 mapped 模块）后
+  只访问自己的字节区间逐行解析，进程之间只传递区间与解析结果，结果按文件顺序返回；
+- 无法解析的行不会被静默丢弃：记录其起始字节位置与错误信息，转换报告中给出准确的行数与位置。
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+from .mapped import map_file
+
+NDJSON_SUFFIXES = ('.jsonl', '.ndjson')
+# 检测格式时最多读取的首行字节数（首行更长时视为 JSON 文档）
+DETECT_LINE_LIMIT = 16 * 1024 * 1024
+# 每块的目标字节数（实际在其后的第一个换行处结束）
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+# 错误信息的最大长度
+ERROR_CHARS = 200
+
+_BOM = b'\xef\xbb\xbf'
+
+
+def detect_input_format(input_path: Path) -> str:
+    """返回 'ndjson' 或 'json'。
+
+    后缀为 .jsonl/.ndjson 时为 NDJSON；否则首行是一个完整的 JSON 值且之后还有非空内容时为 NDJSON
+    （一个合法的 JSON 文档之后不能再有内容），其余情况为 JSON 文档。
+    """
+    input_path = Path(input_path)
+    if input_path.suffix.lower() in NDJSON_SUFFIXES:
+        return 'ndjson'
+    with input_path.open('rb') as f:
+        first = f.readline(DETECT_LINE_LIMIT)
+        if first.startswith(_BOM):
+            first = first[len(_BOM):]
+        while first and not first.strip():
+            first = f.readline(DETECT_LINE_LIMIT)
+        if not first.endswith(b'\n'):
+            return 'json'
+        try:
+            json.loads(first)
+        except ValueError:
+            return 'json'
+        for line in f:
+            if line.strip():
+                return 'ndjson'
+    return 'json'
+
+
+def line_ranges(input_path: Path, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """把文件切成 [start, end) 字节区间，除最后一块外每块都在换行符之后结束。"""
+    ranges = []
+    start = 0
+    with map_file(input_path) as buf:
+        size = len(buf)
+        while start < size:
+            nl = buf.find(b'\n', min(start + chunk_bytes, size) - 1)
+            end = size if nl < 0 else nl + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(input_path: Path, start: int, end: int) -> Tuple[List[Any], List[Tuple[int, str]]]:
+    """解析 [start, end) 中的各行，返回 (值列表, [(行起始字节位置, 错误信息)])。空行跳过。
+
+    直接在文件映射上查找换行并逐行切片，不把整块读入内存。
+    """
+    values = []
+    rejected = []
+    loads = json.loads
+    with map_file(input_path) as buf:
+        pos = start
+        if start == 0 and buf[:len(_BOM)] == _BOM:
+            pos = len(_BOM)
+        while pos < end:
+            nl = buf.find(b'\n', pos, end)
+            if nl < 0:
+                nl = end
+            line = buf[pos:nl]
+            if line.strip():
+                try:
+                    values.append(loads(line))
+                except ValueError as e:
+                    rejected.append((pos, f'{type(e).__name__}: {e}'[:ERROR_CHARS]))
+            pos = nl + 1
+    return values, rejected
+
+
+class NdjsonReader:
+    """按文件顺序逐个返回 NDJSON 中的值；workers > 1 时各块由进程池并行解析。
+
+    迭代过程中 `bytes_read` 为已返回的块的结束位置，`rejected` 为已发现的无法解析的行
+    [(行起始字节位置, 错误信息)]，按位置排序。
+    """
+
+    def __init__(self, input_path: Path, workers: int = 1, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        self.input_path = Path(input_path)
+        self.workers = max(1, workers or 1)
+        self.chunk_bytes = chunk_bytes
+        self.bytes_read = 0
+        self.rejected: List[Tuple[int, str]] = []
+
+    def _chunks(self) -> Iterator[Tuple[int, Tuple[List[Any], List[Tuple[int, str]]]]]:
+        ranges = line_ranges(self.input_path, self.chunk_bytes)
+        if self.workers == 1 or len(ranges) == 1:
+            for start, end in ranges:
+                yield end, parse_range(self.input_path, start, end)
+            return
+        # 同时在途的块数有上限，内存占用与 workers * chunk_bytes 成正比
+        window = self.workers * 2
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = []
+            try:
+                for start, end in ranges:
+                    pending.append((end, pool.submit(parse_range, self.input_path, start, end)))
+                    if len(pending) >= window:
+                        end_, future = pending.pop(0)
+                        yield end_, future.result()
+                for end_, future in pending:
+                    yield end_, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def __iter__(self) -> Iterator[Any]:
+        for end, (values, rejected) in self._chunks():
+            self.rejected.extend(rejected)
+            self.bytes_read = end
+            yield from values
+
+    def summary(self) -> dict:
+        """无法解析的行数与各行的起始字节位置，用于转换报告。"""
+        return {'rejected_lines': len(self.rejected), 'rejected_offsets': [offset for offset, _ in self.rejected]}
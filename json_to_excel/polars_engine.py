@@ -0,0 +1,156 @@
+"""polars 执行引擎：把数值转换、日期解析与去重组成一个 polars 惰性查询（多线程、流式执行）。
+
+扁平化仍由 SchemaFlattener 完成（两种引擎共用），之后只有需要变换的列（金额列、日期列、去重键）
+进入 polars 查询，其余列原样保留，因此输出与 pandas 引擎一致：
+- 数值列：清洗规则与 `common.numeric.to_numeric_fast` 相同（千分位、全角、“元”、括号负数），
+  全为整数文本时得到 int64，否则 float64；
+- 日期列：用 pandas 的格式推断（按首个非空值）确定格式，再由 polars 按该格式解析；
+- 去重：按键保留首次出现的行，行的原始索引保持不变。
+
+polars 无法与 pandas 得到相同结果的列（例如数字与字符串混合的 object 列、推断出的日期格式含
+时区/小数秒等）自动回退到 pandas 处理。
+"""
+import re
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_bool_dtype, is_numeric_dtype
+
+from common.numeric import _REPLACE_MANY, _python_float, to_numeric_fast
+
+from .columnar import _import_polars
+from .report import numeric_candidates
+
+# 推断出的日期格式只含这些指令时交给 polars 解析，结果与 pandas 相同
+_SAFE_DATE_DIRECTIVES = {'%Y', '%m', '%d', '%H', '%M', '%S'}
+
+
+def _string_values(s: pd.Series):
+    """列中只有字符串与缺失值时返回值列表（缺失值为 None），否则返回 None。
+
+    返回 list 而不是 object 数组：object 数组的首个值为 None 时 polars 推断为 Object 类型，无法转换为 String。
+    """
+    if infer_dtype(s, skipna=True) not in ('string', 'empty'):
+        return None
+    return s.to_numpy(dtype=object, na_value=None).tolist()
+
+
+def _date_format(values: List) -> str:
+    from pandas.tseries.api import guess_datetime_format
+
+    first = next((v for v in values if v is not None), None)
+    if first is None:
+        return None
+    fmt = guess_datetime_format(first)
+    if not fmt or not set(re.findall(r'%.', fmt)) <= _SAFE_DATE_DIRECTIVES:
+        return None
+    return fmt
+
+
+def _key_series(pl, name: str, s: pd.Series):
+    """去重键列转换为 polars 列；无法得到与 pandas 相同的相等语义时返回 None。"""
+    kind = s.dtype.kind if isinstance(s.dtype, np.dtype) else None
+    if kind in ('i', 'u', 'b', 'M', 'm'):
+        return pl.Series(name, s.to_numpy())
+    if kind == 'f':
+        return pl.Series(name, s.to_numpy(), nan_to_null=True)
+    values = _string_values(s)
+    if values is None:
+        return None
+    return pl.Series(name, values, dtype=pl.String)
+
+
+def transform(df: pd.DataFrame, numeric_cols=None, date_cols: List[str] = None, dedupe_by: List[str] = None) -> pd.DataFrame:
+    """在扁平化后的 DataFrame 上执行数值转换、日期解析与去重（等价于 pandas 引擎的处理顺序）。"""
+    pl = _import_polars()
+    inputs: Dict[str, object] = {}
+    # 分三步：清洗/解析 -> 转为数值 -> 校验标记；每一步引用上一步的结果列，避免重复计算
+    clean_exprs, parse_exprs, check_exprs = [], [], []
+    numeric_todo: List[str] = []
+    date_todo: Dict[str, str] = {}
+
+    for col in numeric_candidates(df.columns, numeric_cols):
+        s = df[col]
+        if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+            continue
+        values = _string_values(s)
+        if values is None:
+            df[col] = to_numeric_fast(s)
+            continue
+        name = f'__n{len(numeric_todo)}'
+        inputs[name] = pl.Series(name, values, dtype=pl.String)
+        cleaned = pl.col(name).str.replace_many(_REPLACE_MANY)
+        # 括号负数：(123) -> -123
+        paren = cleaned.str.starts_with('(') & cleaned.str.ends_with(')')
+        clean_exprs.append(pl.when(paren).then(pl.lit('-') + cleaned.str.slice(1, cleaned.str.len_chars() - 2)).otherwise(cleaned).alias(f'{name}_s'))
+        parse_exprs.append(pl.col(f'{name}_s').cast(pl.Float64, strict=False).fill_nan(None).alias(f'{name}_f'))
+        check_exprs += [
+            (pl.col(f'{name}_s').is_not_null() & pl.col(f'{name}_f').is_null()).alias(f'{name}_bad'),
+            pl.col(f'{name}_s').str.contains(r'^[+-]?\d{1,18}$').alias(f'{name}_int'),
+        ]
+        numeric_todo.append(col)
+
+    for col in [c for c in (date_cols or []) if c in df.columns]:
+        values = _string_values(df[col])
+        fmt = _date_format(values) if values is not None else None
+        if fmt is None:
+            # 非字符串列或格式无法安全交给 polars：按 pandas 引擎处理
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+            continue
+        name = f'__d{len(date_todo)}'
+        inputs[name] = pl.Series(name, values, dtype=pl.String)
+        clean_exprs.append(pl.col(name).str.strptime(pl.Datetime('us'), fmt, strict=False).alias(f'{name}_t'))
+        # 解析结果按同一格式格式化后应与原文本相同，否则说明 polars 的解析比 pandas 宽松
+        parsed = pl.col(f'{name}_t')
+        check_exprs.append((parsed.is_not_null() & (parsed.dt.strftime(fmt) != pl.col(name))).alias(f'{name}_loose'))
+        date_todo[col] = name
+
+    if inputs:
+        lf = pl.DataFrame(list(inputs.values()), height=len(df)).lazy()
+        for exprs in (clean_exprs, parse_exprs, check_exprs):
+            if exprs:
+                lf = lf.with_columns(exprs)
+        result = lf.collect(engine='streaming')
+
+        for i, col in enumerate(numeric_todo):
+            name = f'__n{i}'
+            bad = result.filter(pl.col(f'{name}_bad'))[f'{name}_s'].to_list()
+            if any(_python_float(v) for v in bad):
+                # polars 判为无效、而 Python float 可以解析的文本（如 '1_000'）：按 pandas 引擎处理
+                df[col] = to_numeric_fast(df[col])
+                continue
+            parsed = result[f'{name}_f']
+            if parsed.null_count() == 0 and result[f'{name}_int'].all():
+                values = result[f'{name}_s'].cast(pl.Int64, strict=False)
+                df[col] = pd.Series(values.to_numpy(), index=df.index, name=col)
+            else:
+                df[col] = pd.Series(parsed.to_numpy(), index=df.index, name=col, dtype='float64')
+
+        for col, name in date_todo.items():
+            if result[f'{name}_loose'].any():
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+            else:
+                df[col] = pd.Series(result[f'{name}_t'].to_numpy(), index=df.index, name=col)
+
+    if dedupe_by:
+        df = _dedupe(pl, df, dedupe_by)
+    return df
+
+
+def _dedupe(pl, df: pd.DataFrame, dedupe_by: List[str]) -> pd.DataFrame:
+    exist_cols = [c for c in dedupe_by if c in df.columns]
+    if not exist_cols:
+        return df
+    keys = [_key_series(pl, f'__k{i}', df[c]) for i, c in enumerate(exist_cols)]
+    if any(k is None for k in keys):
+        return df.drop_duplicates(subset=exist_cols, keep='first')
+    kept = (
+        pl.DataFrame(keys, height=len(df)).lazy()
+        .with_row_index('__row')
+        .unique(subset=[k.name for k in keys], keep='first', maintain_order=True)
+        .select('__row')
+        .collect(engine='streaming')['__row']
+        .to_numpy()
+    )
+    return df.iloc[kept]
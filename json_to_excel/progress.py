@@ -0,0 +1,115 @@
+"""转换进度与取消：按已读取的字节数与已写出的行数报告进度，限制回调频率，并支持协作式取消。
+
+`ProgressReporter(callback, cancel)`：
+- callback(percent: int, info: dict)：percent 为 0~100，info 含 stage、bytes_read、total_bytes、rows_written 等；
+  两次回调至少间隔 min_interval 秒，且 percent 只增不减（阶段切换与结束时强制回调，percent 未增加也照常
+  回调以送出新的 info，例如进度已到 100 时结束回调的 stage='done'），
+  因此在 GUI 中直接转发为 Qt 信号的开销可以忽略；
+- cancel：返回 True 表示请求取消的可调用对象（如 `QThread.isInterruptionRequested`）或 `threading.Event`。
+  转换函数在每批处理前后检查，请求取消时抛出 `ConversionCancelled`，已打开的输出文件照常关闭。
+
+`span(lo, hi)` 返回映射到父进度区间 [lo, hi]（0~1 的比例）的子进度，用于把读取、标准化、写出等阶段
+组合为一个总进度，例如 `reporter.span(0, 0.3)` 负责前 30%。
+"""
+import time
+from typing import Callable, Dict, Optional
+
+
+class ConversionCancelled(Exception):
+    """转换被调用方取消。"""
+
+
+class _State:
+    def __init__(self, callback, cancel, min_interval):
+        self.callback = callback
+        self.cancel = cancel
+        self.min_interval = min_interval
+        self.last_time = None
+        self.last_percent = -1
+        self.info: Dict = {}
+
+
+class ProgressReporter:
+    def __init__(self, callback: Callable[[int, Dict], None] = None, cancel=None, min_interval: float = 0.1):
+        self._state = _State(callback, cancel, min_interval)
+        self._lo = 0.0
+        self._hi = 1.0
+
+    def span(self, lo: float, hi: float) -> 'ProgressReporter':
+        child = ProgressReporter.__new__(ProgressReporter)
+        child._state = self._state
+        width = self._hi - self._lo
+        child._lo = self._lo + width * lo
+        child._hi = self._lo + width * hi
+        return child
+
+    def cancelled(self) -> bool:
+        cancel = self._state.cancel
+        if cancel is None:
+            return False
+        is_set = getattr(cancel, 'is_set', None)
+        return bool(is_set() if is_set is not None else cancel())
+
+    def check(self) -> None:
+        """请求取消时抛出 ConversionCancelled。"""
+        if self.cancelled():
+            raise ConversionCancelled('转换已取消')
+
+    def update(self, fraction: float, force: bool = False, **info) -> None:
+        """报告当前区间内的完成比例（0~1），并检查取消。"""
+        self.check()
+        state = self._state
+        state.info.update(info)
+        if state.callback is None:
+            return
+        fraction = min(max(fraction, 0.0), 1.0)
+        percent = int(self._lo * 100 + (self._hi - self._lo) * 100 * fraction)
+        if force:
+            percent = max(percent, state.last_percent)
+        else:
+            if percent <= state.last_percent:
+                return
+            if state.last_time is not None and time.monotonic() - state.last_time < state.min_interval:
+                return
+        now = time.monotonic()
+        state.last_time = now
+        state.last_percent = percent
+        state.callback(percent, dict(state.info))
+
+    def done(self, **info) -> None:
+        """报告完成（100%，stage='done'），总会回调一次。"""
+        self.update(1.0, force=True, **{'stage': 'done', **info})
+
+
+class RowProgress:
+    """按已写出的行数报告进度：add(n) 累加行数，进度为 已写出 / total_rows。"""
+
+    def __init__(self, progress: ProgressReporter, total_rows: int, stage: str = 'write'):
+        self.progress = progress
+        self.total_rows = total_rows
+        self.stage = stage
+        self.written = 0
+
+    def add(self, n: int) -> None:
+        self.written += n
+        fraction = self.written / self.total_rows if self.total_rows else 1.0
+        self.progress.update(fraction, stage=self.stage, rows_written=self.written, total_rows=self.total_rows)
+
+
+def as_reporter(progress) -> Optional[ProgressReporter]:
+    """转换函数的 progress 参数可以是 ProgressReporter，也可以是 callback(percent, info) 函数。"""
+    if progress is None or isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
+
+
+def update(progress: Optional[ProgressReporter], fraction: float, force: bool = False, **info) -> None:
+    """progress 为 None 时不做任何事，调用方无需判断。"""
+    if progress is not None:
+        progress.update(fraction, force=force, **info)
+
+
+def done(progress: Optional[ProgressReporter], **info) -> None:
+    """progress 为 None 时不做任何事；否则报告完成（见 ProgressReporter.done）。"""
+    if progress is not None:
+        progress.done(**info)
@@ -0,0 +1,70 @@
+"""保留原始 JSON：直接复制输入文件的内容，不再把解析后的数据重新 `json.dumps`。
+
+- xlsx 输出：按块读取原文件，每块一行写入 raw_json sheet（文本单元格，不超过 Excel 的 32767 字符上限），
+  按顺序拼接该列即可还原原文（解码后的文本）；
+- CSV / 列式输出：把原文件按字节复制为同目录的 `<stem>_raw<原后缀>` 附属文件。
+两种方式都只按块读取，内存占用与文件大小无关，流式模式同样适用。
+"""
+import json
+import shutil
+from pathlib import Path
+from typing import Iterator, Union
+
+# Excel 单元格最多 32767 个字符（按 UTF-16 计），每块留出余量
+EXCEL_MAX_CELL_CHARS = 32767
+RAW_CHUNK_CHARS = 32000
+
+
+def _utf16_len(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _fit_cell(chunk: str) -> Iterator[str]:
+    # 含大量 BMP 以外字符（如 emoji）时按 UTF-16 计数可能超限，对半拆分
+    if _utf16_len(chunk) <= EXCEL_MAX_CELL_CHARS:
+        yield chunk
+        return
+    mid = len(chunk) // 2
+    yield from _fit_cell(chunk[:mid])
+    yield from _fit_cell(chunk[mid:])
+
+
+def iter_raw_chunks(source: Union[str, Path], chunk_chars: int = RAW_CHUNK_CHARS) -> Iterator[str]:
+    """按块产出原始 JSON 文本。source 为文件路径（Path）时从文件按块读取，为 str 时直接切分该文本。
+
+    文件的编码与解析时相同（`json.detect_encoding`，UTF-8/16/32）；不是合法的该编码文本时抛出
+    UnicodeDecodeError，而不是替换为 U+FFFD（那样拼接结果就不再是原文）。
+    """
+    if isinstance(source, Path):
+        with source.open('rb') as raw:
+            encoding = json.detect_encoding(raw.read(4))
+        with source.open('r', encoding=encoding, newline='') as f:
+            while True:
+                chunk = f.read(chunk_chars)
+                if not chunk:
+                    return
+                yield from _fit_cell(chunk)
+    for start in range(0, len(source), chunk_chars):
+        yield from _fit_cell(source[start:start + chunk_chars])
+
+
+def raw_side_path(output_path: Path, source: Union[str, Path] = None) -> Path:
+    """附属文件路径：与主输出同目录，`<stem>_raw<原文件后缀，默认 .json>`。"""
+    output_path = Path(output_path)
+    suffix = source.suffix if isinstance(source, Path) and source.suffix else '.json'
+    return output_path.with_name(f'{output_path.stem}_raw{suffix}')
+
+
+def write_raw_file(source: Union[str, Path], dest: Path) -> Path:
+    """把原始 JSON 写为附属文件：源为文件时按字节复制，为 str 时按 UTF-8 写出。"""
+    dest = Path(dest)
+    if isinstance(source, Path):
+        shutil.copyfile(source, dest)
+    else:
+        dest.write_text(source, encoding='utf-8')
+    return dest
+
+
+def write_raw_sheet(writer, source: Union[str, Path]) -> None:
+    """把原始 JSON 按块写入 StreamingXlsxWriter 的 raw_json sheet（每块一行，均为文本单元格，以 `=` 开头的块不会写为公式）。"""
+    writer.append_rows('raw_json', ((chunk,) for chunk in iter_raw_chunks(source)), header=['raw_json'], text=True)
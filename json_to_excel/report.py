@@ -0,0 +1,156 @@
+"""转换报告的增量统计：按批次累积行数、缺失值、数值列合计/最小/最大值与去重计数估计。
+
+流式模式每写出一批就调用一次 `update`，不保留数据本身；内存模式在写出时按同样的分片调用，
+统计与写出共用一遍遍历，不再对整表额外执行 `isna().sum()`、`sum()` 等扫描。
+"""
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype, is_string_dtype
+
+# 未指定数值列时按列名识别的金额列
+NUMERIC_NAME_CANDIDATES = {'AMT', 'GPAMT', 'AMOUNT', 'AMT_TOTAL', 'AMT_SUM'}
+
+
+def numeric_candidates(columns, numeric_cols=None) -> List:
+    """返回需要转换为数值/统计合计的列：指定了 numeric_cols 时取其中存在的列，否则按列名识别。"""
+    if numeric_cols is None:
+        return [c for c in columns if isinstance(c, str) and c.upper() in NUMERIC_NAME_CANDIDATES]
+    return [c for c in numeric_cols if c in columns]
+
+
+def _hash_values(s: pd.Series) -> np.ndarray:
+    """把一列非缺失值哈希为 uint64。
+
+    数值统一按 float64 哈希、其余值按字符串哈希，同一个值无论所在批次被推断为 int、float 还是 object，
+    得到的哈希都相同，保证分批累积与整表统计的结果一致。
+    """
+    s = s[s.notna()]
+    if s.empty:
+        return np.empty(0, dtype=np.uint64)
+    if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+        return pd.util.hash_array(s.to_numpy(dtype='float64'))
+    if is_string_dtype(s.dtype) and s.dtype != object:
+        # 字符串列（pandas 的 str dtype）无需逐值判断类型
+        return pd.util.hash_array(s.to_numpy(dtype=object))
+    values = s.tolist()
+    is_num = np.fromiter(((v.__class__ is int or v.__class__ is float) for v in values), dtype=bool, count=len(values))
+    out = np.empty(len(values), dtype=np.uint64)
+    if is_num.any():
+        out[is_num] = pd.util.hash_array(np.array([v for v, n in zip(values, is_num) if n], dtype='float64'))
+    if not is_num.all():
+        rest = np.array([str(v) for v, n in zip(values, is_num) if not n], dtype=object)
+        out[~is_num] = pd.util.hash_array(rest)
+    return out
+
+
+class DistinctCounter:
+    """去重计数估计：不同值较少时精确计数，超过 exact_limit 后转为 HyperLogLog（2**p 个寄存器）。
+
+    两种状态都可以按批次合并，结果与数据分批方式无关。
+    """
+
+    def __init__(self, p: int = 14, exact_limit: int = 4096):
+        self.p = p
+        self.exact_limit = exact_limit
+        self._exact = np.empty(0, dtype=np.uint64)
+        self._registers = None
+
+    def _add_registers(self, hashes: np.ndarray) -> None:
+        p = self.p
+        idx = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes << np.uint64(p)
+        # rank = 剩余位中首个 1 的位置（从 1 开始）；全 0 时为 64 - p + 1
+        rank = np.full(len(hashes), 64 - p + 1, dtype=np.uint8)
+        nonzero = rest != 0
+        rank[nonzero] = 64 - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self._registers, idx, rank)
+
+    def update(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        if self._registers is None:
+            self._exact = np.union1d(self._exact, hashes)
+            if len(self._exact) <= self.exact_limit:
+                return
+            self._registers = np.zeros(1 << self.p, dtype=np.uint8)
+            hashes, self._exact = self._exact, None
+        self._add_registers(hashes)
+
+    def estimate(self) -> int:
+        if self._registers is None:
+            return int(len(self._exact))
+        m = float(len(self._registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self._registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self._registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # 小基数时用线性计数修正
+            raw = m * math.log(m / zeros)
+        return int(round(raw))
+
+
+class ReportAccumulator:
+    """按批次累积一张表的报告统计。
+
+    用法::
+
+        acc = ReportAccumulator(numeric_cols=None)
+        for df in batches:
+            acc.update(df)
+        report = acc.summary()
+
+    各批次的列可以不同：某列首次出现之前的行计为该列缺失，列顺序按首次出现的顺序。
+    """
+
+    def __init__(self, numeric_cols=None):
+        self.numeric_cols = numeric_cols
+        self.row_count = 0
+        self.columns: List = []
+        self._missing: Dict[Any, int] = {}
+        self._sums: Dict[Any, List[float]] = {}
+        self._min: Dict[Any, float] = {}
+        self._max: Dict[Any, float] = {}
+        self._distinct: Dict[Any, DistinctCounter] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        n = len(df)
+        for col in df.columns:
+            if col not in self._missing:
+                # 新列：之前批次的行都没有这一列
+                self.columns.append(col)
+                self._missing[col] = self.row_count
+                self._distinct[col] = DistinctCounter()
+        present = set(df.columns)
+        for col in self.columns:
+            if col not in present:
+                self._missing[col] += n
+        for col in df.columns:
+            s = df[col]
+            self._missing[col] += int(s.isna().sum())
+            self._distinct[col].update(_hash_values(s))
+        for col in numeric_candidates(df.columns, self.numeric_cols):
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            values = values[~np.isnan(values)]
+            # 每批用 fsum 求精确合计，最终再合并，结果与分批方式基本无关
+            self._sums.setdefault(col, []).append(math.fsum(values))
+            if len(values):
+                lo, hi = float(values.min()), float(values.max())
+                self._min[col] = min(self._min.get(col, lo), lo)
+                self._max[col] = max(self._max.get(col, hi), hi)
+        self.row_count += n
+
+    def summary(self) -> Dict[str, Any]:
+        """返回报告：row_count、columns、missing_counts、numeric_sums/min/max、distinct_counts。"""
+        sums = {col: math.fsum(self._sums.get(col, [])) for col in numeric_candidates(self.columns, self.numeric_cols)}
+        return {
+            'row_count': int(self.row_count),
+            'columns': list(map(str, self.columns)),
+            'missing_counts': {str(k): int(self._missing[k]) for k in self.columns},
+            'numeric_sums': {str(k): float(v) for k, v in sums.items()},
+            'numeric_min': {str(k): self._min.get(k) for k in sums},
+            'numeric_max': {str(k): self._max.get(k) for k in sums},
+            'distinct_counts': {str(k): self._distinct[k].estimate() for k in self.columns},
+        }
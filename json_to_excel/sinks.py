@@ -0,0 +1,330 @@
+"""流式输出目标：按表名分批追加写入，供 `core.stream_to_csv` 使用。
+
+各输出目标都支持检查点（见 checkpoint 模块）：`checkpoint()` 提交已写出的内容并返回可序列化的状态，
+`restore(state)` 在续传时恢复到该状态，丢弃之后写出的不完整内容。
+
+列顺序固定：每张表第一次写入的列即为表头，之后每批按名称映射到同一列顺序（见 TableSchema）。
+表头写出后才出现的列（迟到列）按 late_columns 处理：
+- 'rewrite'（CSV 默认）：迟到列追加在各行末尾，结束时重写表头并补齐较早各行的空字段；
+- 'spill'：主表只保留表头中的列，迟到列的非空值以 (__row, column, value) 长表形式写入附属输出
+  （CSV 为 `<stem>_<表名>_late.csv`，xlsx 为 `<表名>_late` sheet），__row 为该行在主表中的序号（从 0 开始）。
+xlsx 无法在写出后修改表头，总是使用 'spill'；列式格式的分段在合并时按列名对齐，不需要处理。
+"""
+import csv
+import os
+from pathlib import Path
+from typing import Dict, IO, List, Tuple
+
+import pandas as pd
+
+from .columnar import COLUMNAR_FORMATS, DEFAULT_ROW_GROUP_SIZE, ColumnarSink
+from .raw import raw_side_path, write_raw_file, write_raw_sheet
+from .xlsx_stream import StreamingXlsxWriter
+
+# 支持的输出格式；未指定时按输出文件后缀判断
+OUTPUT_FORMATS = ('xlsx', 'csv') + tuple(COLUMNAR_FORMATS)
+_SUFFIX_FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.ipc': 'arrow', '.feather': 'feather'}
+
+
+def safe_table_name(name: str) -> str:
+    """把子表名转换为可用于文件名/sheet 名的形式。"""
+    return str(name).replace('/', '_').replace('\\', '_')
+
+
+LATE_COLUMN_MODES = ('rewrite', 'spill')
+LATE_HEADER = ['__row', 'column', 'value']
+
+
+class TableSchema:
+    """一张表的固定列顺序：首次写入的列为表头，之后出现的新列按出现顺序追加为迟到列。"""
+
+    def __init__(self, header):
+        self.header: List = list(header)
+        self.late: List = []
+        self.rows = 0
+        self._known = set(self.header)
+
+    def state(self) -> Tuple:
+        return list(self.header), list(self.late), self.rows
+
+    @classmethod
+    def restore(cls, header, late, rows) -> 'TableSchema':
+        schema = cls(header)
+        schema.late = list(late)
+        schema._known.update(late)
+        schema.rows = rows
+        return schema
+
+    @property
+    def columns(self) -> List:
+        return self.header + self.late
+
+    def align(self, df: pd.DataFrame) -> pd.DataFrame:
+        """把一批数据按列名映射到当前列顺序（新列登记为迟到列），不重新扁平化；列顺序已一致时原样返回。"""
+        for c in df.columns:
+            if c not in self._known:
+                self._known.add(c)
+                self.late.append(c)
+        columns = self.columns
+        if len(df.columns) == len(columns) and list(df.columns) == columns:
+            return df
+        return df.reindex(columns=columns)
+
+    def late_values(self, df: pd.DataFrame) -> pd.DataFrame:
+        """对齐后的一批数据中迟到列的非空值，转换为 (__row, column, value) 长表。"""
+        parts = []
+        for col in self.late:
+            s = df[col]
+            mask = s.notna().to_numpy()
+            if mask.any():
+                rows = self.rows + mask.nonzero()[0]
+                parts.append(pd.DataFrame({'__row': rows, 'column': col, 'value': s[mask].astype(object).to_numpy()}))
+        return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def rewrite_csv_header(path: Path, columns: List) -> None:
+    """重写 CSV 表头为 columns，并把较短的行在末尾补空字段到相同列数（流式逐行处理，原子替换）。"""
+    tmp = path.with_name(path.name + '.tmp')
+    width = len(columns)
+    with open(path, 'r', encoding='utf-8', newline='') as src, open(tmp, 'w', encoding='utf-8', newline='') as dst:
+        reader = csv.reader(src)
+        # 与 DataFrame.to_csv 的默认输出一致
+        writer = csv.writer(dst, lineterminator=os.linesep)
+        next(reader, None)
+        writer.writerow(columns)
+        for row in reader:
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            writer.writerow(row)
+    os.replace(tmp, path)
+
+
+class CsvSink:
+    """每张表一个 CSV：主表 'data' 写到 output_path，子表写到同目录 `<stem>_<表名>.csv`。
+
+    late_columns 为迟到列的处理方式（见模块说明），默认 'rewrite'。
+    """
+
+    def __init__(self, output_path: Path, late_columns: str = 'rewrite'):
+        if late_columns not in LATE_COLUMN_MODES:
+            raise ValueError(f'未知的迟到列处理方式: {late_columns}')
+        self.output_path = Path(output_path)
+        self.late_columns = late_columns
+        self.outputs: Dict[str, Path] = {}
+        self.schemas: Dict[str, TableSchema] = {}
+        self._files: Dict[str, IO] = {}
+        self._late_files: Dict[str, IO] = {}
+
+    def table_path(self, name: str) -> Path:
+        if name == 'data':
+            return self.output_path
+        suffix = self.output_path.suffix or '.csv'
+        return self.output_path.with_name(f'{self.output_path.stem}_{safe_table_name(name)}{suffix}')
+
+    def late_path(self, name: str) -> Path:
+        path = self.table_path(name)
+        return path.with_name(f'{path.stem}_late{path.suffix}')
+
+    def write(self, name: str, df: pd.DataFrame) -> None:
+        f = self._files.get(name)
+        if f is None:
+            path = self.table_path(name)
+            f = open(path, 'w', encoding='utf-8', newline='')
+            self._files[name] = f
+            self.outputs[name] = path
+            self.schemas[name] = TableSchema(df.columns)
+            df.to_csv(f, index=False, header=True)
+            self.schemas[name].rows += len(df)
+            return
+        schema = self.schemas[name]
+        df = schema.align(df)
+        if self.late_columns == 'spill' and schema.late:
+            self._write_late(name, schema.late_values(df))
+            df = df.iloc[:, :len(schema.header)]
+        df.to_csv(f, index=False, header=False)
+        schema.rows += len(df)
+
+    def _write_late(self, name: str, late: pd.DataFrame) -> None:
+        if late is None:
+            return
+        f = self._late_files.get(name)
+        if f is None:
+            path = self.late_path(name)
+            f = self._late_files[name] = open(path, 'w', encoding='utf-8', newline='')
+            self.outputs[f'{name}_late'] = path
+            late.to_csv(f, index=False, header=LATE_HEADER)
+        else:
+            late.to_csv(f, index=False, header=False)
+
+    def checkpoint(self) -> Dict:
+        """刷新各文件并记录已提交的字节数与各表的列顺序。"""
+        def sizes(files):
+            out = {}
+            for name, f in files.items():
+                f.flush()
+                os.fsync(f.fileno())
+                out[name] = os.fstat(f.fileno()).st_size
+            return out
+
+        schemas = {name: s.state() for name, s in self.schemas.items()}
+        return {'outputs': dict(self.outputs), 'sizes': sizes(self._files), 'late_sizes': sizes(self._late_files), 'schemas': schemas}
+
+    def restore(self, state: Dict) -> None:
+        """把各文件截断到已提交的字节数，之后以追加方式继续写入（不再写表头）。"""
+        for name, size in state['sizes'].items():
+            path = self.table_path(name)
+            os.truncate(path, size)
+            self._files[name] = open(path, 'a', encoding='utf-8', newline='')
+        for name, size in state.get('late_sizes', {}).items():
+            path = self.late_path(name)
+            os.truncate(path, size)
+            self._late_files[name] = open(path, 'a', encoding='utf-8', newline='')
+        self.schemas = {name: TableSchema.restore(*s) for name, s in state.get('schemas', {}).items()}
+        self.outputs = dict(state['outputs'])
+
+    def write_report(self, rows) -> None:
+        """CSV 输出不单独写报告文件，报告由 `stream_to_csv` 返回给调用方。"""
+
+    def write_raw(self, source) -> None:
+        """原始 JSON 复制为同目录的 `<stem>_raw.json` 附属文件。"""
+        self.outputs['raw_json'] = write_raw_file(source, raw_side_path(self.output_path, source))
+
+    def close(self) -> None:
+        for f in list(self._files.values()) + list(self._late_files.values()):
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._files = {}
+        self._late_files = {}
+
+    def finish(self) -> None:
+        """正常结束：'rewrite' 模式下为出现迟到列的表重写表头。"""
+        self.close()
+        if self.late_columns == 'rewrite':
+            for name, schema in self.schemas.items():
+                if schema.late:
+                    rewrite_csv_header(self.outputs[name], schema.columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
+        return False
+
+
+class XlsxSink:
+    """所有表写入同一个 xlsx：每张表一个 sheet，由 StreamingXlsxWriter 负责换页。
+
+    xlsx 无法在中断后追加，因此指定 spill_dir（检查点模式）时每批先写为 spill_dir 中的分段文件，
+    写报告/原始 JSON 或关闭时再按顺序写入工作簿；中断时不生成工作簿，保留分段供续传。
+    表头写出后不能修改，迟到列写入 `<表名>_late` sheet。
+    """
+
+    def __init__(self, output_path: Path, spill_dir: Path = None):
+        self.output_path = Path(output_path)
+        self.outputs: Dict[str, Path] = {}
+        self.schemas: Dict[str, TableSchema] = {}
+        self.writer = StreamingXlsxWriter(self.output_path)
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._parts: List[Tuple[str, str]] = []
+
+    def write(self, name: str, df: pd.DataFrame) -> None:
+        self.outputs[name] = self.output_path
+        schema = self.schemas.get(name)
+        if schema is None:
+            schema = self.schemas[name] = TableSchema(df.columns)
+        else:
+            df = schema.align(df)
+            if schema.late:
+                late = schema.late_values(df)
+                df = df.iloc[:, :len(schema.header)]
+                if late is not None:
+                    self.outputs[f'{name}_late'] = self.output_path
+                    self._write_part(f'{name}_late', late)
+        self._write_part(name, df)
+        schema.rows += len(df)
+
+    def _write_part(self, name: str, df: pd.DataFrame) -> None:
+        if self.spill_dir is None:
+            self.writer.write_frame(safe_table_name(name), df)
+            return
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        part = f'xlsx_{len(self._parts):06d}.pkl'
+        df.to_pickle(self.spill_dir / part)
+        self._parts.append((name, part))
+
+    def checkpoint(self) -> Dict:
+        schemas = {name: s.state() for name, s in self.schemas.items()}
+        return {'outputs': dict(self.outputs), 'parts': list(self._parts), 'schemas': schemas}
+
+    def restore(self, state: Dict) -> None:
+        self.outputs = dict(state['outputs'])
+        self._parts = list(state['parts'])
+        self.schemas = {name: TableSchema.restore(*s) for name, s in state.get('schemas', {}).items()}
+        committed = {part for _, part in self._parts}
+        for path in self.spill_dir.glob('xlsx_*.pkl'):
+            if path.name not in committed:
+                path.unlink()
+
+    def _materialize(self) -> None:
+        """把分段按写入顺序写入工作簿，之后直接写入。"""
+        if self.spill_dir is None:
+            return
+        for name, part in self._parts:
+            self.writer.write_frame(safe_table_name(name), pd.read_pickle(self.spill_dir / part))
+        self._parts = []
+        self.spill_dir = None
+
+    def write_report(self, rows) -> None:
+        """把报告（键/值行）写入 report sheet，与内存模式的工作簿一致。"""
+        self._materialize()
+        self.writer.append_rows('report', rows, header=['key', 'value'])
+
+    def write_raw(self, source) -> None:
+        """原始 JSON 按块写入 raw_json sheet。"""
+        self._materialize()
+        write_raw_sheet(self.writer, source)
+        self.outputs['raw_json'] = self.output_path
+
+    def close(self) -> None:
+        self._materialize()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.spill_dir is not None:
+            # 检查点模式下中断：不生成不完整的工作簿，分段留给续传
+            return False
+        self.close()
+        return False
+
+
+def resolve_format(output_path: Path, output_format: str = None, default: str = 'csv') -> str:
+    """确定输出格式：显式指定优先，否则按后缀判断（.xlsx/.csv/.parquet/.arrow/.ipc/.feather），都不匹配时用 default。"""
+    if output_format:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'未知的输出格式: {output_format}')
+        return output_format
+    return _SUFFIX_FORMATS.get(Path(output_path).suffix.lower(), default)
+
+
+def open_sink(output_path: Path, output_format: str = None, row_group_size: int = DEFAULT_ROW_GROUP_SIZE, spill_dir: Path = None,
+              late_columns: str = 'rewrite'):
+    """选择流式输出目标：xlsx -> XlsxSink，parquet/arrow/feather -> ColumnarSink，其余 -> CsvSink。
+
+    spill_dir 为检查点模式下 xlsx / 列式格式保存分段文件的目录（CSV 直接追加，不需要）。
+    late_columns 为 CSV 迟到列的处理方式（'rewrite' / 'spill'）。
+    """
+    fmt = resolve_format(output_path, output_format)
+    if fmt == 'xlsx':
+        return XlsxSink(output_path, spill_dir=spill_dir)
+    if fmt in COLUMNAR_FORMATS:
+        return ColumnarSink(output_path, fmt, row_group_size=row_group_size, spill_dir=spill_dir)
+    return CsvSink(output_path, late_columns=late_columns)
@@ -0,0 +1,145 @@
+"""流式 xlsx 写入：基于 openpyxl 的 write-only 模式，逐行写入 sheet XML，内存占用与行数无关。"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+# Excel 单个 sheet 的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_SHEET_NAME = 31
+_INVALID_SHEET_CHARS = str.maketrans({c: '_' for c in '[]:*?/\\'})
+
+
+def _cell_values(s: pd.Series) -> List[Any]:
+    """把一列转换为 openpyxl 可写入的 Python 值：缺失值 -> None，list/dict -> str（与 pandas.to_excel 一致）。"""
+    if isinstance(s.dtype, np.dtype):
+        kind = s.dtype.kind
+        if kind in 'iub':
+            return s.tolist()
+        if kind == 'f':
+            return [None if v != v else v for v in s.tolist()]
+        if kind == 'M':
+            return [None if v is pd.NaT else v for v in s.tolist()]
+    out = []
+    for v in s.tolist():
+        if v is None or v is pd.NaT or v is pd.NA or (isinstance(v, float) and v != v):
+            out.append(None)
+        elif isinstance(v, (list, dict, tuple, set)):
+            out.append(str(v))
+        else:
+            out.append(v)
+    return out
+
+
+def frame_rows(df: pd.DataFrame) -> Iterable[tuple]:
+    """按行产出 DataFrame 的值（按列批量转换，避免逐单元格判断 dtype）。"""
+    if df.shape[1] == 0:
+        return iter(())
+    columns = [_cell_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    return zip(*columns)
+
+
+def _text_cell(ws, value: Any):
+    if not isinstance(value, str):
+        return value
+    cell = WriteOnlyCell(ws, value=value)
+    cell.data_type = 's'
+    return cell
+
+
+class _SheetState:
+    def __init__(self, base: str):
+        self.base = base
+        self.ws = None
+        self.header: List[str] = None
+        self.rows = 0
+        self.part = 0
+        self.sheet_names: List[str] = []
+
+
+class StreamingXlsxWriter:
+    """流式 xlsx 写入器。
+
+    按逻辑表名追加写入；某个 sheet 写满 Excel 行数上限后自动换到新 sheet（`<名>_2`、`<名>_3` ...），
+    并在新 sheet 中重复表头。调用 `close()` 时保存文件。
+    """
+
+    def __init__(self, output_path: Path, max_rows: int = EXCEL_MAX_ROWS):
+        self.output_path = Path(output_path)
+        self.max_rows = max_rows
+        self.wb = Workbook(write_only=True)
+        self._tables: Dict[str, _SheetState] = {}
+        self._used_names = set()
+        self._closed = False
+
+    def _unique_sheet_name(self, base: str, part: int) -> str:
+        suffix = '' if part == 1 else f'_{part}'
+        base = str(base).translate(_INVALID_SHEET_CHARS) or 'sheet'
+        name = base[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+        n = 1
+        while name.lower() in self._used_names:
+            n += 1
+            extra = f'~{n}'
+            name = base[:EXCEL_MAX_SHEET_NAME - len(suffix) - len(extra)] + extra + suffix
+        self._used_names.add(name.lower())
+        return name
+
+    def _new_sheet(self, state: _SheetState) -> None:
+        state.part += 1
+        name = self._unique_sheet_name(state.base, state.part)
+        state.ws = self.wb.create_sheet(title=name)
+        state.sheet_names.append(name)
+        state.rows = 0
+        if state.header is not None:
+            state.ws.append(state.header)
+            state.rows = 1
+
+    def sheet_names(self, table: str) -> List[str]:
+        """返回某个逻辑表实际写入的 sheet 名称列表（发生换页时有多个）。"""
+        state = self._tables.get(table)
+        return list(state.sheet_names) if state else []
+
+    def append_rows(self, table: str, rows: Iterable[Sequence], header: Sequence[str] = None, text: bool = False) -> int:
+        """向逻辑表追加若干行；首次写入时若提供 header 则先写表头。返回写入的数据行数。
+
+        text=True 时字符串值一律写为文本单元格（openpyxl 默认把以 `=` 开头的字符串写为公式）。
+        """
+        state = self._tables.get(table)
+        if state is None:
+            state = _SheetState(table)
+            state.header = [str(h) for h in header] if header is not None else None
+            self._tables[table] = state
+            self._new_sheet(state)
+        written = 0
+        for row in rows:
+            if state.rows >= self.max_rows:
+                self._new_sheet(state)
+            if text:
+                row = [_text_cell(state.ws, v) for v in row]
+            state.ws.append(row)
+            state.rows += 1
+            written += 1
+        return written
+
+    def write_frame(self, table: str, df: pd.DataFrame) -> int:
+        """追加一个 DataFrame；表头只在该表第一次写入时输出。"""
+        return self.append_rows(table, frame_rows(df), header=list(df.columns))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if not self._tables:
+            # openpyxl 不允许保存没有 sheet 的工作簿
+            self.wb.create_sheet(title='data')
+        self.wb.save(self.output_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
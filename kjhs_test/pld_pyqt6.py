@@ -1,13 +1,15 @@
 import sys
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import Border, Side, PatternFill, Font
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Border, Side, PatternFill, Font, NamedStyle
 from openpyxl.utils import get_column_letter
 import logging
 from logging import Logger
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Tuple
 import warnings
 
 from PyQt6.QtWidgets import (
@@ -49,6 +51,7 @@ class ConfigManager:
             cls.DEFAULT_CONFIG[key] = value
 
 from common.logger import get_logger, add_qt_signal
+from common.numeric import clean_numeric_text, to_numeric_fast
 
 class DataProcessor:
     """数据处理基类"""
@@ -63,8 +66,8 @@ class DataProcessor:
     
     @staticmethod
     def clean_numeric_string(series: pd.Series) -> pd.Series:
-        """清理数值字符串（去除逗号等）"""
-        return series.astype(str).str.replace(',', '').str.replace(' ', '')
+        """清理数值字符串（去除逗号、空格、全角字符、“元”，括号负数转负号）；数值列原样返回"""
+        return clean_numeric_text(series)
     
     def validate_dataframe(self, df: pd.DataFrame, required_columns: list) -> bool:
         """验证DataFrame是否包含必需的列"""
@@ -203,10 +206,8 @@ class AccountingProcessor(DataProcessor):
     def _convert_numeric_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """转换数值列"""
         for col in ['借方累计', '贷方累计']:
-            # 清理字符串并转换为数值
-            df[col] = self.safe_numeric_conversion(
-                self.clean_numeric_string(df[col])
-            ).fillna(0)
+            # 数值列直接使用，文本列清洗后再转换
+            df[col] = to_numeric_fast(df[col]).fillna(0)
         
         return df
     
@@ -234,137 +235,151 @@ class AccountingProcessor(DataProcessor):
         return df.groupby('单位编码', as_index=False)['会计核算_支出数'].sum()
 
 class ExcelFormatter:
-    """Excel格式化工具"""
-    
+    """Excel格式化工具：写出数据的同时应用格式，一次写出（不再写出后重新打开文件逐个单元格处理再保存）
+
+    - 边框、表头、百分比格式使用共享的命名样式，每个单元格只引用样式；
+    - 列宽按 DataFrame 各列字符串长度的最大值计算；
+    - 高偏离度行的底色使用条件格式（整个数据区域一条规则），不再逐个单元格填充。
+    """
+
+    HEADER_STYLE = '偏离度_表头'
+    CELL_STYLE = '偏离度_单元格'
+    PERCENT_STYLE = '偏离度_百分比'
+    DEVIATION_COLUMN = '偏离度'
+
     def __init__(self, logger: Logger):
         self.logger = logger
-    
-    def format_excel(self, file_path: Path, sheet_name: str, data_rows: int):
-        """格式化Excel文件"""
+
+    def write_excel(self, df: pd.DataFrame, file_path: Path, sheet_name: str):
+        """把 df 写出为带格式的 Excel 文件"""
         try:
-            wb = load_workbook(file_path)
-            ws = wb[sheet_name]
-            
-            self._apply_styles(ws)
-            self._adjust_column_widths(ws)
-            self._format_headers(ws)
-            self._format_data_rows(ws, data_rows)
-            self._add_features(ws, data_rows)
-            self._add_summary_statistics(ws, data_rows)
-            
+            wb = Workbook(write_only=True)
+            self._register_styles(wb)
+            ws = wb.create_sheet(sheet_name)
+
+            # write-only 模式下列宽、冻结窗格须在写入行之前设置
+            self._adjust_column_widths(ws, df)
+            self._add_features(ws, df)
+            self._write_rows(ws, df)
+            self._format_deviation_rows(ws, df)
+            self._add_summary_statistics(ws, df)
+
             wb.save(file_path)
             self.logger.info(f"Excel格式化完成: {file_path}")
-            
+
         except Exception as e:
             self.logger.error(f"Excel格式化失败: {str(e)}")
             raise
-    
-    def _apply_styles(self, ws):
-        """应用样式"""
+
+    def _register_styles(self, wb):
+        """注册命名样式"""
         thin_border = Border(
             left=Side(style='thin'), right=Side(style='thin'),
             top=Side(style='thin'), bottom=Side(style='thin')
         )
-        
-        # 为所有单元格添加边框
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.border = thin_border
-    
-    def _adjust_column_widths(self, ws):
-        """调整列宽"""
+        header = NamedStyle(name=self.HEADER_STYLE, border=thin_border)
+        header.font = Font(name='微软雅黑', bold=True, color='FFFFFF')
+        header.fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
+        cell = NamedStyle(name=self.CELL_STYLE, border=thin_border)
+        percent = NamedStyle(name=self.PERCENT_STYLE, border=thin_border,
+                             number_format=ConfigManager.get_config('percentage_format'))
+        for style in (header, cell, percent):
+            wb.add_named_style(style)
+
+    def _adjust_column_widths(self, ws, df: pd.DataFrame):
+        """调整列宽：表头与各列值的最大字符串长度"""
         max_column_width = ConfigManager.get_config('max_column_width')
         column_width_padding = ConfigManager.get_config('column_width_padding')
-        
-        column_widths = {}
-        for row in ws.iter_rows():
-            for i, cell in enumerate(row):
-                width = len(str(cell.value or ''))
-                column_widths[i] = max(column_widths.get(i, 0), width)
-        
-        for i, width in column_widths.items():
-            column_letter = get_column_letter(i + 1)
-            ws.column_dimensions[column_letter].width = min(
+
+        for i, col in enumerate(df.columns):
+            s = df[col]
+            width = len(str(col))
+            if len(s):
+                lengths = s.astype(str).str.len().where(s.notna(), 0)
+                width = max(width, int(lengths.max()))
+            ws.column_dimensions[get_column_letter(i + 1)].width = min(
                 width + column_width_padding, max_column_width
             )
-    
-    def _format_headers(self, ws):
-        """格式化表头"""
-        header_font = Font(name='微软雅黑', bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
-        
-        for cell in next(ws.iter_rows(min_row=1, max_row=1)):
-            cell.font = header_font
-            cell.fill = header_fill
-    
-    def _format_data_rows(self, ws, data_rows: int):
-        """格式化数据行"""
-        header = [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
-        
-        try:
-            deviation_index = header.index('偏离度')
-        except ValueError:
+
+    def _add_features(self, ws, df: pd.DataFrame):
+        """添加Excel功能"""
+        # 冻结窗格
+        ws.freeze_panes = 'A2'
+
+        # 自动筛选
+        max_col = get_column_letter(max(len(df.columns), 1))
+        ws.auto_filter.ref = f'A1:{max_col}{len(df) + 1}'
+
+    def _write_rows(self, ws, df: pd.DataFrame):
+        """写入表头与数据行，每个单元格引用命名样式"""
+        header = []
+        for col in df.columns:
+            cell = WriteOnlyCell(ws, value=str(col))
+            cell.style = self.HEADER_STYLE
+            header.append(cell)
+        ws.append(header)
+
+        # 各列的样式：偏离度列为百分比格式，其余为带边框的普通单元格
+        styles = [self.PERCENT_STYLE if col == self.DEVIATION_COLUMN else self.CELL_STYLE for col in df.columns]
+
+        # 按列转换为 Python 值（缺失值 -> None），再按行写出
+        columns = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns]
+        for values in zip(*columns):
+            row = []
+            for value, style in zip(values, styles):
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style
+                row.append(cell)
+            ws.append(row)
+
+    def _format_deviation_rows(self, ws, df: pd.DataFrame):
+        """高偏离度行标黄（条件格式）"""
+        if self.DEVIATION_COLUMN not in df.columns:
             self.logger.warning("未找到偏离度列，跳过偏离度格式化")
             return
-        
+        if df.empty:
+            return
+
+        deviation_col = get_column_letter(df.columns.get_loc(self.DEVIATION_COLUMN) + 1)
+        max_col = get_column_letter(len(df.columns))
+        high_deviation_threshold = ConfigManager.get_config('high_deviation_threshold')
         high_deviation_fill = PatternFill(
-            start_color='FFFF00', end_color='FFFF00', fill_type='solid'
+            start_color='FFFF00', end_color='FFFF00', bgColor='FFFF00', fill_type='solid'
         )
-        percentage_format = ConfigManager.get_config('percentage_format')
-        high_deviation_threshold = ConfigManager.get_config('high_deviation_threshold')
-        
-        for row in ws.iter_rows(min_row=2, max_row=data_rows + 1):
-            deviation_cell = row[deviation_index]
-            
-            if deviation_cell.value is not None:
-                deviation_cell.number_format = percentage_format
-                
-                # 高偏离度行标黄
-                if abs(deviation_cell.value) > high_deviation_threshold:
-                    for cell in row:
-                        cell.fill = high_deviation_fill
-    
-    def _add_features(self, ws, data_rows: int):
-        """添加Excel功能"""
-        # 冻结窗格
-        ws.freeze_panes = ws['A2']
-        
-        # 自动筛选
-        max_col = get_column_letter(ws.max_column)
-        ws.auto_filter.ref = f'A1:{max_col}{data_rows + 1}'
-    
-    def _add_summary_statistics(self, ws, data_rows: int):
+        ws.conditional_formatting.add(
+            f'A2:{max_col}{len(df) + 1}',
+            FormulaRule(
+                formula=[f'AND(ISNUMBER(${deviation_col}2),ABS(${deviation_col}2)>{high_deviation_threshold})'],
+                fill=high_deviation_fill
+            )
+        )
+
+    def _add_summary_statistics(self, ws, df: pd.DataFrame):
         """添加汇总统计"""
-        header = [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
-        
-        try:
-            deviation_index = header.index('偏离度')
-            deviation_col = get_column_letter(deviation_index + 1)
-        except ValueError:
+        if self.DEVIATION_COLUMN not in df.columns:
             self.logger.warning("未找到偏离度列，跳过统计信息")
             return
-        
-        summary_row = data_rows + 3
+
+        data_rows = len(df)
+        deviation_col = get_column_letter(df.columns.get_loc(self.DEVIATION_COLUMN) + 1)
         high_deviation_threshold = ConfigManager.get_config('high_deviation_threshold')
-        
-        # 添加统计信息
+
+        # 添加统计信息（数据之后空一行）
         statistics = [
             ('汇总统计', '', ''),
             ('总预算单位数', '', data_rows),
-            (f'偏离度高于{high_deviation_threshold * 100:.0f}%的预算单位数', '', 
+            (f'偏离度高于{high_deviation_threshold * 100:.0f}%的预算单位数', '',
              f'=COUNTIF({deviation_col}2:{deviation_col}{data_rows + 1},">{high_deviation_threshold}")'
              f'+COUNTIF({deviation_col}2:{deviation_col}{data_rows + 1},"<{-high_deviation_threshold}")'),
             (f'生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', '', '')
         ]
-        
+
+        ws.append([])
         for i, (col_a, col_b, col_c) in enumerate(statistics):
-            row_num = summary_row + i
-            ws[f'A{row_num}'] = col_a
-            ws[f'B{row_num}'] = col_b
-            ws[f'C{row_num}'] = col_c
-            
             if i == 0:  # 标题行加粗
-                ws[f'A{row_num}'].font = Font(bold=True)
+                col_a = WriteOnlyCell(ws, value=col_a)
+                col_a.font = Font(bold=True)
+            ws.append([col_a, col_b, col_c])
 
 class AnalysisWorker(QThread):
     """分析工作线程"""
@@ -542,7 +557,7 @@ class AccountingAnalyzer:
             # 安全计算偏离度
             try:
                 self.logger.info("正在计算偏离度...")
-                merged_df['偏离度'] = merged_df.apply(self._calculate_deviation_safe, axis=1)
+                merged_df['偏离度'] = self._calculate_deviation(merged_df)
                 self.logger.info("偏离度计算完成")
             except Exception as e:
                 self.logger.error(f"计算偏离度失败: {e}", exc_info=True)
@@ -571,11 +586,12 @@ class AccountingAnalyzer:
     
     
     @staticmethod
-    def _calculate_deviation_safe(row) -> Optional[float]:
-        """安全计算偏离度"""
-        if pd.notna(row['预算执行_支出数']) and row['预算执行_支出数'] != 0:
-            return row['差额'] / row['预算执行_支出数']
-        return None
+    def _calculate_deviation(df: pd.DataFrame) -> pd.Series:
+        """按列计算偏离度 = 差额 / 预算执行_支出数；预算执行_支出数为 0 或空值时为空值（NaN）"""
+        budget = df['预算执行_支出数']
+        valid = budget.notna() & (budget != 0)
+        # 无效行的除数替换为 1，避免除零警告，结果再置为空值
+        return (df['差额'] / budget.where(valid, 1)).where(valid)
     
     def save_results(self):
         """保存结果"""
@@ -593,26 +609,20 @@ class AccountingAnalyzer:
                 self.logger.error(f"创建输出目录失败: {e}")
                 raise
             
-            # 保存到Excel
+            # 写出并格式化Excel（一次写出）
             try:
-                self.logger.info(f"正在将数据写入 Excel 文件: {self.output_path}")
-                self.result_df.to_excel(self.output_path, sheet_name='偏离度', index=False)
+                self.logger.info(f"正在将数据写入 Excel 文件并格式化: {self.output_path}")
+                self.excel_formatter.write_excel(self.result_df, self.output_path, '偏离度')
                 self.logger.info("Excel 文件写入成功")
-            except Exception as e:
-                self.logger.error(f"写入 Excel 文件失败: {e}", exc_info=True)
-                raise
-            
-            # 格式化Excel
-            try:
-                self.logger.info("正在格式化 Excel 文件...")
-                self.excel_formatter.format_excel(
-                    self.output_path, '偏离度', len(self.result_df)
-                )
-                self.logger.info("Excel 文件格式化成功")
             except Exception as e:
                 self.logger.error(f"格式化 Excel 文件失败: {e}", exc_info=True)
-                # 不抛出异常，因为主要数据已经保存
-                self.logger.warning("继续返回已保存的结果（但可能缺少格式化）")
+                # 格式化失败时仍写出不带格式的数据
+                self.logger.warning("改为写出不带格式的结果")
+                try:
+                    self.result_df.to_excel(self.output_path, sheet_name='偏离度', index=False)
+                except Exception as e:
+                    self.logger.error(f"写入 Excel 文件失败: {e}", exc_info=True)
+                    raise
             
             self.logger.info(f"分析结果已保存到: {self.output_path}")
             return str(self.output_path)
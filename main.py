@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QFrame, QGridLayout, QHBoxLayout
@@ -205,4 +206,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包（PyInstaller）后的 Windows 程序中，进程池的工作进程会重新运行本程序；
+    # freeze_support 让工作进程只执行任务，而不是再打开一个主窗口（运维记录表并行读取多个 sheet 等）
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""JSON 输出吞吐对比：旧的 json.dump(indent=2) 整体写出、逐条 json.dumps 写出，与按批编码（compact / pretty）。
+
+运行方法（在项目根目录下执行）：
+
+    python tests/bench_json_writer.py [记录数，默认 500000]
+
+记录模拟 Excel 表格的一行（含日期、空值与小数），统计序列化并写入内存文件的耗时与吞吐（MB/s，
+按输出字节数计），并校验各种写法解析回来的记录相同。旧写法不能直接写出日期，逐条转换为字符串（计入耗时）。
+"""
+import sys
+import io
+import json
+import time
+import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel.json_writer import ChunkedJsonWriter
+
+
+def _records(n: int):
+    base = datetime.datetime(2024, 1, 1)
+    return [{
+        'BILLID': f'B{i:08d}', '单位名称': f'单位{i % 300}', 'QTY': i % 97, 'AMT': round(i * 1.25, 2),
+        'BILLDATE': base + datetime.timedelta(minutes=i), 'MEMO': None if i % 3 else f'备注{i}', 'FLAG': i % 2 == 0,
+    } for i in range(n)]
+
+
+def _iso(r):
+    return {k: v.isoformat() if isinstance(v, datetime.datetime) else v for k, v in r.items()}
+
+
+def _dump_indent(records):
+    f = io.StringIO()
+    json.dump([_iso(r) for r in records], f, ensure_ascii=False, indent=2)
+    return f
+
+
+def _per_record(records):
+    f = io.StringIO()
+    f.write('[')
+    for i, r in enumerate(records):
+        f.write((',\n  ' if i else '\n  ') + json.dumps(_iso(r), ensure_ascii=False))
+    f.write('\n]\n')
+    return f
+
+
+def _chunked(records, style):
+    f = io.StringIO()
+    writer = ChunkedJsonWriter(f, style=style)
+    writer.begin()
+    for r in records:
+        writer.add(r)
+    writer.end()
+    return f
+
+
+def _timeit(fn, repeat: int = 3):
+    """取多次运行的最短耗时。"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(n: int = 500000) -> None:
+    records = _records(n)
+    iso = [_iso(r) for r in records]
+    cases = [
+        ('json.dump(indent=2)', lambda: _dump_indent(records)),
+        ('逐条 json.dumps', lambda: _per_record(records)),
+        ('按批编码 compact', lambda: _chunked(records, 'compact')),
+        ('按批编码 pretty', lambda: _chunked(records, 'pretty')),
+    ]
+    print(f'记录数 {n}')
+    for name, fn in cases:
+        secs, f = _timeit(fn)
+        text = f.getvalue()
+        assert json.loads(text) == iso
+        mb = len(text.encode('utf-8')) / 1024 ** 2
+        print(f'  {name:<22} {secs:.3f}s  {mb:7.1f} MB  {mb / secs:6.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
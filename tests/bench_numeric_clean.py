@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""数值列转换基准：旧写法 astype(str) + str.replace + to_numeric 与 common.numeric.to_numeric_fast 对比。
+
+运行方法（在项目根目录下执行）：
+
+    python tests/bench_numeric_clean.py [行数，默认 1000000]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.numeric import to_numeric_fast
+
+
+def _old(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.astype(str).str.replace(',', '').str.replace(' ', ''), errors='coerce')
+
+
+def _timeit(fn, series: pd.Series) -> float:
+    start = time.perf_counter()
+    fn(series)
+    return time.perf_counter() - start
+
+
+def main(n: int = 1_000_000) -> None:
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(-1e6, 1e6, n).round(2)
+    text = pd.Series([f'{v:,.2f}' for v in amounts], dtype=object)
+    mixed = text.copy()
+    mixed[::7] = [f'({abs(v):,.2f})' for v in amounts[::7]]
+    mixed[1::11] = [f'{v:.2f}元' for v in amounts[1::11]]
+    cases = {
+        'float64 列': pd.Series(amounts),
+        '千分位文本列': text,
+        '混合格式文本列（括号负数、元）': mixed,
+    }
+    print(f'行数: {n:,}')
+    for name, series in cases.items():
+        old = _timeit(_old, series)
+        new = _timeit(to_numeric_fast, series)
+        print(f'{name:<24} 旧: {old:7.3f}s  新: {new:7.3f}s  加速: {old / new:6.1f}x')
+
+    # 千分位文本列两种写法结果相同；混合格式列新写法不再把括号负数与“元”解析为缺失值
+    pd.testing.assert_series_equal(_old(text), to_numeric_fast(text))
+    assert to_numeric_fast(mixed).notna().all()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
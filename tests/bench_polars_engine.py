@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""pandas 引擎与 polars 引擎对比：以 222.json 的单据为模板扩充到指定行数（含文本金额、日期与重复单据）。
+
+运行方法（在项目根目录下执行）：
+
+    python tests/bench_polars_engine.py [行数，默认 200000]
+
+分别统计扁平化之后的变换阶段（数值转换 + 日期解析 + 去重）与完整的 `_normalize_rows` 耗时，
+并校验两种引擎的结果完全一致。
+"""
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.flatten import flatten_records
+from json_to_excel.polars_engine import transform
+
+BASE = Path(__file__).resolve().parents[1] / 'json_to_excel'
+
+
+def _items(n: int):
+    with open(BASE / '222.json', 'r', encoding='utf-8') as f:
+        template = core.normalize_top_items(json.load(f))
+    items = []
+    for i in range(n):
+        rec = dict(template[i % len(template)])
+        rec['AMT'] = f'{(i * 37) % 1000003 / 100:,.2f}'
+        rec['GPAMT'] = f'({i % 977:,}.00)' if i % 5 == 0 else str(i % 977)
+        rec['PAY_DATE'] = f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}'
+        # 约 10% 的重复单据
+        rec['BILLID'] = f'{rec["BILLID"]}-{i % (n - n // 10)}'
+        items.append(rec)
+    return items
+
+
+def _pandas_transform(df, date_cols, dedupe_by):
+    df = core.coerce_numeric_columns(df)
+    df = core.parse_date_columns(df, date_cols)
+    return df.drop_duplicates(subset=dedupe_by, keep='first')
+
+
+def _timeit(fn, repeat: int = 3):
+    """取多次运行的最短耗时。"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(n: int = 200000) -> None:
+    items = _items(n)
+    kwargs = dict(date_cols=['PAY_DATE'], dedupe_by=['BILLID'])
+    flat = flatten_records(items)
+    print(f'行数: {n:,}，列数: {flat.shape[1]}，CPU 核数: {os.cpu_count()}（polars 按核数并行）')
+
+    t_pd, res_pd = _timeit(lambda: _pandas_transform(flat.copy(), **kwargs))
+    t_pl, res_pl = _timeit(lambda: transform(flat.copy(), **kwargs))
+    print(f'变换阶段    pandas: {t_pd:7.3f}s  polars: {t_pl:7.3f}s  加速: {t_pd / t_pl:5.1f}x')
+    pd.testing.assert_frame_equal(res_pd, res_pl)
+
+    t_pd, res_pd = _timeit(lambda: core._normalize_rows(items, **kwargs))
+    t_pl, res_pl = _timeit(lambda: core._normalize_rows(items, engine='polars', **kwargs))
+    print(f'完整流程    pandas: {t_pd:7.3f}s  polars: {t_pl:7.3f}s  加速: {t_pd / t_pl:5.1f}x')
+    pd.testing.assert_frame_equal(res_pd, res_pl)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""批量模式：目录/通配符输入，进程池并发转换，汇总清单记录每个文件的行数、耗时与失败原因。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import cli
+from json_to_excel.batch import IN_MEMORY_FACTOR, WORKER_BASE_BYTES, collect_inputs, default_jobs
+
+
+def _inputs(tmp_path: Path) -> Path:
+    src = tmp_path / 'in'
+    (src / 'sub').mkdir(parents=True)
+    for i, path in enumerate([src / 'a.json', src / 'b.json', src / 'sub' / 'a.json']):
+        path.write_text(json.dumps([{'BILLID': f'{i}-{j}', 'AMT': f'{j:,}'} for j in range(10 + i)]), encoding='utf-8')
+    (src / 'broken.json').write_text('[{"BILLID": 1', encoding='utf-8')
+    return src
+
+
+def test_batch_directory_with_pool(tmp_path):
+    tmp_path = Path(tmp_path)
+    src = _inputs(tmp_path)
+    manifest = cli.main(['-i', str(src), '-o', str(tmp_path / 'out'), '--jobs', '2'])
+    assert (manifest['files'], manifest['succeeded'], manifest['failed']) == (3, 2, 1)
+    assert manifest['total_rows'] == 10 + 11
+    written = json.loads((tmp_path / 'out' / 'manifest.json').read_text(encoding='utf-8'))
+    assert written['records'] == manifest['records']
+    by_name = {Path(r['input']).name: r for r in manifest['records']}
+    assert 'JSONDecodeError' in by_name['broken.json']['error']
+    assert by_name['a.json']['metrics']['bytes_read'] == (src / 'a.json').stat().st_size
+    assert len(pd.read_excel(tmp_path / 'out' / 'b.xlsx')) == 11
+
+
+def test_batch_glob_keeps_subdirectories(tmp_path):
+    tmp_path = Path(tmp_path)
+    src = _inputs(tmp_path)
+    manifest = cli.main(['-i', str(src / '**' / 'a.json'), '-o', str(tmp_path / 'out'), '--stream', '--jobs', '1',
+                         '--manifest', str(tmp_path / 'm.json')])
+    assert manifest['succeeded'] == 2
+    assert (tmp_path / 'out' / 'a.csv').exists() and (tmp_path / 'out' / 'sub' / 'a.csv').exists()
+    assert (tmp_path / 'm.json').exists()
+
+
+def test_ndjson_collected_only_when_streaming(tmp_path):
+    tmp_path = Path(tmp_path)
+    (tmp_path / 'a.json').write_text('[]', encoding='utf-8')
+    (tmp_path / 'b.jsonl').write_text('{"x": 1}\n', encoding='utf-8')
+    (tmp_path / 'c.ndjson').write_text('{"x": 2}\n', encoding='utf-8')
+    assert [p.name for p in collect_inputs(str(tmp_path))] == ['a.json']
+    assert [p.name for p in collect_inputs(str(tmp_path), stream=True)] == ['a.json', 'b.jsonl', 'c.ndjson']
+
+
+def test_file_with_bracket_is_not_batch(tmp_path):
+    tmp_path = Path(tmp_path)
+    path = tmp_path / 'report[1].json'
+    path.write_text(json.dumps([{'a': 1}]), encoding='utf-8')
+    assert not cli.is_batch_input(str(path))
+    assert cli.is_batch_input(str(tmp_path / '*.json')) and cli.is_batch_input(str(tmp_path))
+    cli.main(['-i', str(path), '-o', str(tmp_path / 'out.xlsx')])
+    assert len(pd.read_excel(tmp_path / 'out.xlsx')) == 1
+
+
+def test_default_jobs_limited_by_memory(tmp_path):
+    tmp_path = Path(tmp_path)
+    files = [tmp_path / f'{i}.json' for i in range(8)]
+    for f in files:
+        f.write_bytes(b'[]' + b' ' * 1000)
+    per_worker = WORKER_BASE_BYTES + 1002 * IN_MEMORY_FACTOR
+    assert default_jobs(files, stream=False, cpu_count=16, available=per_worker * 3) == 3
+    assert default_jobs(files, stream=False, cpu_count=2, available=per_worker * 100) == 2
+    assert default_jobs(files[:1], stream=True, cpu_count=16, available=0) == 1
+
+
+if __name__ == '__main__':
+    for fn in (test_batch_directory_with_pool, test_batch_glob_keeps_subdirectories, test_ndjson_collected_only_when_streaming,
+               test_file_with_bracket_is_not_batch, test_default_jobs_limited_by_memory):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
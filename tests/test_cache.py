@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""解析结果缓存：命中时结果与重新解析相同，文件内容变化后失效，总大小超过上限时淘汰最久未使用的缓存项。"""
+import sys
+import json
+import os
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.cache import ParsedCache
+
+
+def _write(path: Path, n: int) -> Path:
+    path.write_text(json.dumps([{'BILLID': f'B{i}', '名称': '单位', 'details': [{'line': i}]} for i in range(n)], ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def test_cache_hit_and_invalidate(tmp_path):
+    tmp_path = Path(tmp_path)
+    cache = ParsedCache(tmp_path / 'cache')
+    path = _write(tmp_path / 'a.json', 100)
+    first = core.load_json(path, cache=cache)
+    assert cache.hits == 0 and core.load_json(path, cache=cache) == first and cache.hits == 1
+    # 内容相同的副本共用缓存项
+    copy = tmp_path / 'copy.json'
+    copy.write_bytes(path.read_bytes())
+    assert cache.key(copy) == cache.key(path)
+    # 修改文件后重新解析
+    _write(path, 50)
+    os.utime(path, ns=(0, 0))
+    assert len(core.load_json(path, cache=cache)) == 50 and cache.hits == 1
+
+
+def test_lru_eviction(tmp_path):
+    tmp_path = Path(tmp_path)
+    paths = [_write(tmp_path / f'{i}.json', 300 + i) for i in range(3)]
+    probe = ParsedCache(tmp_path / 'probe')
+    probe.put('x', core.load_json(paths[0]))
+    cache = ParsedCache(tmp_path / 'cache', max_bytes=int(probe.size_bytes() * 2.5))
+    keys = [cache.key(p) for p in paths]
+    core.load_json(paths[0], cache=cache)
+    core.load_json(paths[1], cache=cache)
+    os.utime(cache.entry_path(keys[1]), (1, 1))
+    os.utime(cache.entry_path(keys[0]), (2, 2))
+    core.load_json(paths[2], cache=cache)
+    # 第 1 个文件最久未使用，被淘汰
+    assert not cache.entry_path(keys[1]).exists()
+    assert cache.entry_path(keys[0]).exists() and cache.entry_path(keys[2]).exists()
+    assert cache.size_bytes() <= cache.max_bytes
+
+
+if __name__ == '__main__':
+    for fn in (test_cache_hit_and_invalidate, test_lru_eviction):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""检查点与续传：取消或中途出错后以 resume=True 重新转换，输出与一次完成的转换完全相同，且不重复写出已提交的批次。"""
+import sys
+import json
+import pickle
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.checkpoint import checkpoint_dir
+from json_to_excel.progress import ConversionCancelled, ProgressReporter
+
+
+def _input(tmp_path: Path) -> Path:
+    json_path = tmp_path / 'bills.json'
+    items = [{'BILLID': f'B{i}', 'AMT': f'{i:,}', 'details': [{'line': j, 'price': j * 1.5} for j in range(i % 3)]} for i in range(3000)]
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+    return json_path
+
+
+class _Stop:
+    """第 n 次检查取消时中断：cancel=True 时请求取消，否则模拟崩溃（抛出异常）。"""
+
+    def __init__(self, n, cancel):
+        self.n, self.cancel, self.calls = n, cancel, 0
+
+    def reporter(self):
+        return ProgressReporter(cancel=self, min_interval=0)
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls < self.n:
+            return False
+        if not self.cancel:
+            raise RuntimeError('模拟崩溃')
+        return True
+
+
+@pytest.mark.parametrize('cancel', [True, False])
+def test_csv_resume_matches_full_run(tmp_path, cancel):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    kwargs = dict(batch_size=200, mode='multi')
+    expected, expected_report = core.stream_to_csv(json_path, tmp_path / 'full.csv', **kwargs)
+
+    out = tmp_path / 'out.csv'
+    with pytest.raises(ConversionCancelled if cancel else RuntimeError):
+        core.stream_to_csv(json_path, out, progress=_Stop(6, cancel).reporter(), checkpoint=True, checkpoint_interval=0, **kwargs)
+    with (checkpoint_dir(out) / 'checkpoint.pkl').open('rb') as f:
+        assert pickle.load(f)['position'][0] > 0
+
+    outputs, report = core.stream_to_csv(json_path, out, resume=True, **kwargs)
+    assert report == expected_report
+    for name, path in expected.items():
+        assert outputs[name].read_bytes() == path.read_bytes()
+    assert not checkpoint_dir(out).exists()
+
+
+def test_xlsx_resume_and_option_mismatch(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    core.stream_to_csv(json_path, tmp_path / 'full.xlsx', batch_size=200)
+    out = tmp_path / 'out.xlsx'
+    with pytest.raises(ConversionCancelled):
+        core.stream_to_csv(json_path, out, batch_size=200, progress=_Stop(4, True).reporter(), checkpoint=True, checkpoint_interval=0)
+    # 中断时不生成不完整的工作簿
+    assert not out.exists()
+    with pytest.raises(ValueError):
+        core.stream_to_csv(json_path, out, batch_size=100, resume=True)
+
+    core.stream_to_csv(json_path, out, batch_size=200, resume=True)
+    expected = pd.read_excel(tmp_path / 'full.xlsx', sheet_name=None)
+    actual = pd.read_excel(out, sheet_name=None)
+    assert list(actual) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name])
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
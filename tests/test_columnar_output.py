@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""列式输出：parquet/arrow/feather 带类型写出，流式按行组写出，multi 模式每张表一个文件。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+
+
+def _items(n=40):
+    return [{'BILLID': f'B{i}', 'AMT': f'{i * 1000:,}', 'qty': i, 'note': None if i % 5 else 'x',
+             'mixed': i if i % 2 else f's{i}',
+             'details': [{'line': j, 'price': j * 1.5} for j in range(i % 3)]} for i in range(n)]
+
+
+def test_convert_flat_parquet_typed(tmp_path):
+    tmp_path = Path(tmp_path)
+    df, report = core.convert_flat(_items(), tmp_path / 'out.xlsx', output_format='parquet')
+    out = pl.read_parquet(tmp_path / 'out.parquet')
+    assert out.columns == list(df.columns)
+    # '1,000' 等文本金额已转换为数值（全为整数时为 int64）
+    assert out.schema['AMT'] == pl.Int64
+    assert out.schema['qty'] == pl.Int64
+    assert out['AMT'].to_list() == df['AMT'].tolist()
+    assert out['note'].null_count() == report['missing_counts']['note']
+    assert out.schema['mixed'] == pl.String
+
+
+def test_stream_multi_row_groups(tmp_path):
+    tmp_path = Path(tmp_path)
+    items = _items()
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+
+    outputs, report = core.stream_to_csv(json_path, tmp_path / 'bills.arrow', batch_size=6, mode='multi', row_group_size=10)
+    assert outputs == {'data': tmp_path / 'bills.arrow', 'details': tmp_path / 'bills_details.arrow'}
+    parent_df, children, _ = core.convert_multi(items, tmp_path / 'mem.feather')
+    parent = pl.read_ipc(outputs['data'])
+    assert parent['BILLID'].to_list() == parent_df['BILLID'].tolist()
+    assert parent['AMT'].to_list() == parent_df['AMT'].tolist()
+    details = pl.read_ipc(outputs['details'])
+    assert details.height == report['children_counts']['details'] == len(children['details'])
+    assert pl.read_ipc(tmp_path / 'mem_details.feather')['price'].to_list() == children['details']['price'].tolist()
+    # 临时分段文件已清理
+    assert not list(tmp_path.glob('.columnar_*'))
+
+
+if __name__ == '__main__':
+    for fn in (test_convert_flat_parquet_typed, test_stream_multi_row_groups):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
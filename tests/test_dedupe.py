@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""流式去重：跨批次按键列去重（指纹超出内存上限时写入磁盘有序段），结果与内存模式的 drop_duplicates 相同，且支持续传。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.dedupe import StreamingDeduper, _merge_runs
+from json_to_excel.progress import ConversionCancelled, ProgressReporter
+
+
+def _input(tmp_path: Path) -> Path:
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, 1500, size=4000)
+    items = [{'BILLID': f'B{i}', 'LINE': int(i % 7), 'AMT': f'{n:,}'} for n, i in enumerate(ids)]
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+    return json_path
+
+
+def test_stream_dedupe_matches_drop_duplicates(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    kwargs = dict(batch_size=300, dedupe_by=['BILLID', 'LINE'], dedupe_memory_keys=200)
+    outputs, report = core.stream_to_csv(json_path, tmp_path / 'out.csv', **kwargs)
+    expected, _ = core.convert_flat(core.normalize_top_items(core.load_json(json_path)), tmp_path / 'mem.csv', dedupe_by=['BILLID', 'LINE'])
+    actual = pd.read_csv(outputs['data'])
+    pd.testing.assert_frame_equal(actual, pd.read_csv(tmp_path / 'mem.csv'))
+    assert report['row_count'] == len(expected) and report['duplicates_dropped'] == 4000 - len(expected)
+
+
+def test_merge_runs_and_spill(tmp_path):
+    tmp_path = Path(tmp_path)
+    rng = np.random.default_rng(1)
+    keys = np.unique(rng.integers(0, 2 ** 63, size=5000, dtype=np.uint64))
+    rng.shuffle(keys)
+    a, b = np.sort(keys[:3000]), np.sort(keys[3000:])
+    _merge_runs(a, b, tmp_path / 'merged.npy', block=64)
+    assert (np.load(tmp_path / 'merged.npy') == np.sort(keys)).all()
+
+    deduper = StreamingDeduper(['k'], max_memory_keys=100)
+    for start in range(0, 2000, 250):
+        deduper.filter(pd.DataFrame({'k': np.arange(start, start + 500) % 1000}))
+    assert deduper.seen == 1000 and deduper.dropped == 3000
+    assert len(deduper._disk) < 4 and sorted(p.name for p in deduper.spill_dir.iterdir()) == sorted(deduper._disk)
+    deduper.close()
+    assert not deduper.spill_dir.exists()
+
+
+def test_key_dtype_differs_between_batches():
+    # 同一个键在第 1 批中为 object 列（含 None 与文本），在第 2 批中为 int64 列：仍识别为重复
+    deduper = StreamingDeduper(['k'])
+    first = deduper.filter(pd.DataFrame({'k': pd.Series([1, None, 'x'], dtype=object), 'v': [1, 2, 3]}))
+    second = deduper.filter(pd.DataFrame({'k': pd.Series([1, 2], dtype='int64'), 'v': [4, 5]}))
+    assert first['v'].tolist() == [1, 2, 3] and second['v'].tolist() == [5]
+    deduper.close()
+
+
+def test_number_and_text_keys_distinct():
+    # 与 drop_duplicates 一致：1 与 '1'、True 与 'True' 是不同的键，1、1.0 与 True 相同
+    df = pd.DataFrame({'k': pd.Series([1, '1', True, 'True', 1.0, '1'], dtype=object)})
+    deduper = StreamingDeduper(['k'])
+    assert deduper.filter(df).index.tolist() == df.drop_duplicates('k').index.tolist() == [0, 1, 3]
+    deduper.close()
+    # 分两批、不同 dtype 时结果相同
+    deduper = StreamingDeduper(['k'])
+    assert deduper.filter(pd.DataFrame({'k': ['1', 'True']})).index.tolist() == [0, 1]
+    assert deduper.filter(pd.DataFrame({'k': [1, 2]})).index.tolist() == [0, 1]
+    assert deduper.filter(pd.DataFrame({'k': [True, 2.0]})).index.tolist() == []
+    deduper.close()
+
+
+class _CancelAfter:
+    def __init__(self, n):
+        self.n, self.calls = n, 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls >= self.n
+
+
+def test_stream_dedupe_resume(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    kwargs = dict(batch_size=300, dedupe_by=['BILLID'], dedupe_memory_keys=200)
+    expected, expected_report = core.stream_to_csv(json_path, tmp_path / 'full.csv', **kwargs)
+    out = tmp_path / 'out.csv'
+    with pytest.raises(ConversionCancelled):
+        core.stream_to_csv(json_path, out, progress=ProgressReporter(cancel=_CancelAfter(8), min_interval=0), checkpoint=True, checkpoint_interval=0, **kwargs)
+    outputs, report = core.stream_to_csv(json_path, out, resume=True, **kwargs)
+    assert report == expected_report
+    assert outputs['data'].read_bytes() == expected['data'].read_bytes()
+
+
+if __name__ == '__main__':
+    for fn in (test_key_dtype_differs_between_batches, test_number_and_text_keys_distinct):
+        fn()
+        print(f'{fn.__name__}: OK')
+    for fn in (test_stream_dedupe_matches_drop_duplicates, test_merge_runs_and_spill, test_stream_dedupe_resume):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
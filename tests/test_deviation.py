@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""会计核算偏离度：按列计算的结果与逐行 apply 的旧写法相同（预算执行_支出数为 0 或空值时为空值）。
+
+直接运行时给出两种写法的耗时对比：
+
+    python tests/test_deviation.py [行数，默认 500000]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from kjhs_test.pld_pyqt6 import AccountingAnalyzer
+
+
+def _old_row(row):
+    if pd.notna(row['预算执行_支出数']) and row['预算执行_支出数'] != 0:
+        return row['差额'] / row['预算执行_支出数']
+    return None
+
+
+def _old(df: pd.DataFrame) -> pd.Series:
+    return df.apply(_old_row, axis=1)
+
+
+def _frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    budget = rng.uniform(-1e6, 1e7, n).round(2)
+    budget[rng.random(n) < 0.05] = 0
+    budget[rng.random(n) < 0.05] = np.nan
+    actual = np.where(rng.random(n) < 0.1, 0, budget * rng.uniform(0.5, 1.5, n)).round(2)
+    df = pd.DataFrame({'预算执行_支出数': budget, '会计核算_支出数': actual})
+    df['差额'] = (df['会计核算_支出数'] - df['预算执行_支出数']).round(6)
+    return df
+
+
+def test_matches_row_apply():
+    df = _frame(5000)
+    new = AccountingAnalyzer._calculate_deviation(df)
+    pd.testing.assert_series_equal(new, _old(df).astype('float64'), check_names=False)
+    assert new[df['预算执行_支出数'].isna() | (df['预算执行_支出数'] == 0)].isna().all()
+    # 全部无效时旧写法得到全为 None 的 object 列，新写法为全 NaN 的 float 列，写出 Excel 时同为空单元格
+    df = pd.DataFrame({'预算执行_支出数': [0.0, np.nan], '差额': [1.0, 2.0]})
+    assert list(_old(df)) == [None, None] and AccountingAnalyzer._calculate_deviation(df).isna().all()
+
+
+def main(n: int = 500000) -> None:
+    df = _frame(n)
+    start = time.perf_counter()
+    old = _old(df)
+    old_secs = time.perf_counter() - start
+    start = time.perf_counter()
+    new = AccountingAnalyzer._calculate_deviation(df)
+    new_secs = time.perf_counter() - start
+    pd.testing.assert_series_equal(new, old.astype('float64'), check_names=False)
+    print(f'行数 {n}')
+    print(f'  逐行 apply: {old_secs:.3f}s')
+    print(f'  按列计算:   {new_secs:.4f}s （{old_secs / new_secs:.0f}x）')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""偏离度结果表：一次写出带格式的工作簿（命名样式、按列计算的列宽、高偏离度行的条件格式、汇总统计）。
+
+直接运行时给出与旧写法（to_excel 后重新打开文件逐个单元格格式化）的耗时对比：
+
+    python tests/test_excel_formatter.py [行数，默认 100000]
+"""
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from kjhs_test.pld_pyqt6 import ExcelFormatter
+
+logger = logging.getLogger('test_excel_formatter')
+
+
+def _frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    budget = rng.uniform(1e3, 1e7, n).round(2)
+    deviation = rng.normal(0, 0.1, n)
+    deviation[::7] = np.nan
+    return pd.DataFrame({
+        '预算单位': [f'单位{i:06d}' for i in range(n)],
+        '预算执行_支出数': budget,
+        '差额': (budget * np.nan_to_num(deviation)).round(2),
+        '偏离度': deviation,
+    })
+
+
+def test_single_pass_formatting():
+    df = _frame(50)
+    df.loc[0, '预算单位'] = '一个名称很长很长很长很长很长很长很长很长很长很长的预算单位'
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / 'out.xlsx'
+        ExcelFormatter(logger).write_excel(df, path, '偏离度')
+        wb = load_workbook(path)
+        ws = wb['偏离度']
+
+        assert [c.value for c in ws[1]] == list(df.columns)
+        assert ws['A1'].style == ExcelFormatter.HEADER_STYLE and ws['A1'].font.bold
+        assert ws['B2'].style == ExcelFormatter.CELL_STYLE and ws['B2'].border.left.style == 'thin'
+        assert ws['D3'].style == ExcelFormatter.PERCENT_STYLE and ws['D3'].number_format == '0.00%'
+        assert ws['D3'].value == pytest.approx(df.loc[1, '偏离度']) and ws['D2'].value is None  # NaN -> 空单元格
+        pd.testing.assert_frame_equal(pd.read_excel(path, nrows=len(df)), df)
+
+        # 列宽：最长值（或表头）+ 2，不超过 30
+        assert ws.column_dimensions['A'].width == 30
+        assert ws.column_dimensions['B'].width == df['预算执行_支出数'].astype(str).str.len().max() + 2
+        assert ws.freeze_panes == 'A2' and ws.auto_filter.ref == f'A1:D{len(df) + 1}'
+
+        # 高偏离度行：一条条件格式规则，而不是逐个单元格填充
+        ranges = list(ws.conditional_formatting)
+        assert len(ranges) == 1 and str(ranges[0].sqref) == f'A2:D{len(df) + 1}'
+        assert ranges[0].rules[0].formula == ['AND(ISNUMBER($D2),ABS($D2)>0.1)']
+        assert ws['A2'].fill.fill_type is None
+
+        # 汇总统计在数据之后空一行
+        summary = len(df) + 3
+        assert ws[f'A{summary - 1}'].value is None
+        assert ws[f'A{summary}'].value == '汇总统计' and ws[f'A{summary}'].font.bold
+        assert ws[f'C{summary + 1}'].value == len(df)
+        assert ws[f'C{summary + 2}'].value.startswith(f'=COUNTIF(D2:D{len(df) + 1},">0.1")')
+
+
+def _old_format(df: pd.DataFrame, path: Path) -> None:
+    """旧写法：to_excel 后重新打开，逐个单元格设置边框、列宽、表头与高偏离度行的填充。"""
+    from openpyxl.styles import Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    df.to_excel(path, sheet_name='偏离度', index=False)
+    wb = load_workbook(path)
+    ws = wb['偏离度']
+    thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    widths = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            cell.border = thin
+            widths[cell.column_letter] = max(widths.get(cell.column_letter, 0), len(str(cell.value or '')))
+    for col, width in widths.items():
+        ws.column_dimensions[col].width = min(width + 2, 30)
+    for cell in ws[1]:
+        cell.font = Font(name='微软雅黑', bold=True, color='FFFFFF')
+        cell.fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
+    fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+    for row in range(2, len(df) + 2):
+        cell = ws.cell(row=row, column=4)
+        cell.number_format = '0.00%'
+        if isinstance(cell.value, (int, float)) and abs(cell.value) > 0.1:
+            for c in ws[row]:
+                c.fill = fill
+    ws.freeze_panes = 'A2'
+    ws.auto_filter.ref = f'A1:{get_column_letter(ws.max_column)}{len(df) + 1}'
+    wb.save(path)
+
+
+def main(n: int = 100000) -> None:
+    df = _frame(n)
+    with tempfile.TemporaryDirectory() as d:
+        start = time.perf_counter()
+        _old_format(df, Path(d) / 'old.xlsx')
+        old_secs = time.perf_counter() - start
+        start = time.perf_counter()
+        ExcelFormatter(logger).write_excel(df, Path(d) / 'new.xlsx', '偏离度')
+        new_secs = time.perf_counter() - start
+    print(f'行数 {n}')
+    print(f'  to_excel + 重新打开格式化: {old_secs:.2f}s')
+    print(f'  一次写出:                  {new_secs:.2f}s （{old_secs / new_secs:.1f}x）')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
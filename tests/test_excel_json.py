@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Excel -> JSON 流式转换：三种 output_mode 与 NDJSON 的结果与 pd.read_excel 的记录相同（空单元格为 null）。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel.excel_json import SHEET_COLUMN, excel_to_json
+
+
+def _workbook(path: Path) -> Path:
+    users = pd.DataFrame({'id': [1, 2, None, 4], 'name': ['Alice', 'Bob', None, '张三'], 'joined': pd.to_datetime(['2024-01-02', None, None, '2024-03-04 05:06:07'], format='ISO8601')})
+    metrics = pd.DataFrame({'code': [100, 200], 'value': [3.14, 2.71]})
+    with pd.ExcelWriter(path) as w:
+        users.to_excel(w, sheet_name='users', index=False)
+        metrics.to_excel(w, sheet_name='metrics', index=False)
+    return path
+
+
+def _expected(path: Path):
+    out = {}
+    for name, df in pd.read_excel(path, sheet_name=None).items():
+        records = []
+        for rec in df.to_dict(orient='records'):
+            for k, v in rec.items():
+                if v is None or v is pd.NaT or (isinstance(v, float) and v != v):
+                    rec[k] = None
+                elif isinstance(v, pd.Timestamp):
+                    rec[k] = v.isoformat()
+                elif isinstance(v, float) and v.is_integer() and k == 'id':
+                    rec[k] = int(v)
+            records.append(rec)
+        out[name] = records
+    return out
+
+
+def test_modes_match_read_excel(tmp_path):
+    tmp_path = Path(tmp_path)
+    excel = _workbook(tmp_path / 'book.xlsx')
+    expected = _expected(excel)
+    merged = [r for recs in expected.values() for r in recs]
+    for mode, want in (('auto', expected), ('always_object', expected), ('always_array', merged)):
+        out = tmp_path / f'{mode}.json'
+        counts = excel_to_json(excel, out, output_mode=mode)
+        assert counts == {'users': 4, 'metrics': 2}
+        assert json.loads(out.read_text(encoding='utf-8')) == want
+        excel_to_json(excel, out, output_mode=mode, style='pretty', batch_rows=3)
+        assert out.read_text(encoding='utf-8') == json.dumps(want, ensure_ascii=False, indent=2)
+        excel_to_json(excel, tmp_path / f'{mode}.jsonl', output_mode=mode)
+        lines = [json.loads(line) for line in (tmp_path / f'{mode}.jsonl').read_text(encoding='utf-8').splitlines()]
+        if mode == 'always_array':
+            assert lines == merged
+        else:
+            assert lines == [dict(r, **{SHEET_COLUMN: name}) for name, recs in expected.items() for r in recs]
+
+
+def test_single_sheet_and_headers(tmp_path):
+    tmp_path = Path(tmp_path)
+    excel = tmp_path / 'one.xlsx'
+    pd.DataFrame([[1, 2, 3], [None, None, None], [4, 5, 6]]).to_excel(excel, index=False, header=['a', 'a', None])
+    excel_to_json(excel, tmp_path / 'one.json')
+    assert json.loads((tmp_path / 'one.json').read_text(encoding='utf-8')) == [
+        {'a': 1, 'a.1': 2, 'Unnamed: 2': 3}, {'a': None, 'a.1': None, 'Unnamed: 2': None}, {'a': 4, 'a.1': 5, 'Unnamed: 2': 6}]
+
+
+if __name__ == '__main__':
+    for fn in (test_modes_match_read_excel, test_single_sheet_and_headers):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
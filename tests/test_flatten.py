@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""SchemaFlattener / flatten_records 必须与 pd.json_normalize 的结果完全一致，并支持列模式增长。"""
+import sys
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import SchemaFlattener, flatten_records, normalize_top_items
+
+BASE = Path(__file__).resolve().parents[1] / 'json_to_excel'
+VALUES = [None, 1, 2.5, 'x', True, [1, 2], {'q': 1}, {'q': {'z': 's'}}, {}, 10 ** 18, float('nan')]
+KEYS = ['a', 'b', 'c', 'a.q', 'q']
+
+
+def _assert_same(expected: pd.DataFrame, actual: pd.DataFrame):
+    pd.testing.assert_frame_equal(expected, actual)
+    for col in expected.columns:
+        assert [repr(v) for v in expected[col].tolist()] == [repr(v) for v in actual[col].tolist()], col
+
+
+def test_matches_json_normalize_random():
+    rnd = random.Random(11)
+    for _ in range(500):
+        shared = rnd.sample(KEYS, rnd.randint(0, len(KEYS)))
+        records = []
+        for _ in range(rnd.randint(0, 8)):
+            keys = shared if rnd.random() < 0.7 else rnd.sample(KEYS, rnd.randint(0, len(KEYS)))
+            records.append({k: rnd.choice(VALUES) for k in keys})
+        _assert_same(pd.json_normalize(records, sep='.'), flatten_records(records, sample_size=rnd.randint(0, 4)))
+
+
+def test_matches_json_normalize_on_sample_file():
+    with open(BASE / '222.json', 'r', encoding='utf-8') as f:
+        items = normalize_top_items(json.load(f))
+    _assert_same(pd.json_normalize(items, sep='.'), flatten_records(items))
+
+
+def test_schema_grows_across_batches():
+    flattener = SchemaFlattener().infer([{'a': 1, 'b': {'c': 2}}])
+    assert flattener.columns == ['a', 'b.c']
+    first = flattener.to_frame([{'a': 1}])
+    assert list(first.columns) == ['a', 'b.c']
+    second = flattener.to_frame([{'d': 'x', 'b': {'c': 3, 'e': 4}}])
+    assert list(second.columns) == ['a', 'b.c', 'd', 'b.e']
+    assert second['b.e'].tolist() == [4]
+
+
+if __name__ == '__main__':
+    for fn in (test_matches_json_normalize_random, test_matches_json_normalize_on_sample_file, test_schema_grows_across_batches):
+        fn()
+        print(f'{fn.__name__}: OK')
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""按批写出 JSON：Timestamp/NaN/Decimal/numpy 标量不经 default= 回调即可写出，分批与一次性编码的结果相同。"""
+import sys
+import io
+import json
+import decimal
+import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel.json_writer import ChunkedJsonWriter
+
+
+def _write(records, groups=None, **kwargs) -> str:
+    f = io.StringIO()
+    writer = ChunkedJsonWriter(f, **kwargs)
+    writer.begin(groups is None)
+    if groups is None:
+        for r in records:
+            writer.add(r)
+    else:
+        for name in groups:
+            writer.begin_group(name)
+            for r in records:
+                writer.add(r)
+            writer.end_group()
+    writer.end(groups is None)
+    return f.getvalue()
+
+
+def test_special_values():
+    records = [{'i': 1, 's': '中文', 'f': 1.5}] * 3 + [
+        {'i': np.int64(2), 's': pd.Timestamp('2024-01-02 03:04:05'), 'f': float('nan')},
+        {'i': decimal.Decimal('3'), 's': datetime.date(2024, 1, 2), 'f': decimal.Decimal('1.25')},
+        {'i': pd.NA, 's': pd.NaT, 'f': np.float64('inf')},
+        {'i': True, 's': None, 'f': np.float32(0.5)},
+    ]
+    expected = [{'i': 1, 's': '中文', 'f': 1.5}] * 3 + [
+        {'i': 2, 's': '2024-01-02T03:04:05', 'f': None},
+        {'i': 3, 's': '2024-01-02', 'f': 1.25},
+        {'i': None, 's': None, 'f': None},
+        {'i': True, 's': None, 'f': 0.5},
+    ]
+    for batch_rows in (1, 2, 100):
+        assert json.loads(_write(records, batch_rows=batch_rows)) == expected
+        lines = _write(records, json_format='ndjson', batch_rows=batch_rows).splitlines()
+        assert [json.loads(line) for line in lines] == expected
+
+
+def test_layouts_match_json_dump():
+    records = [{'a': i, 'b': f'x{i}'} for i in range(7)]
+    assert _write(records, style='pretty', batch_rows=3) == json.dumps(records, ensure_ascii=False, indent=2)
+    assert _write(records, groups=['g1', 'g2'], style='pretty', batch_rows=3) == json.dumps({'g1': records, 'g2': records}, ensure_ascii=False, indent=2)
+    compact = _write(records, groups=['g1', 'g2'], batch_rows=3)
+    assert json.loads(compact) == {'g1': records, 'g2': records} and ': ' not in compact
+    assert _write([]) == '[]\n' and _write([], style='pretty') == '[]'
+
+
+if __name__ == '__main__':
+    test_special_values()
+    test_layouts_match_json_dump()
+    print('OK')
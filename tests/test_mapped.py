@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""内存映射读取：load_json 的结果与 json.load 相同（含 BOM、UTF-16），空文件退回为 bytes。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.mapped import decode_json_text, map_file
+
+
+def test_load_json_from_map(tmp_path):
+    tmp_path = Path(tmp_path)
+    data = [{'BILLID': f'B{i}', '名称': '单位', 'AMT': i * 1.5} for i in range(1000)]
+    text = json.dumps(data, ensure_ascii=False)
+    for name, raw in (('utf8.json', text.encode('utf-8')), ('bom.json', b'\xef\xbb\xbf' + text.encode('utf-8')),
+                      ('utf16.json', text.encode('utf-16-le'))):
+        path = tmp_path / name
+        path.write_bytes(raw)
+        calls = []
+        assert core.load_json(path, progress=lambda percent, info: calls.append(percent)) == data
+        assert calls[0] == 0 and calls[-1] == 100
+
+
+def test_empty_file_falls_back_to_bytes(tmp_path):
+    path = Path(tmp_path) / 'empty.json'
+    path.write_bytes(b'')
+    with map_file(path) as buf:
+        assert buf == b''
+        assert decode_json_text(buf) == ''
+
+
+if __name__ == '__main__':
+    for fn in (test_load_json_from_map, test_empty_file_falls_back_to_bytes):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
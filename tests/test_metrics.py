@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""转换指标：读取字节数来自文件本身，各阶段耗时与峰值内存写入返回的报告的 metrics 项（不写入 xlsx 的 report sheet），并以一条结构化日志输出。"""
+import sys
+import json
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.metrics import ConversionMetrics
+
+KEYS = {'input_path', 'input_bytes', 'bytes_read', 'parse_seconds', 'normalize_seconds', 'write_seconds', 'total_seconds', 'peak_rss_bytes'}
+
+
+def _input(tmp_path: Path) -> Path:
+    json_path = tmp_path / 'bills.json'
+    items = [{'BILLID': f'B{i}', 'AMT': f'{i:,}', 'details': [{'line': j} for j in range(i % 3)]} for i in range(50)]
+    json_path.write_text(json.dumps(items, ensure_ascii=False), encoding='utf-8')
+    return json_path
+
+
+def test_stream_metrics_in_report(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    metrics = ConversionMetrics(json_path)
+    _, report = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=7, mode='multi', metrics=metrics)
+    m = report['metrics']
+    assert set(m) == KEYS
+    assert m['bytes_read'] == m['input_bytes'] == json_path.stat().st_size
+    assert m['parse_seconds'] > 0 and m['normalize_seconds'] > 0 and m['write_seconds'] > 0
+    assert m['total_seconds'] >= m['parse_seconds'] + m['normalize_seconds'] + m['write_seconds']
+    # 未传入 metrics 时报告不变
+    _, plain = core.stream_to_csv(json_path, tmp_path / 'plain.csv', batch_size=7, mode='multi')
+    assert 'metrics' not in plain
+
+
+def test_flat_metrics_logged_as_one_record(tmp_path, caplog):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    metrics = ConversionMetrics(json_path)
+    data = core.load_json(json_path, metrics=metrics)
+    _, report = core.convert_flat(core.normalize_top_items(data), tmp_path / 'out.xlsx', metrics=metrics)
+    assert report['metrics']['bytes_read'] == json_path.stat().st_size
+
+    logger = logging.getLogger('test_metrics')
+    with caplog.at_level(logging.INFO, logger='test_metrics'):
+        record = metrics.log(logger, '[metrics]')
+    assert len(caplog.records) == 1
+    assert json.loads(caplog.records[0].getMessage().split(' ', 1)[1]) == record
+
+
+if __name__ == '__main__':
+    import pytest
+
+    sys.exit(pytest.main([__file__, '-q']))
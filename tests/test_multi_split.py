@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""multi 模式按子表累积子记录（不复制、parent_id 单独成列）：结果与逐条复制子记录再扁平化完全相同。"""
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.flatten import flatten_records
+
+
+def _items():
+    items = []
+    for i in range(300):
+        details = [{'line': j, 'price': j * 1.5, 'tax': {'rate': 0.13, 'code': f'T{j}'}} for j in range(i % 4)]
+        if i % 7 == 0 and details:
+            # 键顺序不同、缺少字段与后出现的新字段
+            details[0] = {'price': 9.0, 'memo': f'm{i}', 'line': 0}
+        item = {'BILLID': f'B{i}' if i % 11 else None, 'AMT': f'{i:,}', 'details': details}
+        if i % 5 == 0:
+            item['payments'] = [{'PAY': i, 'meta': {'by': 'x'}}]
+        items.append(item)
+    return items
+
+
+def test_children_match_copied_rows():
+    items = _items()
+    # 旧的做法：每条子记录复制后追加 __parent_id，再整体扁平化
+    parent_rows, copied = core.split_parent_children(items, parent_id_cols=core.PARENT_ID_CANDIDATES)
+    _, children = core._split_items(items, parent_id_cols=core.PARENT_ID_CANDIDATES)
+    assert list(children) == list(copied)
+    for name, rows in copied.items():
+        expected = flatten_records(rows)
+        pd.testing.assert_frame_equal(core._normalize_rows(children[name].records, extra=children[name].extra()), core._normalize_rows(rows))
+        pd.testing.assert_frame_equal(flatten_records(children[name].records, extra=children[name].extra()), expected)
+        parallel = core._normalize_rows(children[name].records, workers=2, extra=children[name].extra())
+        pd.testing.assert_frame_equal(parallel, core._normalize_rows(rows, workers=2))
+    # 原记录不被修改
+    assert all('__parent_id' not in d for item in items for d in item['details'])
+
+
+def test_stream_multi_matches_in_memory(tmp_path):
+    import json
+
+    tmp_path = Path(tmp_path)
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(_items()), encoding='utf-8')
+    _, children_dfs, _ = core.convert_multi(_items(), tmp_path / 'mem.csv')
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=50, mode='multi')
+    for name, df in children_dfs.items():
+        pd.testing.assert_frame_equal(pd.read_csv(outputs[name]), pd.read_csv(tmp_path / f'mem_{name}.csv'))
+
+
+if __name__ == '__main__':
+    test_children_match_copied_rows()
+    test_stream_multi_matches_in_memory(Path(tempfile.mkdtemp()))
+    print('OK')
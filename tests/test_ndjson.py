@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""NDJSON 输入：按文件开头检测格式，按换行对齐分块并行解析，无法解析的行给出准确的行数与字节位置。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.ndjson import NdjsonReader, detect_input_format, line_ranges
+
+
+def _records(n=500):
+    return [{'BILLID': f'B{i}', 'AMT': f'{i:,}', 'details': [{'line': j} for j in range(i % 3)]} for i in range(n)]
+
+
+def _ndjson(tmp_path: Path, name='bills.json'):
+    """写出 NDJSON，其中夹杂空行与两行坏数据，返回 (路径, 坏行的起始字节位置)。"""
+    lines = [json.dumps(r).encode() for r in _records()]
+    lines.insert(100, b'{"BILLID": "bad"')
+    lines.insert(300, b'')
+    lines.insert(400, b'not json')
+    data = b'\n'.join(lines) + b'\n'
+    offsets = [data.index(b'{"BILLID": "bad"'), data.index(b'not json')]
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path, offsets
+
+
+def test_detect_input_format(tmp_path):
+    tmp_path = Path(tmp_path)
+    ndjson_path, _ = _ndjson(tmp_path)
+    assert detect_input_format(ndjson_path) == 'ndjson'
+    array = tmp_path / 'array.json'
+    array.write_text(json.dumps(_records(10), indent=2), encoding='utf-8')
+    assert detect_input_format(array) == 'json'
+    obj = tmp_path / 'obj.json'
+    obj.write_text(json.dumps({'BILLID': 1}, indent=2), encoding='utf-8')
+    assert detect_input_format(obj) == 'json'
+    (tmp_path / 'one.jsonl').write_text('{"BILLID": 1}', encoding='utf-8')
+    assert detect_input_format(tmp_path / 'one.jsonl') == 'ndjson'
+
+
+def test_parallel_chunks_report_rejected_offsets(tmp_path):
+    tmp_path = Path(tmp_path)
+    path, offsets = _ndjson(tmp_path)
+    data = path.read_bytes()
+    ranges = line_ranges(path, chunk_bytes=2000)
+    assert len(ranges) > 4 and ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges)
+
+    reader = NdjsonReader(path, workers=2, chunk_bytes=2000)
+    values = list(reader)
+    assert values == _records()
+    assert reader.summary() == {'rejected_lines': 2, 'rejected_offsets': offsets}
+    assert reader.bytes_read == len(data)
+
+
+def test_stream_ndjson_matches_array(tmp_path):
+    tmp_path = Path(tmp_path)
+    path, offsets = _ndjson(tmp_path)
+    array = tmp_path / 'array.json'
+    array.write_text(json.dumps(_records()), encoding='utf-8')
+    expected, expected_report = core.stream_to_csv(array, tmp_path / 'array.csv', batch_size=100, mode='multi')
+    outputs, report = core.stream_to_csv(path, tmp_path / 'out.csv', batch_size=100, mode='multi', workers=2)
+    assert report.pop('rejected_lines') == 2 and report.pop('rejected_offsets') == offsets
+    assert report == expected_report
+    for name in expected:
+        pd.testing.assert_frame_equal(pd.read_csv(outputs[name]), pd.read_csv(expected[name]))
+
+
+def test_empty_ndjson_with_prescan(tmp_path):
+    tmp_path = Path(tmp_path)
+    for name, data in (('empty.jsonl', b''), ('blank.jsonl', b'\n  \n')):
+        path = tmp_path / name
+        path.write_bytes(data)
+        _, report = core.stream_to_csv(path, tmp_path / f'{name}.csv', prescan_mb=1, input_format='ndjson')
+        assert report['row_count'] == 0
+
+
+if __name__ == '__main__':
+    for fn in (test_detect_input_format, test_parallel_chunks_report_rejected_offsets, test_stream_ndjson_matches_array, test_empty_ndjson_with_prescan):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""common.numeric：数值列原样返回，文本列一次清洗千分位、全角数字、“元”与括号负数。"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common import numeric
+from common.numeric import clean_numeric_text, to_numeric_fast
+
+
+def test_numeric_columns_untouched():
+    s = pd.Series([1.5, np.nan, 3.0])
+    assert to_numeric_fast(s) is s
+    # 布尔值与原写法（astype(str) 后解析）一致，为缺失值
+    assert to_numeric_fast(pd.Series([True, False])).isna().all()
+    assert to_numeric_fast(pd.Series([True, '1,000'], dtype=object)).tolist()[1:] == [1000]
+    assert to_numeric_fast(pd.Series([True, '1,000'], dtype=object)).isna()[0]
+
+
+def test_text_formats():
+    s = pd.Series(['1,234.50', '１２３', '(1,000)', '88元', '￥ 9', '－５．５', 'abc', None, 7], dtype=object)
+    result = to_numeric_fast(s)
+    assert result[:6].tolist() == [1234.5, 123, -1000, 88, 9, -5.5]
+    assert result[6:8].isna().all()
+    assert result[8] == 7
+    # 非字符串单元格保持原值
+    assert clean_numeric_text(s)[8] == 7
+
+
+def test_without_polars_identical(monkeypatch):
+    # 未安装 polars 时逐个单元格清洗，结果与 polars 相同
+    cases = [
+        pd.Series(['1,234.50', '（１２）', '88元', '(1,000)', None, 'bad', '7'], dtype=object),
+        pd.Series(['1', '2', '(3)'], dtype=object),
+        pd.Series(['1_000', '2'], dtype=object),
+        pd.Series([1, '2,000', None, 'x', 2.5], dtype=object),
+        pd.Series(['1,000', None], dtype='str'),
+    ]
+    expected = [to_numeric_fast(s) for s in cases]
+    cleaned = [clean_numeric_text(s) for s in cases]
+    monkeypatch.setattr(numeric, '_import_polars', lambda: None)
+    for s, result, text in zip(cases, expected, cleaned):
+        pd.testing.assert_series_equal(to_numeric_fast(s), result)
+        pd.testing.assert_series_equal(clean_numeric_text(s), text)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
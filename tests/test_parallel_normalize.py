@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""多进程扁平化（workers>1）的结果必须与单进程完全一致：列顺序、dtype 与取值。"""
+import sys
+import json
+import random
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+
+BASE = Path(__file__).resolve().parents[1] / 'json_to_excel'
+
+
+def _mixed_items(n=400, seed=7):
+    """构造各分块类型推断可能不同的数据：整列 None、数字与字符串混合、晚出现的列等。"""
+    rnd = random.Random(seed)
+    values = [None, 1, 2.5, 'x', True, [1, 2], {'q': 1}, {}, 10 ** 18, '2024-01-01', '1,234']
+    items = []
+    for i in range(n):
+        rec = {k: rnd.choice(values) for k in rnd.sample(['a', 'b', 'c', 'AMT'], rnd.randint(0, 4))}
+        rec['d'] = rnd.choice([None, '2024-01-02', '2024/03/04', 'bad'])
+        if i > n // 2:
+            rec['late'] = i
+        items.append(rec)
+    return items
+
+
+def _assert_same(left: pd.DataFrame, right: pd.DataFrame):
+    pd.testing.assert_frame_equal(left, right)
+    # assert_frame_equal 会把 None 与 NaN 视为相等，这里逐值再比一次
+    for col in left.columns:
+        assert [repr(v) for v in left[col].tolist()] == [repr(v) for v in right[col].tolist()], col
+
+
+def test_parallel_matches_single_process(tmp_path):
+    tmp_path = Path(tmp_path)
+    items = _mixed_items()
+    single, _ = core.convert_flat(items, tmp_path / 'single.xlsx', date_cols=['d'])
+    parallel, _ = core.convert_flat(items, tmp_path / 'parallel.xlsx', date_cols=['d'], workers=3)
+    _assert_same(single, parallel)
+
+
+def test_parallel_matches_on_sample_file(tmp_path):
+    tmp_path = Path(tmp_path)
+    with open(BASE / '222.json', 'r', encoding='utf-8') as f:
+        items = core.normalize_top_items(json.load(f))
+    single, _ = core.convert_flat(items, tmp_path / 'single.xlsx')
+    parallel, _ = core.convert_flat(items, tmp_path / 'parallel.xlsx', workers=4)
+    _assert_same(single, parallel)
+
+
+if __name__ == '__main__':
+    for fn in (test_parallel_matches_single_process, test_parallel_matches_on_sample_file):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""进度与取消：进度只增不减且以 100 结束，流式模式按读取字节推进，回调限频，取消时抛出 ConversionCancelled。"""
+import sys
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.progress import ConversionCancelled, ProgressReporter
+
+
+def _input(tmp_path: Path, n=3000) -> Path:
+    json_path = tmp_path / 'bills.json'
+    items = [{'BILLID': f'B{i}', 'AMT': f'{i:,}', 'details': [{'line': j} for j in range(i % 3)]} for i in range(n)]
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+    return json_path
+
+
+def test_stream_progress_by_bytes(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    calls = []
+    reporter = ProgressReporter(lambda percent, info: calls.append((percent, dict(info))), min_interval=0)
+    outputs, report = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=500, mode='multi', progress=reporter)
+    percents = [p for p, _ in calls]
+    assert percents == sorted(percents) and percents[-1] == 100
+    assert calls[-1][1]['stage'] == 'done'
+    # 读取阶段按文件位置推进，最终读完整个文件
+    reads = [info['bytes_read'] for _, info in calls if info.get('stage') == 'stream']
+    assert reads == sorted(reads) and reads[-1] == json_path.stat().st_size
+    assert calls[-1][1]['rows_written'] == report['parent_row_count'] + sum(report['children_counts'].values())
+
+
+def test_in_memory_progress_rate_limited(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path, n=25000)
+    calls = []
+    data = core.load_json(json_path, progress=lambda percent, info: calls.append(percent))
+    assert calls[-1] == 100
+    calls.clear()
+    # 默认最小间隔 0.1s：写出 25000 行（3 个分片）时只有阶段切换与结束的回调必定发出
+    core.convert_flat(core.normalize_top_items(data), tmp_path / 'out.csv', progress=lambda percent, info: calls.append(percent))
+    assert calls[0] == 0 and calls[-1] == 100
+    assert calls == sorted(calls) and len(calls) <= 6
+
+
+def test_forced_update_always_delivered():
+    # 进度已到 100 时，结束回调仍然送出 stage='done'；强制回调的 percent 不会回退
+    calls = []
+    reporter = ProgressReporter(lambda percent, info: calls.append((percent, info['stage'])), min_interval=60)
+    reporter.update(1.0, stage='write')
+    reporter.update(0.5, force=True, stage='flush')
+    reporter.done()
+    assert calls == [(100, 'write'), (100, 'flush'), (100, 'done')]
+
+
+def test_cancel_stops_conversion(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    cancel = threading.Event()
+
+    def callback(percent, info):
+        if percent > 0:
+            cancel.set()
+
+    with pytest.raises(ConversionCancelled):
+        core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=500, progress=ProgressReporter(callback, cancel=cancel, min_interval=0))
+    cancel.set()
+    with pytest.raises(ConversionCancelled):
+        core.convert_multi([{'BILLID': 1}], tmp_path / 'out.xlsx', progress=ProgressReporter(cancel=cancel))
+
+
+if __name__ == '__main__':
+    test_forced_update_always_delivered()
+    print('test_forced_update_always_delivered: OK')
+    for fn in (test_stream_progress_by_bytes, test_in_memory_progress_rate_limited, test_cancel_stops_conversion):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
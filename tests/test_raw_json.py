@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""原始 JSON 保留：xlsx 的 raw_json sheet 按块分行（拼接后与原文件一致），CSV 输出为字节相同的附属文件。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import convert_222, core
+from json_to_excel.raw import EXCEL_MAX_CELL_CHARS, iter_raw_chunks, raw_side_path
+
+
+def _write_input(tmp_path: Path) -> Path:
+    # 单条记录的文本超过 Excel 单元格上限，且含中文与 emoji
+    items = [{'BILLID': f'B{i}', 'AMT': i, 'memo': '备注😀' * 4000 + str(i)} for i in range(5)]
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(items, ensure_ascii=False, indent=1), encoding='utf-8')
+    return json_path
+
+
+def _raw_cells(xlsx_path: Path):
+    wb = load_workbook(xlsx_path, read_only=True)
+    rows = [r[0] for r in wb['raw_json'].iter_rows(min_row=2, values_only=True)]
+    wb.close()
+    return rows
+
+
+def test_flat_raw_sheet_round_trip(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _write_input(tmp_path)
+    items = json.loads(json_path.read_text(encoding='utf-8'))
+    core.convert_flat(items, tmp_path / 'out.xlsx', None, None, None, raw_source=json_path)
+    cells = _raw_cells(tmp_path / 'out.xlsx')
+    assert len(cells) > 1
+    assert all(len(c.encode('utf-16-le')) // 2 <= EXCEL_MAX_CELL_CHARS for c in cells)
+    assert ''.join(cells) == json_path.read_text(encoding='utf-8')
+
+
+def test_raw_chunks_are_text(tmp_path):
+    # 以 `=` 开头的块写为文本而不是公式；无法解码的输入报错而不是替换字符
+    tmp_path = Path(tmp_path)
+    text = '=SUM(1,2)' + ' ' * 31991 + '=A1'
+    core.convert_flat([{'a': 1}], tmp_path / 'out.xlsx', raw_text=text)
+    wb = load_workbook(tmp_path / 'out.xlsx')
+    assert [c.data_type for c in wb['raw_json']['A'][1:]] == ['s', 's']
+    assert ''.join(c.value for c in wb['raw_json']['A'][1:]) == text
+
+    # convert_222 脚本的 raw_json sheet 同样为文本单元格
+    convert_222.write_excel_flat(pd.DataFrame({'a': [1]}), tmp_path / 'script.xlsx', raw_json_text=text)
+    wb = load_workbook(tmp_path / 'script.xlsx')
+    assert [c.data_type for c in wb['raw_json']['A'][1:]] == ['s', 's']
+    assert ''.join(c.value for c in wb['raw_json']['A'][1:]) == text
+
+    bad = tmp_path / 'bad.json'
+    bad.write_bytes(b'[{"a": "\xff"}]')
+    with pytest.raises(UnicodeDecodeError):
+        list(iter_raw_chunks(bad))
+
+
+def test_stream_raw_outputs(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _write_input(tmp_path)
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.xlsx', batch_size=2, raw_sheet=True)
+    assert ''.join(_raw_cells(outputs['raw_json'])) == json_path.read_text(encoding='utf-8')
+
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=2, raw_sheet=True)
+    assert outputs['raw_json'] == raw_side_path(tmp_path / 'out.csv', json_path)
+    assert outputs['raw_json'].read_bytes() == json_path.read_bytes()
+
+
+if __name__ == '__main__':
+    for fn in (test_flat_raw_sheet_round_trip, test_raw_chunks_are_text, test_stream_raw_outputs):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""报告累积器：流式分批累积的报告应与内存模式一致，去重计数在小基数时精确、大基数时误差可控。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.report import DistinctCounter, ReportAccumulator
+
+BASE = Path(__file__).resolve().parents[1] / 'json_to_excel'
+
+
+def _assert_same_report(left, right):
+    assert left.keys() == right.keys()
+    for key in left:
+        if key.endswith('numeric_sums'):
+            assert left[key] == pytest.approx(right[key]), key
+        else:
+            assert left[key] == right[key], key
+
+
+def test_stream_report_matches_in_memory(tmp_path):
+    tmp_path = Path(tmp_path)
+    with open(BASE / '222.json', 'r', encoding='utf-8') as f:
+        items = core.normalize_top_items(json.load(f))
+    _, report = core.convert_flat(items, tmp_path / 'flat.xlsx')
+    _, stream_report = core.stream_to_csv(BASE / '222.json', tmp_path / 'flat.csv', batch_size=37)
+    _assert_same_report(report, stream_report)
+    assert report['row_count'] == len(items)
+
+
+def test_stream_multi_report_matches_in_memory(tmp_path):
+    tmp_path = Path(tmp_path)
+    items = [{'BILLID': f'B{i}', 'AMT': f'{i * 1000:,}', 'flag': i % 3 or None,
+              'details': [{'line': j} for j in range(i % 4)]} for i in range(50)]
+    items[30]['late'] = 'x'
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+    _, _, report = core.convert_multi(items, tmp_path / 'bills.xlsx')
+    _, stream_report = core.stream_to_csv(json_path, tmp_path / 'bills.csv', batch_size=9, mode='multi')
+    _assert_same_report(report, stream_report)
+    assert report['parent_missing_counts']['late'] == 49
+    assert report['parent_numeric_max'] == {'AMT': 49000.0}
+    assert report['parent_distinct_counts']['flag'] == 2
+    assert report['children_counts'] == {'details': sum(i % 4 for i in range(50))}
+
+
+def test_accumulator_matches_full_frame():
+    df = pd.DataFrame({'AMT': [1.5, None, 3.0, -2.0] * 50, 'k': ['a', 'b', None, 'a'] * 50})
+    acc = ReportAccumulator()
+    for start in range(0, len(df), 33):
+        acc.update(df.iloc[start:start + 33])
+    summary = acc.summary()
+    assert summary['missing_counts'] == {k: int(v) for k, v in df.isna().sum().items()}
+    assert summary['numeric_sums']['AMT'] == df['AMT'].sum()
+    assert (summary['numeric_min']['AMT'], summary['numeric_max']['AMT']) == (-2.0, 3.0)
+    assert summary['distinct_counts'] == {k: int(v) for k, v in df.nunique().items()}
+
+
+def test_distinct_estimate_large_cardinality():
+    counter = DistinctCounter()
+    values = pd.Series(np.arange(200000))
+    for start in range(0, len(values), 30000):
+        counter.update(pd.util.hash_array(values[start:start + 30000].to_numpy(dtype='float64')))
+    assert abs(counter.estimate() - 200000) / 200000 < 0.03
+
+
+if __name__ == '__main__':
+    test_stream_report_matches_in_memory(Path(tempfile.mkdtemp()))
+    test_stream_multi_report_matches_in_memory(Path(tempfile.mkdtemp()))
+    test_accumulator_matches_full_frame()
+    test_distinct_estimate_large_cardinality()
+    print('OK')
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""流式模式的列顺序：后续批次才出现的列不会错位，重写表头后与内存模式一致；spill 模式写入附属文件；预扫描使表头一开始就完整。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+
+
+def _input(tmp_path: Path, details=False) -> Path:
+    json_path = tmp_path / 'bills.json'
+    items = [{'BILLID': f'B{i}', 'AMT': i * 10} for i in range(300)]
+    # 第二批开始出现新字段
+    for i in range(150, 300):
+        items[i]['REMARK'] = f'r{i}'
+    if details:
+        # 子表同样在后面的批次才出现新字段
+        for i in range(0, 300, 3):
+            items[i]['details'] = [{'line': 1, 'tax': 0.1}] if i >= 150 else [{'line': 0}]
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+    return json_path
+
+
+def test_rewrite_header_matches_in_memory(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path, details=True)
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=100, mode='multi')
+    core.convert_multi(core.normalize_top_items(core.load_json(json_path)), tmp_path / 'mem.xlsx')
+    mem = pd.read_excel(tmp_path / 'mem.xlsx', sheet_name=None)
+    actual = pd.read_csv(outputs['data'])
+    assert list(actual.columns)[-1] == 'REMARK'
+    assert actual['REMARK'].iloc[:150].isna().all() and actual['REMARK'].iloc[150] == 'r150'
+    details = pd.read_csv(outputs['details'])
+    assert details['tax'].notna().sum() == 50
+    for name, df in (('data', actual), ('details', details)):
+        assert list(df.columns) == list(mem[name].columns)
+        pd.testing.assert_frame_equal(df, mem[name], check_dtype=False)
+
+
+def test_spill_late_columns(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=100, late_columns='spill')
+    main = pd.read_csv(outputs['data'])
+    assert list(main.columns) == ['BILLID', 'AMT'] and len(main) == 300
+    late = pd.read_csv(outputs['data_late'])
+    assert list(late.columns) == ['__row', 'column', 'value']
+    assert len(late) == 150 and set(late['column']) == {'REMARK'}
+    assert (main.loc[late['__row'], 'BILLID'].str[1:].astype(int).to_numpy() == late['__row'].to_numpy()).all()
+
+    core.stream_to_csv(json_path, tmp_path / 'out.xlsx', batch_size=100)
+    sheets = pd.read_excel(tmp_path / 'out.xlsx', sheet_name=None)
+    assert list(sheets['data'].columns) == ['BILLID', 'AMT']
+    assert len(sheets['data_late']) == 150
+
+
+def test_prescan_fixes_header_up_front(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = _input(tmp_path)
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.csv', batch_size=100, late_columns='spill', prescan_mb=1)
+    assert list(pd.read_csv(outputs['data']).columns) == ['BILLID', 'AMT', 'REMARK']
+    assert 'data_late' not in outputs
+
+
+if __name__ == '__main__':
+    for fn in (test_rewrite_header_matches_in_memory, test_spill_late_columns, test_prescan_fixes_header_up_front):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
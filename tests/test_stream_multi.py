@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""流式 multi 模式：分批写出的主表/子表 CSV 应与 convert_multi 的结果一致。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+
+
+def _sample_items(n=23):
+    items = []
+    for i in range(n):
+        items.append({
+            'BILLID': f'B{i:03d}',
+            'AMT': f'{i * 1000:,}',
+            'tags': ['x', 'y'],
+            'details': [{'line': j, 'AMT': j * 1.5} for j in range(i % 3 + 1)],
+            'payees': [{'name': f'p{i}'}],
+        })
+    return items
+
+
+def test_stream_multi_matches_convert_multi(tmp_path):
+    tmp_path = Path(tmp_path)
+    items = _sample_items()
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(items, ensure_ascii=False), encoding='utf-8')
+
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'bills.csv', batch_size=7, mode='multi')
+    assert set(outputs) == {'data', 'details', 'payees'}
+    assert outputs['details'] == tmp_path / 'bills_details.csv'
+
+    parent_df, children, _ = core.convert_multi(items, tmp_path / 'bills.xlsx')
+    assert outputs['data'].read_text(encoding='utf-8') == parent_df.to_csv(index=False)
+    for name, df in children.items():
+        assert outputs[name].read_text(encoding='utf-8') == df.to_csv(index=False)
+
+
+def test_stream_multi_split_fields(tmp_path):
+    tmp_path = Path(tmp_path)
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(_sample_items(5)), encoding='utf-8')
+
+    outputs, _ = core.stream_to_csv(json_path, tmp_path / 'out.csv', mode='multi', split_fields=['details'])
+    assert set(outputs) == {'data', 'details'}
+    parent = pd.read_csv(outputs['data'])
+    assert len(parent) == 5
+    assert 'payees' in parent.columns
+
+
+if __name__ == '__main__':
+    for fn in (test_stream_multi_matches_convert_multi, test_stream_multi_split_fields):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""多 sheet 工作簿并行读取：结果（sheet 顺序、内容）与 pd.read_excel(sheet_name=None) 相同。"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common import workbook
+from common.workbook import read_workbook, workbook_sheets
+
+
+def _workbook(path: Path) -> Path:
+    with pd.ExcelWriter(path) as w:
+        for i, name in enumerate(['汇总', 'B&C <1>', 'big', 'empty']):
+            n = 0 if name == 'empty' else (2000 if name == 'big' else 50 * (i + 1))
+            pd.DataFrame({'id': np.arange(n), 'name': [f'{name}{j}' for j in range(n)], 'amt': np.arange(n) * 1.5}).to_excel(w, sheet_name=name, index=False)
+    return path
+
+
+def test_parallel_matches_read_excel(tmp_path, monkeypatch):
+    path = _workbook(Path(tmp_path) / 'book.xlsx')
+    sheets = workbook_sheets(path)
+    assert [name for name, _ in sheets] == ['汇总', 'B&C <1>', 'big', 'empty']
+    assert max(sheets, key=lambda s: s[1])[0] == 'big'
+    expected = pd.read_excel(path, sheet_name=None)
+    monkeypatch.setattr(workbook, 'PARALLEL_MIN_BYTES', 0)
+    actual = read_workbook(path, workers=2)
+    assert list(actual) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name])
+    # 参数传给 pd.read_excel
+    assert read_workbook(path, workers=2, dtype=str)['big']['id'].iloc[1] == '1'
+
+
+if __name__ == '__main__':
+    import pytest
+
+    sys.exit(pytest.main([__file__, '-q']))
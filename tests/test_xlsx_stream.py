@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""流式 xlsx 写入：换页、缺失值处理，以及 stream_to_csv 直接输出 xlsx。"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_to_excel import core
+from json_to_excel.xlsx_stream import StreamingXlsxWriter
+
+
+def test_rollover_repeats_header(tmp_path):
+    out = Path(tmp_path) / 'roll.xlsx'
+    with StreamingXlsxWriter(out, max_rows=4) as writer:
+        writer.write_frame('data', pd.DataFrame({'a': [1, 2, 3], 'b': [1.5, np.nan, 'x']}))
+        writer.write_frame('data', pd.DataFrame({'a': [4, 5], 'b': [None, 'y']}))
+        assert writer.sheet_names('data') == ['data', 'data_2']
+
+    sheets = pd.read_excel(out, sheet_name=None)
+    assert list(sheets) == ['data', 'data_2']
+    assert sheets['data']['a'].tolist() == [1, 2, 3]
+    assert sheets['data_2']['a'].tolist() == [4, 5]
+    assert pd.isna(sheets['data']['b'][1])
+
+
+def test_stream_to_xlsx_multi(tmp_path):
+    tmp_path = Path(tmp_path)
+    items = [{'BILLID': i, 'details': [{'line': j} for j in range(2)]} for i in range(10)]
+    json_path = tmp_path / 'bills.json'
+    json_path.write_text(json.dumps(items), encoding='utf-8')
+
+    out = tmp_path / 'bills.xlsx'
+    outputs, _ = core.stream_to_csv(json_path, out, batch_size=4, mode='multi')
+    assert outputs == {'data': out, 'details': out}
+    sheets = pd.read_excel(out, sheet_name=None)
+    assert len(sheets['data']) == 10
+    assert len(sheets['details']) == 20
+    assert sheets['details']['__parent_id'].tolist()[:2] == [0, 0]
+
+
+if __name__ == '__main__':
+    for fn in (test_rollover_repeats_header, test_stream_to_xlsx_multi):
+        fn(Path(tempfile.mkdtemp()))
+        print(f'{fn.__name__}: OK')
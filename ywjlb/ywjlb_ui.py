@@ -10,9 +10,9 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import QThread, pyqtSignal, Qt
 from PyQt6.QtGui import QFont
-import pandas as pd
 import os
 import logging
+from common.workbook import read_workbook
 from .ywjlb_unified import PackageType, process_excel_file
 
 # 获取模块日志记录器
@@ -427,8 +427,8 @@ class YWJLBAnalyzer(QMainWindow):
         try:
             self._append_log("正在加载数据...")
             
-            # 读取Excel文件
-            self.df = pd.read_excel(self.input_file_path, sheet_name=None)
+            # 读取Excel文件（多个工作表由多个进程并行解析）
+            self.df = read_workbook(self.input_file_path)
             
             # 统计信息
             total_rows = sum(len(df) for df in self.df.values())
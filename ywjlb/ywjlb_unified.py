@@ -15,6 +15,8 @@ import os
 import logging
 from enum import Enum
 
+from common.workbook import read_workbook
+
 # 获取模块日志记录器（日志配置由应用入口统一管理）
 logger = logging.getLogger(__name__)
 
@@ -400,8 +402,8 @@ def process_excel_file(excel_file: str, package_type: PackageType, output_dir: s
             raise FileNotFoundError(f"找不到Excel文件: {excel_file}")
         
         try:
-            # 读取所有工作表
-            all_sheets = pd.read_excel(excel_file, sheet_name=None)
+            # 读取所有工作表（多个工作表由多个进程并行解析）
+            all_sheets = read_workbook(excel_file)
             logging.info(f"成功读取Excel文件，共{len(all_sheets)}个工作表")
         except Exception as e:
             raise Exception(f"读取Excel文件失败: {str(e)}")